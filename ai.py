@@ -1,10 +1,18 @@
 import chess
 import chess.polyglot
+import atexit
+import json
 import math
+import os
 import random
+import threading
 import time
 
-from config import DEFAULT_TIME_LIMIT
+import lazy_smp
+from config import (DEFAULT_TIME_LIMIT, OPENING_BOOK, SEARCH_LOG, SEARCH_WORKERS, TT_SIZE_MB,
+                    TT_SNAPSHOT)
+from position import Position
+from transposition import TranspositionTable, slots_for_mb
 
 piece_values = {
     chess.PAWN: 1, chess.KNIGHT: 3, chess.BISHOP: 3,
@@ -73,11 +81,61 @@ piece_square_table = {
     ],
 }
 
+# Tabela única 12×64: material + PST em centipawns, já com o sinal da perspectiva
+# das brancas. Índice da peça: 0–5 brancas (P..K), 6–11 pretas.
+def _piece_index(piece_type, color):
+    return piece_type - 1 if color == chess.WHITE else piece_type + 5
+
+
+_PIECE_SQUARE_CP = [[0] * 64 for _ in range(12)]
+for _pt in chess.PIECE_TYPES:
+    for _sq in chess.SQUARES:
+        _PIECE_SQUARE_CP[_piece_index(_pt, chess.WHITE)][_sq] = (
+            piece_values[_pt] * 100 + piece_square_table[_pt][_sq])
+        _PIECE_SQUARE_CP[_piece_index(_pt, chess.BLACK)][_sq] = -(
+            piece_values[_pt] * 100 + piece_square_table[_pt][chess.square_mirror(_sq)])
+
+# Chaves Zobrist polyglot (as mesmas do livro de aberturas), indexadas por
+# (piece_type - 1) * 2 + cor e casa.
+_ZOBRIST_PIECE  = [chess.polyglot.POLYGLOT_RANDOM_ARRAY[64 * i:64 * (i + 1)] for i in range(12)]
+_ZOBRIST_DEBUG  = False  # True: confere o hash incremental contra o recálculo completo a cada push/pop
+
 _TT_EXACT      = 0
 _TT_LOWERBOUND = 1
 _TT_UPPERBOUND = 2
-_TT_MAX_SIZE   = 1_000_000
-_tt            = {}
+
+def _load_tt():
+    """TT do snapshot `TT_SNAPSHOT` (se existir e tiver o tamanho configurado) ou uma tabela nova."""
+    if TT_SNAPSHOT and os.path.exists(TT_SNAPSHOT):
+        try:
+            tt = TranspositionTable.load(TT_SNAPSHOT)
+        except (OSError, ValueError):
+            tt = None
+        if tt is not None and len(tt) == slots_for_mb(TT_SIZE_MB):
+            return tt
+        if tt is not None:
+            tt.release()
+    return TranspositionTable(TT_SIZE_MB)
+
+
+def save_tt(path=TT_SNAPSHOT):
+    """Grava a TT atual em `path`, para a próxima execução começar aquecida."""
+    if path:
+        _tt.save(path)
+
+
+def set_hash_size(size_mb):
+    """Troca a TT por uma vazia de `size_mb` MB (opção Hash do UCI); os helpers do Lazy SMP seguem o tamanho."""
+    global _tt, TT_SIZE_MB
+    if slots_for_mb(size_mb) != len(_tt):
+        _tt.release()
+        _tt = TranspositionTable(size_mb)
+    TT_SIZE_MB = size_mb
+
+
+_tt            = _load_tt()
+if TT_SNAPSHOT:
+    atexit.register(save_tt)
 _NMP_REDUCTION    = 2
 _LMR_MIN_DEPTH    = 3
 _LMR_FULL_MOVES   = 4
@@ -85,6 +143,11 @@ _ASPIRATION_DELTA = 0.5
 _killers          = {}   # {depth: [move1, move2]}
 _history          = {}   # {(from_sq, to_sq): score}
 _FUTILITY_MARGIN  = 1.0  # ~1 peão; poda quiet moves em depth==1 quando eval+margin <= alpha
+_MOBILITY_WEIGHT  = 0.05   # por casa/lance de diferença
+_MOBILITY_MODE    = "attacks"  # "attacks": popcount de ataques; "legal": contagem antiga de lances legais
+_PAWN_HASH_SIZE   = 1 << 14  # entradas da tabela de estrutura de peões
+_DELTA_MARGIN     = 2.0  # delta pruning na quiescence: ganho da captura + margem precisa alcançar alpha
+_MAX_SEARCH_DEPTH = 19
 
 _OPENING_LINES = [
     # === 1.e4 ===
@@ -185,6 +248,23 @@ def _build_opening_book():
 _opening_book = _build_opening_book()
 
 
+def open_polyglot_book(path):
+    """
+    Abre o livro polyglot `path` via mmap, ou retorna None se não houver um
+    válido. Nada é lido ao abrir: cada consulta é uma busca binária pela chave
+    Zobrist nas entradas ordenadas do arquivo, então o custo de iniciar não
+    depende do tamanho do livro.
+    """
+    if not path or not os.path.exists(path):
+        return None
+    try:
+        return chess.polyglot.open_reader(path)
+    except (OSError, ValueError):
+        return None  # tamanho que não é múltiplo de 16 bytes, arquivo ilegível...
+
+_polyglot_book = open_polyglot_book(OPENING_BOOK)
+
+
 def _pawn_structure_bonus(board, color):
     pawns = list(board.pieces(chess.PAWN, color))
     if not pawns:
@@ -212,62 +292,181 @@ def _pawn_structure_bonus(board, color):
     return score
 
 
-def _rook_file_bonus(board, color):
-    score          = 0.0
-    friendly_pawns = board.pieces(chess.PAWN, color)
-    enemy_pawns    = board.pieces(chess.PAWN, not color)
+def _pawn_files(pawns):
+    """Máscara de 8 bits com as colunas que têm peão em `pawns`."""
+    files = 0
+    for sq in chess.scan_forward(pawns):
+        files |= 1 << chess.square_file(sq)
+    return files
+
+
+def _rook_file_score(board, color, friendly_files, enemy_files):
+    score = 0.0
     for sq in board.pieces(chess.ROOK, color):
-        f            = chess.square_file(sq)
-        has_friendly = any(chess.square_file(p) == f for p in friendly_pawns)
-        has_enemy    = any(chess.square_file(p) == f for p in enemy_pawns)
-        if not has_friendly:
-            score += 0.35 if not has_enemy else 0.20
+        f = chess.square_file(sq)
+        if not friendly_files >> f & 1:
+            score += 0.35 if not enemy_files >> f & 1 else 0.20
     return score
 
 
-def _king_safety_bonus(board, color):
-    king_sq = board.king(color)
-    if king_sq is None:
-        return 0.0
-    if not board.pieces(chess.QUEEN, chess.WHITE) and not board.pieces(chess.QUEEN, chess.BLACK):
-        return 0.0
+def _rook_file_bonus(board, color):
+    return _rook_file_score(board, color,
+                            _pawn_files(board.pawns & board.occupied_co[color]),
+                            _pawn_files(board.pawns & board.occupied_co[not color]))
+
+
+def _king_shield_score(friendly_pawns, friendly_files, enemy_files, color, king_sq):
+    """Parte de peões da segurança do rei: escudo à frente e colunas abertas perto do rei."""
     score = 0.0
     kf = chess.square_file(king_sq)
     kr = chess.square_rank(king_sq)
-    friendly_pawns = board.pieces(chess.PAWN, color)
-    enemy_pawns    = board.pieces(chess.PAWN, not color)
-    shield_files   = [f for f in (kf - 1, kf, kf + 1) if 0 <= f <= 7]
+    shield_files = [f for f in (kf - 1, kf, kf + 1) if 0 <= f <= 7]
     for f in shield_files:
         r1 = kr + 1 if color == chess.WHITE else kr - 1
         r2 = kr + 2 if color == chess.WHITE else kr - 2
-        has_r1 = 0 <= r1 <= 7 and chess.square(f, r1) in friendly_pawns
-        has_r2 = 0 <= r2 <= 7 and chess.square(f, r2) in friendly_pawns
+        has_r1 = 0 <= r1 <= 7 and bool(friendly_pawns & chess.BB_SQUARES[chess.square(f, r1)])
+        has_r2 = 0 <= r2 <= 7 and bool(friendly_pawns & chess.BB_SQUARES[chess.square(f, r2)])
         if has_r1:
             score += 0.15
         elif has_r2:
             score += 0.05
-        file_has_friendly = any(chess.square_file(sq) == f for sq in friendly_pawns)
-        file_has_enemy    = any(chess.square_file(sq) == f for sq in enemy_pawns)
-        if not file_has_friendly:
-            score -= 0.25 if not file_has_enemy else 0.10
+        if not friendly_files >> f & 1:
+            score -= 0.25 if not enemy_files >> f & 1 else 0.10
     return score
 
 
-def evaluate_board(board):
-    if board.is_checkmate():
-        return math.inf if board.turn == chess.BLACK else -math.inf
-    if board.is_stalemate() or board.is_insufficient_material() or board.is_repetition(3):
-        return 0
-    if board.is_repetition(2):
-        return 0.3 if board.turn == chess.WHITE else -0.3
-    total_value = 0
-    for sq in chess.SQUARES:
-        p = board.piece_at(sq)
-        if p:
-            val = piece_values[p.piece_type] + (
-                piece_square_table[p.piece_type][sq if p.color else chess.square_mirror(sq)] / 100.0
-            )
-            total_value += val if p.color == chess.WHITE else -val
+def _king_safety_bonus(board, color):
+    king_sq = board.king(color)
+    if king_sq is None:
+        return 0.0
+    if not board.queens:
+        return 0.0
+    friendly_pawns = board.pawns & board.occupied_co[color]
+    enemy_pawns    = board.pawns & board.occupied_co[not color]
+    return _king_shield_score(friendly_pawns, _pawn_files(friendly_pawns),
+                              _pawn_files(enemy_pawns), color, king_sq)
+
+
+def _pawn_key(board):
+    """Chave Zobrist só dos peões (mesmas chaves polyglot das peças)."""
+    key = 0
+    for color in chess.COLORS:
+        row = _ZOBRIST_PIECE[color]  # (PAWN - 1) * 2 + cor
+        for sq in chess.scan_forward(board.pawns & board.occupied_co[color]):
+            key ^= row[sq]
+    return key
+
+
+class _PawnEntry:
+    """Termos que dependem só dos peões, calculados uma vez por estrutura."""
+    __slots__ = ("white_structure", "black_structure", "white_files", "black_files",
+                 "white_pawns", "black_pawns", "_shield")
+
+    def __init__(self, board):
+        self.white_pawns     = board.pawns & board.occupied_co[chess.WHITE]
+        self.black_pawns     = board.pawns & board.occupied_co[chess.BLACK]
+        self.white_structure = _pawn_structure_bonus(board, chess.WHITE)
+        self.black_structure = _pawn_structure_bonus(board, chess.BLACK)
+        self.white_files     = _pawn_files(self.white_pawns)
+        self.black_files     = _pawn_files(self.black_pawns)
+        self._shield         = {}
+
+    def files(self, color):
+        if color == chess.WHITE:
+            return self.white_files, self.black_files
+        return self.black_files, self.white_files
+
+    def king_shield(self, color, king_sq):
+        key   = (color, king_sq)
+        score = self._shield.get(key)
+        if score is None:
+            friendly_files, enemy_files = self.files(color)
+            pawns = self.white_pawns if color == chess.WHITE else self.black_pawns
+            score = _king_shield_score(pawns, friendly_files, enemy_files, color, king_sq)
+            self._shield[key] = score
+        return score
+
+
+class _PawnHashTable:
+    """
+    Cache de estrutura de peões indexado pela chave Zobrist só dos peões.
+    Tamanho fixo (potência de 2, mapeamento direto); a entrada nova sempre
+    substitui a antiga do mesmo índice.
+    """
+
+    def __init__(self, size):
+        self._keys    = [None] * size
+        self._entries = [None] * size
+        self._mask    = size - 1
+        self.probes   = 0
+        self.hits     = 0
+
+    def entry(self, board, key):
+        self.probes += 1
+        idx = key & self._mask
+        if self._keys[idx] == key:
+            self.hits += 1
+            return self._entries[idx]
+        entry = _PawnEntry(board)
+        self._keys[idx]    = key
+        self._entries[idx] = entry
+        return entry
+
+    def hit_rate(self):
+        return self.hits / self.probes if self.probes else 0.0
+
+    def reset_stats(self):
+        self.probes = self.hits = 0
+
+    def clear(self):
+        self._keys[:]    = [None] * len(self._keys)
+        self._entries[:] = [None] * len(self._entries)
+        self.reset_stats()
+
+
+_pawn_hash = _PawnHashTable(_PAWN_HASH_SIZE)
+
+
+class _SearchStats:
+    """Contadores da busca; incrementos de atributo, baratos o bastante para ficarem sempre ligados."""
+
+    __slots__ = ("nodes", "qnodes", "tt_probes", "tt_hits", "tt_cutoffs",
+                 "null_tries", "null_cutoffs", "lmr_tries", "lmr_researches")
+
+    def __init__(self):
+        self.reset()
+
+    def reset(self):
+        for name in self.__slots__:
+            setattr(self, name, 0)
+
+    def as_dict(self):
+        return {name: getattr(self, name) for name in self.__slots__}
+
+
+_stats = _SearchStats()
+
+
+def _attack_mobility(board, color):
+    """
+    Mobilidade pseudo-legal: casas atacadas por cavalos, bispos, torres e damas
+    de `color` que não têm peça própria nem são atacadas por peão adversário.
+    Só popcounts de bitboards — sem gerar lances nem empurrar lance nulo.
+    """
+    enemy_pawns = board.pawns & board.occupied_co[not color]
+    if color == chess.WHITE:
+        pawn_attacks = chess.shift_down_left(enemy_pawns) | chess.shift_down_right(enemy_pawns)
+    else:
+        pawn_attacks = chess.shift_up_left(enemy_pawns) | chess.shift_up_right(enemy_pawns)
+    targets = ~(board.occupied_co[color] | pawn_attacks)
+    count   = 0
+    for sq in chess.scan_forward(board.occupied_co[color] & ~board.pawns & ~board.kings):
+        count += chess.popcount(board.attacks_mask(sq) & targets)
+    return count
+
+
+def _legal_mobility(board):
+    """Mobilidade antiga: diferença de lances legais (duas gerações + lance nulo)."""
     if board.turn == chess.WHITE:
         white_moves = board.legal_moves.count()
         board.push(chess.Move.null())
@@ -278,10 +477,131 @@ def evaluate_board(board):
         board.push(chess.Move.null())
         white_moves = board.legal_moves.count()
         board.pop()
-    total_value += (white_moves - black_moves) * 0.05
-    total_value += _pawn_structure_bonus(board, chess.WHITE) - _pawn_structure_bonus(board, chess.BLACK)
-    total_value += _king_safety_bonus(board, chess.WHITE) - _king_safety_bonus(board, chess.BLACK)
-    total_value += _rook_file_bonus(board, chess.WHITE) - _rook_file_bonus(board, chess.BLACK)
+    return white_moves - black_moves
+
+
+def _material_pst_cp(board):
+    """Material + PST completos (centipawns, perspectiva das brancas) — O(peças)."""
+    total = 0
+    for color in chess.COLORS:
+        occ = board.occupied_co[color]
+        for pt in chess.PIECE_TYPES:
+            row = _PIECE_SQUARE_CP[_piece_index(pt, color)]
+            for sq in chess.scan_forward(board.pieces_mask(pt, color) & occ):
+                total += row[sq]
+    return total
+
+
+def _zobrist(board):
+    if isinstance(board, _SearchBoard):
+        return board.zobrist
+    return chess.polyglot.zobrist_hash(board)
+
+
+class _SearchBoard(Position):
+    """
+    Tabuleiro usado apenas dentro da busca: a Position de position.py com a
+    tabela de material + PST da avaliação. Material + PST, hash Zobrist
+    (compatível com polyglot) e chave dos peões chegam às folhas já
+    atualizados pelo push/pop, e a geração de lances não passa pelo chess.Board.
+    """
+
+    __slots__ = ()
+
+    def __init__(self, fen=chess.STARTING_FEN):
+        super().__init__(fen, _PIECE_SQUARE_CP)
+
+    @classmethod
+    def from_board(cls, board):
+        if _ZOBRIST_DEBUG:
+            cls = _CheckedSearchBoard
+        search_board = cls.__new__(cls)
+        search_board._load(board, _PIECE_SQUARE_CP)
+        return search_board
+
+
+class _CheckedSearchBoard(_SearchBoard):
+    """_SearchBoard do modo _ZOBRIST_DEBUG: confere o hash incremental a cada push/pop."""
+
+    __slots__ = ()
+
+    def push(self, move):
+        super().push(move)
+        self._verify_zobrist(move)
+
+    def pop(self):
+        move = super().pop()
+        self._verify_zobrist(move)
+        return move
+
+    def _verify_zobrist(self, move):
+        expected = chess.polyglot.zobrist_hash(self)
+        if self.zobrist != expected:
+            raise AssertionError(
+                f"Hash incremental divergiu após {move.uci()}: "
+                f"{self.zobrist:016x} != {expected:016x} ({self.fen()})"
+            )
+
+
+def _repetitions(board):
+    """Ocorrências da posição atual (1, 2 ou 3+), pelo histórico de hashes quando houver."""
+    if isinstance(board, Position):
+        return board.repetition_count(3)
+    if board.is_repetition(3):
+        return 3
+    return 2 if board.is_repetition(2) else 1
+
+
+def _game_result(board):
+    """
+    Valor da posição se ela não pede avaliação estática, senão None: mate (±inf),
+    afogamento, material insuficiente, regra dos 50 lances e tripla repetição (0),
+    ou repetição simples (±0.3). Mate e afogamento saem de uma única geração de
+    lances interrompida no primeiro lance legal (Position.has_legal_moves); a
+    repetição olha só os hashes desde o último lance irreversível.
+    """
+    if isinstance(board, Position):
+        has_moves = board.has_legal_moves()
+    else:
+        has_moves = any(True for _ in board.generate_legal_moves())
+    if not has_moves:
+        if board.is_check():
+            return math.inf if board.turn == chess.BLACK else -math.inf
+        return 0
+    if board.halfmove_clock >= 100 or board.is_insufficient_material():
+        return 0
+    repetitions = _repetitions(board)
+    if repetitions >= 3:
+        return 0
+    if repetitions == 2:
+        return 0.3 if board.turn == chess.WHITE else -0.3
+    return None
+
+
+def evaluate_board(board):
+    result = _game_result(board)
+    if result is not None:
+        return result
+    if isinstance(board, _SearchBoard):
+        total_value = board.material_pst / 100.0
+    else:
+        total_value = _material_pst_cp(board) / 100.0
+    if _MOBILITY_MODE == "legal":
+        total_value += _legal_mobility(board) * _MOBILITY_WEIGHT
+    else:
+        total_value += (_attack_mobility(board, chess.WHITE)
+                        - _attack_mobility(board, chess.BLACK)) * _MOBILITY_WEIGHT
+    pawns = _pawn_hash.entry(board, board.pawn_key if isinstance(board, _SearchBoard) else _pawn_key(board))
+    total_value += pawns.white_structure - pawns.black_structure
+    if board.queens:
+        white_king = board.king(chess.WHITE)
+        black_king = board.king(chess.BLACK)
+        total_value += (
+            (pawns.king_shield(chess.WHITE, white_king) if white_king is not None else 0.0)
+            - (pawns.king_shield(chess.BLACK, black_king) if black_king is not None else 0.0)
+        )
+    total_value += (_rook_file_score(board, chess.WHITE, *pawns.files(chess.WHITE))
+                    - _rook_file_score(board, chess.BLACK, *pawns.files(chess.BLACK)))
     if len(board.pieces(chess.BISHOP, chess.WHITE)) >= 2:
         total_value += 0.5
     if len(board.pieces(chess.BISHOP, chess.BLACK)) >= 2:
@@ -321,6 +641,19 @@ def _update_quiet_move_stats(move, depth):
             k.pop()
 
 
+def _age_history():
+    """
+    Entre buscas a history cai pela metade em vez de zerar: lances bons da
+    jogada anterior continuam na frente sem dominar para sempre. Killers
+    ficam; o move picker confere a legalidade antes de usá-los.
+    """
+    for key, value in list(_history.items()):
+        if value > 1:
+            _history[key] = value >> 1
+        else:
+            del _history[key]
+
+
 def order_moves(board, moves, depth=None):
     def score(move):
         if board.is_capture(move):
@@ -337,20 +670,156 @@ def order_moves(board, moves, depth=None):
     return sorted(moves, key=score, reverse=True)
 
 
+class _MovePicker:
+    """
+    Gera os lances de um nó em estágios, sob demanda:
+    TT move → capturas boas/promoções → killers → quiet moves (history) → capturas perdedoras.
+    O TT move é testado antes de qualquer geração; capturas só são pontuadas
+    quando alcançadas e os quiet moves só são gerados se nenhuma captura cortou.
+    Cada estágio materializa sua lista antes de entregar o primeiro lance, pois
+    o chamador faz push/pop no tabuleiro entre um lance e outro.
+    """
+
+    generations = 0  # estágios que geraram lances (métrica de benchmark)
+
+    def __init__(self, board, tt_move=None, depth=None):
+        self.board   = board
+        self.tt_move = tt_move
+        self.depth   = depth
+
+    def __iter__(self):
+        board   = self.board
+        tt_move = self.tt_move
+        if tt_move is not None:
+            if board.is_legal(tt_move):
+                yield tt_move
+            else:
+                tt_move = None
+
+        # Capturas (inclui en passant e promoções com captura) + promoções silenciosas
+        _MovePicker.generations += 1
+        us          = board.turn
+        promo_from  = board.pawns & board.occupied_co[us] & (chess.BB_RANK_7 if us == chess.WHITE else chess.BB_RANK_2)
+        good, bad   = [], []
+        for move in board.generate_legal_captures():
+            if move == tt_move:
+                continue
+            see = _see(board, move)
+            if see >= 0:
+                good.append((10000 + see, move))
+            else:
+                bad.append((see, move))
+        if promo_from:
+            for move in board.generate_legal_moves(promo_from, ~board.occupied):
+                if move != tt_move:
+                    good.append((9000 + piece_values[move.promotion] * 10, move))
+        good.sort(key=lambda item: item[0], reverse=True)
+        for _, move in good:
+            yield move
+
+        # Killers: quiet moves que cortaram em nós irmãos
+        killers = []
+        if self.depth is not None:
+            for move in _killers.get(self.depth, []):
+                if (move != tt_move and not move.promotion
+                        and not board.is_capture(move) and board.is_legal(move)):
+                    killers.append(move)
+                    yield move
+
+        # Quiet moves ordenados pela history heuristic (to_mask inclui casas próprias:
+        # o python-chess gera o roque internamente como rei-captura-torre)
+        _MovePicker.generations += 1
+        ep_square = board.ep_square
+        quiets = [
+            move for move in board.generate_legal_moves(~promo_from, ~board.occupied_co[not us])
+            if move != tt_move and move not in killers
+            and not (move.to_square == ep_square and board.is_en_passant(move))
+        ]
+        quiets.sort(key=lambda m: _history.get((m.from_square, m.to_square), 0), reverse=True)
+        yield from quiets
+
+        bad.sort(key=lambda item: item[0], reverse=True)
+        for _, move in bad:
+            yield move
+
+
 class _SearchTimeout(Exception):
     pass
 
 
+class SearchControl:
+    """
+    Deadline mutável com parada, aceito pela busca no lugar de um deadline float.
+    A busca testa `time.monotonic() >= deadline`; o float delega a comparação
+    para `__le__`, então minimax e quiescence não precisam saber qual dos dois
+    receberam. `max_nodes` limita os nós (minimax + quiescence) da busca atual,
+    um critério de parada que não depende da máquina nem da carga. `max_depth`
+    encerra a busca assim que uma iteração dessa profundidade termina (como
+    os outros limites, pode ser definido com a busca em andamento; `depth` é
+    a última iteração completa). `stop_event` (um threading.Event) é o sinal
+    de parada, que outra thread pode acionar; sem ele, cada controle cria o seu.
+    """
+
+    def __init__(self, deadline=math.inf, max_nodes=None, stop_event=None):
+        self.deadline   = deadline
+        self.max_nodes  = max_nodes
+        self.max_depth  = None
+        self.depth      = 0
+        self.stop_event = stop_event if stop_event is not None else threading.Event()
+
+    @property
+    def stopped(self):
+        return self.stop_event.is_set()
+
+    def stop(self):
+        self.stop_event.set()
+
+    def __le__(self, now):
+        if self.max_nodes is not None and _stats.nodes + _stats.qnodes >= self.max_nodes:
+            return True
+        if self.max_depth is not None and self.depth >= self.max_depth:
+            return True
+        return self.stop_event.is_set() or self.deadline <= now
+
+
+def _quiescence_moves(board):
+    """
+    Capturas e promoções legais para a quiescence, já ordenadas como em
+    order_moves, com o ganho material máximo de cada uma (para delta pruning).
+    Capturas que o SEE marca como perdedoras são descartadas.
+    """
+    us         = board.turn
+    promo_from = board.pawns & board.occupied_co[us] & (chess.BB_RANK_7 if us == chess.WHITE else chess.BB_RANK_2)
+    scored     = []
+    for move in board.generate_legal_captures():
+        see = _see(board, move)
+        if see < 0:
+            continue
+        victim = board.piece_type_at(move.to_square) or chess.PAWN  # en passant: casa vazia
+        gain   = piece_values[victim]
+        if move.promotion:
+            gain += piece_values[move.promotion] - 1
+        scored.append((10000 + see, gain, move))
+    if promo_from:
+        for move in board.generate_legal_moves(promo_from, ~board.occupied):
+            scored.append((9000 + piece_values[move.promotion] * 10,
+                           piece_values[move.promotion] - 1, move))
+    scored.sort(key=lambda item: item[0], reverse=True)
+    return [(gain, move) for _, gain, move in scored]
+
+
 def quiescence(board, alpha, beta, is_maximizing_player, deadline):
     if time.monotonic() >= deadline:
         raise _SearchTimeout()
+    _stats.qnodes += 1
     stand_pat = evaluate_board(board)
     if is_maximizing_player:
         if stand_pat >= beta:
             return beta
         alpha = max(alpha, stand_pat)
-        for move in order_moves(board, list(board.legal_moves)):
-            if not board.is_capture(move) and not move.promotion:
+        for gain, move in _quiescence_moves(board):
+            # Delta pruning: nem ganhando a peça capturada (+ margem) a posição alcança alpha
+            if stand_pat + gain + _DELTA_MARGIN <= alpha:
                 continue
             board.push(move)
             score = quiescence(board, alpha, beta, False, deadline)
@@ -363,8 +832,8 @@ def quiescence(board, alpha, beta, is_maximizing_player, deadline):
         if stand_pat <= alpha:
             return alpha
         beta = min(beta, stand_pat)
-        for move in order_moves(board, list(board.legal_moves)):
-            if not board.is_capture(move) and not move.promotion:
+        for gain, move in _quiescence_moves(board):
+            if stand_pat - gain - _DELTA_MARGIN >= beta:
                 continue
             board.push(move)
             score = quiescence(board, alpha, beta, True, deadline)
@@ -378,24 +847,31 @@ def quiescence(board, alpha, beta, is_maximizing_player, deadline):
 def minimax(board, depth, alpha, beta, is_maximizing_player, deadline, tt, allow_null=True):
     if time.monotonic() >= deadline:
         raise _SearchTimeout()
+    stats = _stats
+    stats.nodes     += 1
+    stats.tt_probes += 1
     original_alpha, original_beta = alpha, beta
-    z     = chess.polyglot.zobrist_hash(board)
-    entry = tt.get(z)
+    z     = _zobrist(board)
+    entry = tt.probe(z)
     tt_move = None
     if entry is not None:
+        stats.tt_hits += 1
         e_depth, e_val, e_flag, e_move = entry
         tt_move = e_move
         if e_depth >= depth:
             if e_flag == _TT_EXACT:
+                stats.tt_cutoffs += 1
                 return e_val
             elif e_flag == _TT_LOWERBOUND:
                 alpha = max(alpha, e_val)
             else:
                 beta = min(beta, e_val)
             if alpha >= beta:
+                stats.tt_cutoffs += 1
                 return e_val
-    if board.is_game_over():
-        return evaluate_board(board)
+    result = _game_result(board)
+    if result is not None:
+        return result
     if depth == 0:
         return quiescence(board, alpha, beta, is_maximizing_player, deadline)
     # Null Move Pruning
@@ -406,19 +882,18 @@ def minimax(board, depth, alpha, beta, is_maximizing_player, deadline, tt, allow
             for pt in (chess.QUEEN, chess.ROOK, chess.BISHOP, chess.KNIGHT)
         )
         if has_pieces:
+            stats.null_tries += 1
             board.push(chess.Move.null())
             null_score = minimax(board, depth - 1 - _NMP_REDUCTION, alpha, beta,
                                  not is_maximizing_player, deadline, tt, allow_null=False)
             board.pop()
             if is_maximizing_player and null_score >= beta:
+                stats.null_cutoffs += 1
                 return beta
             elif not is_maximizing_player and null_score <= alpha:
+                stats.null_cutoffs += 1
                 return alpha
-    legal = list(board.legal_moves)
-    if tt_move is not None and tt_move in board.legal_moves:
-        moves = [tt_move] + order_moves(board, [m for m in legal if m != tt_move], depth=depth)
-    else:
-        moves = order_moves(board, legal, depth=depth)
+    moves = _MovePicker(board, tt_move, depth)
     futility_eval = (
         evaluate_board(board)
         if depth == 1 and not board.is_check()
@@ -448,10 +923,12 @@ def minimax(board, depth, alpha, beta, is_maximizing_player, deadline, tt, allow
             not gives_check
         )
         if apply_lmr:
+            stats.lmr_tries += 1
             reduction = max(1, depth // 3)
             val = minimax(board, depth - 1 - reduction, alpha, beta,
                           not is_maximizing_player, deadline, tt)
             if (is_maximizing_player and val > alpha) or (not is_maximizing_player and val < beta):
+                stats.lmr_researches += 1
                 val = minimax(board, depth - 1, alpha, beta,
                               not is_maximizing_player, deadline, tt)
         else:
@@ -473,23 +950,22 @@ def minimax(board, depth, alpha, beta, is_maximizing_player, deadline, tt, allow
                     _update_quiet_move_stats(move, depth)
                 break
             beta = min(beta, val)
-    if len(tt) < _TT_MAX_SIZE:
-        flag = (
-            _TT_EXACT if original_alpha < best_val < original_beta
-            else (_TT_LOWERBOUND if best_val >= original_beta else _TT_UPPERBOUND)
-        )
-        tt[z] = (depth, best_val, flag, best_move_found)
+    flag = (
+        _TT_EXACT if original_alpha < best_val < original_beta
+        else (_TT_LOWERBOUND if best_val >= original_beta else _TT_UPPERBOUND)
+    )
+    tt.store(z, depth, best_val, flag, best_move_found)
     return best_val
 
 
-def _root_search(board, legal, depth, alpha, beta, is_white_turn, deadline):
+def _root_search(board, legal, depth, alpha, beta, is_white_turn, deadline, tt):
     best_value = -math.inf if is_white_turn else math.inf
     best_moves = []
     for move in legal:
         board.push(move)
         try:
             board_value = minimax(board, depth - 1, alpha, beta,
-                                  board.turn == chess.WHITE, deadline, _tt)
+                                  board.turn == chess.WHITE, deadline, tt)
         except _SearchTimeout:
             board.pop()
             raise
@@ -507,46 +983,359 @@ def _root_search(board, legal, depth, alpha, beta, is_white_turn, deadline):
     return best_value, best_moves
 
 
-def find_best_ai_move(board, time_limit=DEFAULT_TIME_LIMIT):
-    book_moves = [
-        m for m in _opening_book.get(chess.polyglot.zobrist_hash(board), [])
-        if m in board.legal_moves
-    ]
-    if book_moves:
-        return random.choice(book_moves)
-    _killers.clear()
-    _history.clear()
-    deadline           = time.monotonic() + time_limit
+def _iterative_deepening(board, deadline, tt, start_depth=1, max_depth=_MAX_SEARCH_DEPTH, shuffle_seed=None,
+                         on_iteration=None, rng=random):
+    """
+    Iterative deepening na raiz de um _SearchBoard.
+    Retorna (melhor lance, profundidade da última iteração completa, valor).
+    `start_depth` e `shuffle_seed` diversificam os helpers do Lazy SMP;
+    `on_iteration(depth, valor, lance)` é chamado a cada iteração completa;
+    `rng` desempata lances de mesmo valor (um random.Random com semente torna
+    a escolha reprodutível).
+    """
     is_white_turn      = board.turn == chess.WHITE
     initial_stack_size = len(board.move_stack)
     all_legal          = list(board.legal_moves)
     if not all_legal:
-        return None
+        return None, 0, None
     best_move  = order_moves(board, all_legal)[0]
+    best_depth = 0
     prev_score = None
-    for depth in range(1, 20):
+    entry      = tt.probe(board.zobrist) if start_depth == 1 else None
+    if entry is not None and entry[2] == _TT_EXACT and entry[3] in all_legal:
+        # Raiz já buscada (jogada anterior, desfazer + refazer, snapshot):
+        # retoma da profundidade guardada em vez de refazer as iterações.
+        best_move, best_depth, prev_score = entry[3], min(entry[0], max_depth), entry[1]
+        start_depth = best_depth + 1
+        if isinstance(deadline, SearchControl):
+            deadline.depth = best_depth
+        if on_iteration is not None:
+            on_iteration(best_depth, prev_score, best_move)
+    shuffler   = random.Random(shuffle_seed) if shuffle_seed is not None else None
+    for depth in range(start_depth, max_depth + 1):
         if time.monotonic() >= deadline:
             break
-        entry        = _tt.get(chess.polyglot.zobrist_hash(board))
+        entry        = tt.probe(board.zobrist)
         tt_root_move = entry[3] if entry else None
         if tt_root_move is not None and tt_root_move in board.legal_moves:
             legal = [tt_root_move] + order_moves(board, [m for m in all_legal if m != tt_root_move])
         else:
             legal = order_moves(board, all_legal)
+        if shuffler is not None:
+            tail = legal[1:]
+            shuffler.shuffle(tail)
+            legal = legal[:1] + tail
         use_asp = prev_score is not None and math.isfinite(prev_score)
         asp_lo  = (prev_score - _ASPIRATION_DELTA) if use_asp else -math.inf
         asp_hi  = (prev_score + _ASPIRATION_DELTA) if use_asp else math.inf
         candidate_move = None
         try:
-            best_value, best_moves = _root_search(board, legal, depth, asp_lo, asp_hi, is_white_turn, deadline)
+            best_value, best_moves = _root_search(board, legal, depth, asp_lo, asp_hi, is_white_turn, deadline, tt)
             if use_asp and (best_value <= asp_lo or best_value >= asp_hi):
-                best_value, best_moves = _root_search(board, legal, depth, -math.inf, math.inf, is_white_turn, deadline)
+                best_value, best_moves = _root_search(board, legal, depth, -math.inf, math.inf, is_white_turn, deadline, tt)
             if best_moves:
-                candidate_move = random.choice(best_moves)
+                candidate_move = rng.choice(best_moves)
+                tt.store(board.zobrist, depth, best_value, _TT_EXACT, candidate_move)
             prev_score = best_value
         except _SearchTimeout:
             while len(board.move_stack) > initial_stack_size:
                 board.pop()
         if candidate_move:
-            best_move = candidate_move
-    return best_move
+            best_move  = candidate_move
+            best_depth = depth
+            if isinstance(deadline, SearchControl):
+                deadline.depth = depth
+            if on_iteration is not None:
+                on_iteration(depth, prev_score, candidate_move)
+    return best_move, best_depth, prev_score
+
+
+def _principal_variation(board, tt, first_move, max_len):
+    """PV seguindo os lances da TT a partir de `first_move` (para em lance ilegal ou repetição)."""
+    board = chess.Board(board.fen())
+    pv    = []
+    seen  = set()
+    move  = first_move
+    while move is not None and len(pv) < max_len and board.is_legal(move):
+        pv.append(move)
+        board.push(move)
+        key = chess.polyglot.zobrist_hash(board)
+        if key in seen:
+            break
+        seen.add(key)
+        entry = tt.probe(key)
+        move  = entry[3] if entry else None
+    return pv
+
+
+def _json_score(score):
+    """Mate (±inf) vira a string "inf"/"-inf": JSON não tem infinito."""
+    return score if score is None or math.isfinite(score) else str(score)
+
+
+class SearchInfo:
+    """
+    Resultado estruturado de uma busca: lance, valor (em peões, do ponto de
+    vista das brancas), profundidade, PV e contadores da busca, no total e
+    por iteração. `to_json()` gera uma linha para o log JSON-lines.
+    """
+
+    def __init__(self, board):
+        self.fen        = board.fen()
+        self.move       = None
+        self.score      = None
+        self.depth      = 0
+        self.pv         = []
+        self.book       = False
+        self.elapsed    = 0.0
+        self.counters   = _SearchStats().as_dict()
+        self.pawn_hash_hit_rate = 0.0
+        self.iterations = []
+        self._start     = time.monotonic()
+
+    def _record_iteration(self, board, tt, depth, score, move):
+        self.move, self.score, self.depth = move, score, depth
+        self.pv      = _principal_variation(board, tt, move, depth)
+        self.elapsed = time.monotonic() - self._start
+        self.iterations.append({
+            "depth": depth, "score": _json_score(score), "pv": [m.uci() for m in self.pv],
+            "time": round(self.elapsed, 4), **_stats.as_dict(),
+        })
+
+    def _finish(self):
+        self.elapsed            = time.monotonic() - self._start
+        self.counters           = _stats.as_dict()
+        self.pawn_hash_hit_rate = _pawn_hash.hit_rate()
+
+    @property
+    def nodes(self):
+        return self.counters["nodes"] + self.counters["qnodes"]
+
+    @property
+    def nps(self):
+        return self.nodes / self.elapsed if self.elapsed > 0 else 0.0
+
+    @staticmethod
+    def _rate(part, whole):
+        return part / whole if whole else 0.0
+
+    @property
+    def tt_hit_rate(self):
+        return self._rate(self.counters["tt_hits"], self.counters["tt_probes"])
+
+    @property
+    def null_move_success_rate(self):
+        """Fração das tentativas de null move que cortaram o nó."""
+        return self._rate(self.counters["null_cutoffs"], self.counters["null_tries"])
+
+    @property
+    def lmr_success_rate(self):
+        """Fração das reduções (LMR) que não precisaram de re-busca completa."""
+        tries = self.counters["lmr_tries"]
+        return self._rate(tries - self.counters["lmr_researches"], tries)
+
+    def to_dict(self):
+        return {
+            "fen": self.fen, "move": self.move.uci() if self.move else None,
+            "score": _json_score(self.score),
+            "depth": self.depth, "pv": [m.uci() for m in self.pv], "book": self.book,
+            "time": round(self.elapsed, 4), "nps": round(self.nps),
+            **self.counters,
+            "tt_hit_rate": round(self.tt_hit_rate, 4),
+            "null_move_success_rate": round(self.null_move_success_rate, 4),
+            "lmr_success_rate": round(self.lmr_success_rate, 4),
+            "pawn_hash_hit_rate": round(self.pawn_hash_hit_rate, 4),
+            "iterations": self.iterations,
+        }
+
+    def to_json(self):
+        return json.dumps(self.to_dict())
+
+
+_search_log = None  # arquivo aberto do log JSON-lines (ver set_search_log)
+
+
+def set_search_log(path):
+    """Grava um SearchInfo por linha (JSON) em `path` a cada busca; None desliga."""
+    global _search_log
+    if _search_log is not None:
+        _search_log.close()
+    _search_log = open(path, "a", encoding="utf-8") if path else None
+
+
+def _log_search(info):
+    if _search_log is not None:
+        _search_log.write(info.to_json() + "\n")
+        _search_log.flush()
+
+
+set_search_log(SEARCH_LOG)
+
+
+def _search(board, deadline, workers=1, max_depth=_MAX_SEARCH_DEPTH, rng=random, on_iteration=None):
+    game  = board  # chess.Board com o histórico: é o que os helpers reconstroem
+    board = _SearchBoard.from_board(board)
+    if workers > 1:
+        helpers = lazy_smp.get_pool(workers - 1, TT_SIZE_MB)
+        tt      = helpers.tt
+    else:
+        helpers = None
+        tt      = _tt
+    tt.new_search()
+    _pawn_hash.reset_stats()
+    _stats.reset()
+    _age_history()
+    info = SearchInfo(board)
+    # os helpers recebem só o horário; a parada chega a eles por helpers.stop()
+    time_limit = deadline.deadline if isinstance(deadline, SearchControl) else deadline
+    if helpers is not None:
+        helpers.start_search(game, time_limit, tt.generation, max_depth)
+
+    def record(depth, value, move):
+        info._record_iteration(board, tt, depth, value, move)
+        if on_iteration is not None:
+            on_iteration(info)
+
+    best_move, best_depth, score = _iterative_deepening(
+        board, deadline, tt, max_depth=max_depth, rng=rng, on_iteration=record,
+    )
+    info.move, info.depth, info.score = best_move, best_depth, score
+    if helpers is not None:
+        if isinstance(deadline, SearchControl) and deadline.stopped:
+            helpers.stop()
+        helper_move, helper_depth = helpers.collect(time_limit)
+        if helper_move is not None and helper_depth > best_depth and board.is_legal(helper_move):
+            info.move, info.depth = helper_move, helper_depth
+            info.pv = _principal_variation(board, tt, helper_move, helper_depth)
+    info._finish()
+    return info
+
+
+def _book_moves(board):
+    return [
+        m for m in _opening_book.get(chess.polyglot.zobrist_hash(board), [])
+        if m in board.legal_moves
+    ]
+
+
+def _book_move(board, rng):
+    """
+    Lance de livro para `board` ou None. O livro polyglot, se carregado, tem
+    prioridade e sorteia pelo peso das entradas; fora dele valem as linhas
+    embutidas, com sorteio uniforme.
+    """
+    if _polyglot_book is not None:
+        try:
+            return _polyglot_book.weighted_choice(board, random=rng).move
+        except IndexError:
+            pass  # posição fora do livro (ou só com pesos zero)
+    moves = _book_moves(board)
+    return rng.choice(moves) if moves else None
+
+
+def _in_book(board):
+    if _polyglot_book is not None and _polyglot_book.get(board) is not None:
+        return True
+    return bool(_book_moves(board))
+
+
+def find_best_ai_move(board, time_limit=None, workers=SEARCH_WORKERS, with_info=False,
+                      max_nodes=None, max_depth=None, seed=None, stop=None, on_iteration=None, book=True):
+    """
+    Melhor lance para `board` (None sem lances legais). Com `with_info=True`
+    retorna `(lance, SearchInfo)`.
+
+    A busca para no primeiro limite atingido: `time_limit` segundos, `max_nodes`
+    nós ou `max_depth` de profundidade. Sem nenhum limite vale DEFAULT_TIME_LIMIT.
+    `seed` torna os desempates reprodutíveis; com `seed` ou `max_nodes` a busca
+    roda num processo só, e sem `time_limit` o resultado depende apenas da
+    posição, da semente e do estado da busca (ver reset_search_state).
+
+    `stop` é um threading.Event que outra thread aciona para abandonar a busca
+    (nova partida, desfazer...): ela é testada junto com o prazo a cada nó, então
+    a busca termina em milissegundos e retorna o melhor lance até ali, sem
+    entrar no log de buscas. `on_iteration(info)` recebe o SearchInfo a cada
+    iteração completa (profundidade, valor, PV e contadores até ali).
+    Com `book=False` os livros são ignorados e a posição é sempre buscada.
+    """
+    if time_limit is None and max_nodes is None and max_depth is None:
+        time_limit = DEFAULT_TIME_LIMIT
+    if seed is not None or max_nodes is not None:
+        workers = 1  # helpers do Lazy SMP tornariam o resultado dependente de escalonamento
+    rng        = random.Random(seed) if seed is not None else random
+    book_move  = _book_move(board, rng) if book else None
+    if book_move is not None:
+        info      = SearchInfo(board)
+        info.move = book_move
+        info.book = True
+        info.pv   = [info.move]
+    elif not any(board.generate_legal_moves()):
+        info = SearchInfo(board)
+    else:
+        deadline = time.monotonic() + time_limit if time_limit is not None else math.inf
+        if max_nodes is not None or stop is not None:
+            deadline = SearchControl(deadline, max_nodes, stop)
+        info = _search(board, deadline, workers, max_depth or _MAX_SEARCH_DEPTH, rng, on_iteration)
+    if stop is None or not stop.is_set():
+        _log_search(info)
+    return (info.move, info) if with_info else info.move
+
+
+def reset_search_state():
+    """Esvazia TT, killers, history e pawn hash: buscas seguintes partem do mesmo estado."""
+    _tt.clear()
+    _killers.clear()
+    _history.clear()
+    _pawn_hash.clear()
+
+
+def predicted_reply(board):
+    """
+    Resposta esperada do adversário na posição `board` (após o lance da IA):
+    o lance da TT, isto é, o segundo lance da PV da busca anterior.
+    """
+    entry = _tt.probe(_zobrist(board))
+    if entry is None or entry[3] is None or not board.is_legal(entry[3]):
+        return None
+    return entry[3]
+
+
+class Ponder:
+    """
+    Busca no tempo do adversário: pensa na posição após o lance esperado dele
+    numa thread, sem deadline, até `hit()` ou `stop()`.
+    `result` é uma lista de um elemento, preenchida quando a busca termina;
+    `on_iteration` é repassado à busca (ver find_best_ai_move).
+    """
+
+    def __init__(self, board, move, on_iteration=None):
+        self.move    = move
+        self.board   = board.copy()
+        self.board.push(move)
+        self.control = SearchControl()
+        self.result  = [None]
+        self._on_iteration = on_iteration
+        self.thread  = threading.Thread(target=self._run, daemon=True)
+        self.thread.start()
+
+    def _run(self):
+        self.info      = _search(self.board, self.control, on_iteration=self._on_iteration)
+        self.result[0] = self.info.move
+        if not self.control.stopped:
+            _log_search(self.info)  # ponder-hit (ou busca completa): virou lance jogado
+
+    def hit(self, time_limit, max_nodes=None, max_depth=None):
+        """
+        Ponder-hit: a busca continua, agora com `time_limit` segundos a partir de
+        agora e, se dados, os limites de nós e profundidade (contados desde o
+        início do ponder: o que já foi buscado vale para a jogada).
+        """
+        self.control.max_nodes = max_nodes
+        self.control.max_depth = max_depth
+        self.control.deadline  = time.monotonic() + time_limit
+
+    def stop(self):
+        """Ponder-miss ou fim de jogo: interrompe a busca; a TT preenchida é mantida."""
+        self.control.stop()
+        self.thread.join()
+
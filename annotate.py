@@ -0,0 +1,215 @@
+"""
+Anota partidas em PGN com a avaliação da IA, para revisar muitas partidas de uma vez.
+
+As partidas são lidas uma a uma (pgn_utils.iter_games) e as posições de cada
+uma, em blocos de lances consecutivos, vão para um pool de processos que faz
+uma busca de nós ou profundidade fixa em cada posição. O PGN anotado sai em
+fluxo, na ordem de entrada: cada lance ganha `[%eval ...]` e, se perdeu
+bastante em relação ao melhor lance, `?!`, `?` ou `??` com o lance sugerido.
+Há no máximo algumas dezenas de blocos em andamento, então a memória não
+cresce com o tamanho da entrada.
+
+    python annotate.py partidas.pgn > anotadas.pgn
+    python annotate.py a.pgn b.pgn --out anotadas.pgn --nodes 5000 --workers 4
+    python annotate.py partidas.pgn --depth 3
+"""
+import argparse
+import collections
+import math
+import multiprocessing
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import chess
+import chess.engine
+import chess.pgn
+
+import ai
+from pgn_utils import iter_games
+
+_DEFAULT_NODES   = 3000
+_CHUNK_PLIES     = 16    # posições consecutivas de uma partida por tarefa
+_JOBS_PER_WORKER = 4     # blocos em andamento por processo (limita a memória)
+_EVAL_CAP        = 10.0  # peões; mate e vantagens maiores contam como isso na perda
+_REPORT_EVERY    = 50    # partidas entre duas linhas de progresso
+
+# Perda mínima (peões, do ponto de vista de quem jogou) para cada marca, da maior para a menor
+_MARKS = [
+    (2.0, chess.pgn.NAG_BLUNDER, "blunders"),
+    (1.0, chess.pgn.NAG_MISTAKE, "mistakes"),
+    (0.5, chess.pgn.NAG_DUBIOUS_MOVE, "inaccuracies"),
+]
+
+
+def _evaluate(board, search):
+    """(valor das brancas em peões, tamanho da PV, profundidade, melhor lance em UCI) de `board`."""
+    if board.is_checkmate():
+        return (-math.inf if board.turn == chess.WHITE else math.inf), 0, 0, None
+    if board.is_game_over():
+        return 0.0, 0, 0, None
+    move, info = ai.find_best_ai_move(board, workers=1, with_info=True, seed=0, book=False, **search)
+    return info.score, len(info.pv), info.depth, move.uci()
+
+
+def analyse_chunk(root_fen, moves, start, end, search):
+    """
+    Avalia as posições `start`..`end - 1` da partida (posição depois de `ply`
+    lances). `moves` são os lances em UCI até pelo menos `end - 1`. O estado da
+    busca é zerado no início, então o resultado não depende de qual processo
+    pegou o bloco.
+    """
+    ai.reset_search_state()
+    board = chess.Board(root_fen)
+    for uci in moves[:start]:
+        board.push_uci(uci)
+    evals = []
+    for ply in range(start, end):
+        evals.append(_evaluate(board, search))
+        if ply < len(moves):
+            board.push_uci(moves[ply])
+    return evals
+
+
+class _Ready:
+    """Resultado já calculado, com a interface de Future (execução sem pool)."""
+
+    def __init__(self, value):
+        self._value = value
+
+    def result(self):
+        return self._value
+
+
+def _pov_score(score, pv_len, turn):
+    """PovScore das brancas para o `[%eval]`; mate em N a partir do tamanho da PV, como em engine.format_info."""
+    if not math.isinf(score):
+        return chess.engine.PovScore(chess.engine.Cp(round(score * 100)), chess.WHITE)
+    winner = chess.WHITE if score > 0 else chess.BLACK
+    mate   = (pv_len + 1) // 2 if turn == winner else pv_len // 2
+    return chess.engine.PovScore(chess.engine.Mate(mate if winner == chess.WHITE else -mate), chess.WHITE)
+
+
+def _capped(score, turn):
+    value = max(-_EVAL_CAP, min(_EVAL_CAP, score))
+    return value if turn == chess.WHITE else -value
+
+
+def annotate_game(game, evals, stats):
+    """Escreve avaliações e marcas na linha principal de `game`; `evals[i]` é a posição depois de i lances."""
+    board = game.board()
+    for ply, node in enumerate(game.mainline()):
+        best_score, _, _, best = evals[ply]
+        score, pv_len, depth, _ = evals[ply + 1]
+        mover    = board.turn
+        best_san = board.san(chess.Move.from_uci(best)) if best and best != node.move.uci() else None
+        board.push(node.move)
+        if score is None:
+            continue
+        if not board.is_game_over():  # mate e empate no tabuleiro já estão no próprio lance
+            node.set_eval(_pov_score(score, pv_len, board.turn), depth or None)
+        if best_san is None or best_score is None:
+            continue
+        loss = _capped(best_score, mover) - _capped(score, mover)
+        for threshold, nag, key in _MARKS:
+            if loss >= threshold:
+                node.nags.add(nag)
+                node.comment = (node.comment + " " if node.comment else "") + f"melhor: {best_san}"
+                stats[key] += 1
+                break
+
+
+def annotate(pgn_paths, out, nodes=None, depth=None, workers=1, chunk_plies=_CHUNK_PLIES, report=None):
+    """
+    Anota as partidas de `pgn_paths` e as escreve em `out` na mesma ordem.
+    Sem `nodes` nem `depth` vale _DEFAULT_NODES. Retorna partidas, posições,
+    marcas e tempo; `report(stats)` é chamado a cada partida escrita.
+    """
+    search = {}
+    if nodes is not None:
+        search["max_nodes"] = nodes
+    if depth is not None:
+        search["max_depth"] = depth
+    if not search:
+        search["max_nodes"] = _DEFAULT_NODES
+    annotator = "Chess-AI (" + ", ".join(f"{k}={v}" for k, v in search.items()) + ")"
+    stats   = {"games": 0, "positions": 0, "blunders": 0, "mistakes": 0, "inaccuracies": 0, "time": 0.0}
+    start   = time.perf_counter()
+    window  = max(1, workers) * _JOBS_PER_WORKER
+    pending = collections.deque()  # (partida, tarefas dos blocos), na ordem de entrada
+    in_flight = 0
+
+    def write_oldest():
+        nonlocal in_flight
+        game, jobs = pending.popleft()
+        evals = [e for job in jobs for e in job.result()]
+        in_flight -= len(jobs)
+        annotate_game(game, evals, stats)
+        game.headers["Annotator"] = annotator
+        print(game, file=out, end="\n\n")
+        out.flush()
+        stats["games"]     += 1
+        stats["positions"] += len(evals)
+        stats["time"]       = time.perf_counter() - start
+        if report is not None:
+            report(stats)
+
+    pool = None
+    if workers > 1:
+        pool = ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("spawn"))
+    try:
+        for game in iter_games(pgn_paths):
+            root  = game.board().fen()
+            moves = [move.uci() for move in game.mainline_moves()]
+            jobs  = []
+            for a in range(0, len(moves) + 1, chunk_plies):
+                b    = min(a + chunk_plies, len(moves) + 1)
+                args = (root, moves[:b], a, b, search)
+                jobs.append(pool.submit(analyse_chunk, *args) if pool else _Ready(analyse_chunk(*args)))
+            pending.append((game, jobs))
+            in_flight += len(jobs)
+            while in_flight > window:
+                write_oldest()
+        while pending:
+            write_oldest()
+    finally:
+        if pool is not None:
+            pool.shutdown(cancel_futures=True)
+    stats["time"] = time.perf_counter() - start
+    return stats
+
+
+def _progress_line(stats):
+    elapsed = stats["time"] or 1e-9
+    return (f"{stats['games']} partidas, {stats['positions']} posições em {elapsed:.1f}s "
+            f"({stats['games'] / elapsed:.2f} partidas/s, {stats['positions'] / elapsed:.1f} posições/s)")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Anota partidas PGN com a avaliação da IA.")
+    parser.add_argument("pgn", nargs="+", help="arquivos PGN")
+    parser.add_argument("--out", help="PGN anotado (padrão: saída padrão)")
+    limits = parser.add_mutually_exclusive_group()
+    limits.add_argument("--nodes", type=int, help=f"nós por posição (padrão: {_DEFAULT_NODES})")
+    limits.add_argument("--depth", type=int, help="profundidade por posição")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    args = parser.parse_args(argv)
+
+    def report(stats):
+        if stats["games"] % _REPORT_EVERY == 0:
+            print(_progress_line(stats), file=sys.stderr, flush=True)
+
+    out = open(args.out, "w", encoding="utf-8") if args.out else sys.stdout
+    try:
+        stats = annotate(args.pgn, out, args.nodes, args.depth, args.workers, report=report)
+    finally:
+        if args.out:
+            out.close()
+    print(_progress_line(stats), file=sys.stderr)
+    print(f"marcas: {stats['blunders']} ??, {stats['mistakes']} ?, {stats['inaccuracies']} ?!", file=sys.stderr)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
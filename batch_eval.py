@@ -0,0 +1,404 @@
+"""
+Avaliação em lote com NumPy: os mesmos termos de `ai.evaluate_board`
+(material + PST, mobilidade por ataques, estrutura de peões, segurança do rei,
+torres em colunas abertas e par de bispos) calculados para milhares de posições
+de uma vez, bit a bit iguais ao resultado de `evaluate_board`.
+
+As posições entram como tabuleiros ou como um array de planos de peças
+(N × 12 bitboards uint64, na ordem P N B R Q K brancas e depois pretas).
+Cada termo repete as mesmas operações de ponto flutuante, na mesma ordem, do
+código escalar; por isso o resultado é idêntico e não só próximo.
+
+    python batch_eval.py posicoes.epd             # avalia e mede posições/s
+    python batch_eval.py posicoes.epd --check     # confere contra evaluate_board
+"""
+import argparse
+import sys
+import time
+
+import chess
+import numpy as np
+
+import ai
+
+_CHUNK = 1 << 16  # posições por bloco: limita a memória dos planos desempacotados
+
+_U64      = np.uint64
+_NOT_A    = _U64(~chess.BB_FILE_A & chess.BB_ALL)
+_NOT_H    = _U64(~chess.BB_FILE_H & chess.BB_ALL)
+_NOT_AB   = _U64(~(chess.BB_FILE_A | chess.BB_FILE_B) & chess.BB_ALL)
+_NOT_GH   = _U64(~(chess.BB_FILE_G | chess.BB_FILE_H) & chess.BB_ALL)
+_ALL_ONES = _U64(chess.BB_ALL)
+
+# Direções dos sliders: (deslocamento, máscara contra a volta pela borda)
+_ORTHOGONAL = ((8, _ALL_ONES), (-8, _ALL_ONES), (1, _NOT_A), (-1, _NOT_H))
+_DIAGONAL   = ((9, _NOT_A), (7, _NOT_H), (-7, _NOT_A), (-9, _NOT_H))
+_KNIGHT     = ((17, _NOT_A), (15, _NOT_H), (10, _NOT_AB), (6, _NOT_GH),
+               (-6, _NOT_AB), (-10, _NOT_GH), (-15, _NOT_A), (-17, _NOT_H))
+
+_FILES = [_U64(chess.BB_FILES[f]) for f in range(8)]
+_SQ    = [_U64(chess.BB_SQUARES[sq]) for sq in chess.SQUARES]
+
+# Linhas (coluna, fileira e diagonais) que passam por cada casa; só peças nelas
+# podem estar cravadas no rei. Índice 64 (sem rei): todas as casas.
+_LINES = np.array([np.bitwise_or.reduce([_U64(chess.BB_RAYS[sq][other]) for other in chess.SQUARES])
+                   for sq in chess.SQUARES] + [_ALL_ONES], dtype=np.uint64)
+
+
+def _front_span(color, sq):
+    """Casas das colunas f-1..f+1 à frente de `sq` (onde um peão inimigo impede o peão passado)."""
+    f, r  = chess.square_file(sq), chess.square_rank(sq)
+    ranks = range(r + 1, 8) if color == chess.WHITE else range(0, r)
+    mask  = 0
+    for ff in (f - 1, f, f + 1):
+        if 0 <= ff <= 7:
+            for rr in ranks:
+                mask |= chess.BB_SQUARES[chess.square(ff, rr)]
+    return _U64(mask)
+
+
+def _adjacent_files(f):
+    return sum(1 << ff for ff in (f - 1, f + 1) if 0 <= ff <= 7)
+
+
+_FRONT_SPAN = {color: [_front_span(color, sq) for sq in chess.SQUARES] for color in chess.COLORS}
+# Passado: 0.10 + avanço * 0.05, calculado em Python como no código escalar
+_PASSED_BONUS = {color: [0.10 + (chess.square_rank(sq) if color == chess.WHITE else 7 - chess.square_rank(sq)) * 0.05
+                         for sq in chess.SQUARES] for color in chess.COLORS}
+
+
+def _shield_tables(color):
+    """
+    Por casa do rei e por coluna do escudo (kf-1, kf, kf+1): coluna válida,
+    casas uma e duas fileiras à frente (0 fora do tabuleiro) e o bit da coluna.
+    """
+    valid = np.zeros((64, 3), dtype=bool)
+    r1    = np.zeros((64, 3), dtype=np.uint64)
+    r2    = np.zeros((64, 3), dtype=np.uint64)
+    fbit  = np.zeros((64, 3), dtype=np.int64)
+    step  = 1 if color == chess.WHITE else -1
+    for king_sq in chess.SQUARES:
+        kf, kr = chess.square_file(king_sq), chess.square_rank(king_sq)
+        for j, f in enumerate((kf - 1, kf, kf + 1)):
+            if not 0 <= f <= 7:
+                continue
+            valid[king_sq, j] = True
+            fbit[king_sq, j]  = 1 << f
+            if 0 <= kr + step <= 7:
+                r1[king_sq, j] = chess.BB_SQUARES[chess.square(f, kr + step)]
+            if 0 <= kr + 2 * step <= 7:
+                r2[king_sq, j] = chess.BB_SQUARES[chess.square(f, kr + 2 * step)]
+    return valid, r1, r2, fbit
+
+
+_SHIELD = {color: _shield_tables(color) for color in chess.COLORS}
+
+# Material + PST por byte do bitboard: _PSQT_BYTES[plano, byte, valor] = soma dos centipawns
+# das casas daquele byte; 96 consultas por posição em vez de desempacotar 768 bits.
+_BYTE_BITS  = (np.arange(256)[:, None] >> np.arange(8)) & 1  # 256 × 8
+_PSQT_BYTES = np.einsum("vk,pbk->pbv", _BYTE_BITS,
+                        np.array(ai._PIECE_SQUARE_CP, dtype=np.int64).reshape(12, 8, 8))
+
+
+if hasattr(np, "bitwise_count"):
+    def _popcount(x):
+        return np.bitwise_count(x).astype(np.int64)
+else:
+    _BYTE_POPCOUNT = np.array([bin(i).count("1") for i in range(256)], dtype=np.int64)
+
+    def _popcount(x):
+        return _BYTE_POPCOUNT[x.reshape(-1, 1).view(np.uint8)].sum(axis=1).reshape(x.shape)
+
+
+def _shift(x, delta):
+    return x << _U64(delta) if delta > 0 else x >> _U64(-delta)
+
+
+def _slider_attacks(gen, empty, delta, mask):
+    """Ataques na direção `delta` (Kogge-Stone): raios de peças diferentes não se sobrepõem."""
+    empty = empty & mask
+    gen   = gen | (empty & _shift(gen, delta))
+    empty = empty & _shift(empty, delta)
+    gen   = gen | (empty & _shift(gen, 2 * delta))
+    empty = empty & _shift(empty, 2 * delta)
+    gen   = gen | (empty & _shift(gen, 4 * delta))
+    return _shift(gen, delta) & mask
+
+
+def _mobility(planes, color, occupied):
+    """Igual a ai._attack_mobility: soma, peça a peça, das casas atacadas que são alvos."""
+    base  = 0 if color == chess.WHITE else 6
+    other = 6 - base
+    ours  = planes[:, base:base + 6].copy()
+    own   = np.bitwise_or.reduce(ours, axis=1)
+    enemy_pawns = planes[:, other]
+    if color == chess.WHITE:
+        pawn_attacks = ((enemy_pawns >> _U64(9)) & _NOT_H) | ((enemy_pawns >> _U64(7)) & _NOT_A)
+    else:
+        pawn_attacks = ((enemy_pawns << _U64(7)) & _NOT_H) | ((enemy_pawns << _U64(9)) & _NOT_A)
+    targets = ~(own | pawn_attacks)
+    empty   = ~occupied
+    count   = np.zeros(len(planes), dtype=np.int64)
+    knights = ours[:, 1]
+    for delta, mask in _KNIGHT:
+        # cada deslocamento leva cavalos diferentes a casas diferentes: soma por peça
+        count += _popcount(_shift(knights, delta) & mask & targets)
+    orthogonal = ours[:, 3] | ours[:, 4]
+    diagonal   = ours[:, 2] | ours[:, 4]
+    for delta, mask in _ORTHOGONAL:
+        count += _popcount(_slider_attacks(orthogonal, empty, delta, mask) & targets)
+    for delta, mask in _DIAGONAL:
+        count += _popcount(_slider_attacks(diagonal, empty, delta, mask) & targets)
+    return count
+
+
+def _attacks(planes, color, occupied):
+    """Casas atacadas pelas peças de `color` (peões, cavalos, sliders e rei)."""
+    base  = 0 if color == chess.WHITE else 6
+    pawns = planes[:, base]
+    if color == chess.WHITE:
+        attacked = ((pawns << _U64(7)) & _NOT_H) | ((pawns << _U64(9)) & _NOT_A)
+    else:
+        attacked = ((pawns >> _U64(9)) & _NOT_H) | ((pawns >> _U64(7)) & _NOT_A)
+    empty      = ~occupied
+    orthogonal = planes[:, base + 3] | planes[:, base + 4]
+    diagonal   = planes[:, base + 2] | planes[:, base + 4]
+    for delta, mask in _KNIGHT:
+        attacked |= _shift(planes[:, base + 1], delta) & mask
+    for delta, mask in _ORTHOGONAL:
+        attacked |= _slider_attacks(orthogonal, empty, delta, mask)
+        attacked |= _shift(planes[:, base + 5], delta) & mask
+    for delta, mask in _DIAGONAL:
+        attacked |= _slider_attacks(diagonal, empty, delta, mask)
+        attacked |= _shift(planes[:, base + 5], delta) & mask
+    return attacked
+
+
+def _has_free_move(planes, color):
+    """
+    True onde `color`, fora de xeque, certamente tem um lance legal: o rei tem
+    uma casa livre e não atacada, ou um peão/cavalo fora das linhas do rei (que
+    não pode estar cravado) tem um avanço ou salto. False não prova nada.
+    """
+    base     = 0 if color == chess.WHITE else 6
+    occupied = np.bitwise_or.reduce(planes, axis=1)
+    own      = np.bitwise_or.reduce(planes[:, base:base + 6], axis=1)
+    attacked = _attacks(planes, not color, occupied)
+    king     = planes[:, base + 5]
+    free     = ~(own | attacked)
+    moves    = np.zeros(len(planes), dtype=np.uint64)
+    for delta, mask in _ORTHOGONAL + _DIAGONAL:
+        moves |= _shift(king, delta) & mask & free
+    unpinned = ~_LINES[_popcount(king - _U64(1))]  # rei ausente: king - 1 = tudo, índice 64
+    pawns    = planes[:, base] & unpinned
+    moves   |= (pawns << _U64(8) if color == chess.WHITE else pawns >> _U64(8)) & ~occupied
+    for delta, mask in _KNIGHT:
+        moves |= _shift(planes[:, base + 1] & unpinned, delta) & mask & ~own
+    return (king != 0) & ((king & attacked) == 0) & (moves != 0)
+
+
+def _file_bits(pawns):
+    """Máscara de 8 bits das colunas com peão (como ai._pawn_files) e a contagem por coluna."""
+    counts = np.stack([_popcount(pawns & _FILES[f]) for f in range(8)], axis=1)
+    bits   = np.zeros(len(pawns), dtype=np.int64)
+    for f in range(8):
+        bits |= (counts[:, f] > 0).astype(np.int64) << f
+    return bits, counts
+
+
+def _pawn_structure(own_pawns, enemy_pawns, own_files, own_counts, color):
+    """Igual a ai._pawn_structure_bonus: acumula peão a peão, em ordem crescente de casa."""
+    score = np.zeros(len(own_pawns), dtype=np.float64)
+    for sq in chess.scan_forward(int(np.bitwise_or.reduce(own_pawns, initial=_U64(0)))):
+        has = (own_pawns & _SQ[sq]) != 0
+        f = chess.square_file(sq)
+        doubled  = has & (own_counts[:, f] > 1)
+        isolated = has & ((own_files & _adjacent_files(f)) == 0)
+        passed   = has & ((enemy_pawns & _FRONT_SPAN[color][sq]) == 0)
+        np.subtract(score, 0.25, out=score, where=doubled)
+        np.subtract(score, 0.20, out=score, where=isolated)
+        np.add(score, _PASSED_BONUS[color][sq], out=score, where=passed)
+    return score
+
+
+def _rook_files(rooks, own_files, enemy_files):
+    """Igual a ai._rook_file_score: torre em coluna sem peão próprio, aberta ou semiaberta."""
+    score = np.zeros(len(rooks), dtype=np.float64)
+    for sq in chess.scan_forward(int(np.bitwise_or.reduce(rooks, initial=_U64(0)))):
+        has = (rooks & _SQ[sq]) != 0
+        bit   = 1 << chess.square_file(sq)
+        open_ = has & ((own_files & bit) == 0)
+        semi  = (enemy_files & bit) != 0
+        np.add(score, 0.35, out=score, where=open_ & ~semi)
+        np.add(score, 0.20, out=score, where=open_ & semi)
+    return score
+
+
+def _king_shield(kings, own_pawns, own_files, enemy_files, color):
+    """Igual a ai._king_shield_score, com 0.0 sem rei; as três colunas do escudo em ordem."""
+    valid, r1, r2, fbit = _SHIELD[color]
+    has_king = kings != 0
+    king_sq  = np.where(has_king, _popcount(kings - _U64(1)), 0)  # bit único: casa = bits abaixo dele
+    score = np.zeros(len(kings), dtype=np.float64)
+    for j in range(3):
+        ok     = has_king & valid[king_sq, j]
+        has_r1 = ok & ((own_pawns & r1[king_sq, j]) != 0)
+        has_r2 = ok & ~has_r1 & ((own_pawns & r2[king_sq, j]) != 0)
+        np.add(score, 0.15, out=score, where=has_r1)
+        np.add(score, 0.05, out=score, where=has_r2)
+        bit    = fbit[king_sq, j]
+        open_  = ok & ((own_files & bit) == 0)
+        semi   = (enemy_files & bit) != 0
+        np.subtract(score, 0.25, out=score, where=open_ & ~semi)
+        np.subtract(score, 0.10, out=score, where=open_ & semi)
+    return score
+
+
+def pack_boards(boards):
+    """Array N × 12 de bitboards uint64 (P N B R Q K brancas, depois pretas)."""
+    planes = np.empty((len(boards), 12), dtype=np.uint64)
+    for i, board in enumerate(boards):
+        white, black = board.occupied_co[chess.WHITE], board.occupied_co[chess.BLACK]
+        planes[i] = (board.pawns & white, board.knights & white, board.bishops & white,
+                     board.rooks & white, board.queens & white, board.kings & white,
+                     board.pawns & black, board.knights & black, board.bishops & black,
+                     board.rooks & black, board.queens & black, board.kings & black)
+    return planes
+
+
+def _evaluate_chunk(planes):
+    n        = len(planes)
+    occupied = np.bitwise_or.reduce(planes, axis=1)
+
+    # Material + PST: soma inteira de centipawns, depois / 100.0 como em evaluate_board
+    octets = planes.astype("<u8").view(np.uint8).reshape(n, 12, 8)
+    cp     = np.zeros(n, dtype=np.int64)
+    for plane in range(12):
+        for byte in range(8):
+            cp += _PSQT_BYTES[plane, byte][octets[:, plane, byte]]
+    total = cp / 100.0
+
+    total = total + (_mobility(planes, chess.WHITE, occupied)
+                     - _mobility(planes, chess.BLACK, occupied)) * ai._MOBILITY_WEIGHT
+
+    white_pawns, black_pawns = planes[:, 0], planes[:, 6]
+    white_files, white_counts = _file_bits(white_pawns)
+    black_files, black_counts = _file_bits(black_pawns)
+    total = total + (_pawn_structure(white_pawns, black_pawns, white_files, white_counts, chess.WHITE)
+                     - _pawn_structure(black_pawns, white_pawns, black_files, black_counts, chess.BLACK))
+
+    queens = (planes[:, 4] | planes[:, 10]) != 0
+    if queens.any():
+        shield = (_king_shield(planes[:, 5], white_pawns, white_files, black_files, chess.WHITE)
+                  - _king_shield(planes[:, 11], black_pawns, black_files, white_files, chess.BLACK))
+        total = np.where(queens, total + shield, total)
+
+    total = total + (_rook_files(planes[:, 3], white_files, black_files)
+                     - _rook_files(planes[:, 9], black_files, white_files))
+    total = np.where(_popcount(planes[:, 2]) >= 2, total + 0.5, total)
+    total = np.where(_popcount(planes[:, 8]) >= 2, total - 0.5, total)
+    return total
+
+
+def evaluate_planes(planes, chunk_size=_CHUNK):
+    """
+    Termos estáticos de evaluate_board para um array N × 12 de planos. Sem lances
+    nem histórico, não detecta mate, afogamento ou repetição: use em posições
+    que não são terminais (ou `evaluate_batch` com tabuleiros).
+    """
+    if ai._MOBILITY_MODE != "attacks":
+        raise ValueError("a avaliação em lote só implementa a mobilidade por ataques")
+    planes = np.ascontiguousarray(planes, dtype=np.uint64)
+    out    = np.empty(len(planes), dtype=np.float64)
+    for start in range(0, len(planes), chunk_size):
+        out[start:start + chunk_size] = _evaluate_chunk(planes[start:start + chunk_size])
+    return out
+
+
+def _is_special(board):
+    """Posições em que evaluate_board não usa os termos estáticos (fim de jogo ou repetição)."""
+    return ai._game_result(board) is not None
+
+
+def _maybe_special(boards, planes):
+    """
+    Máscara das posições que podem ser especiais; as outras certamente não são.
+    Mate e afogamento ficam descartados por _has_free_move, material
+    insuficiente por haver peão, torre ou dama, e a regra dos 50 lances pelo
+    relógio. A repetição precisa do histórico e é vista à parte.
+    """
+    white    = np.fromiter((board.turn == chess.WHITE for board in boards), dtype=bool, count=len(boards))
+    halfmove = np.fromiter((board.halfmove_clock for board in boards), dtype=np.int64, count=len(boards))
+    free     = np.zeros(len(boards), dtype=bool)
+    for color, rows in ((chess.WHITE, white), (chess.BLACK, ~white)):
+        if rows.any():
+            free[rows] = _has_free_move(planes[rows], color)
+    heavy = np.bitwise_or.reduce(planes[:, [0, 3, 4, 6, 9, 10]], axis=1) != 0
+    return ~(free & heavy & (halfmove < 100))
+
+
+def evaluate_batch(boards, chunk_size=_CHUNK):
+    """
+    evaluate_board para cada tabuleiro de `boards`, como array float64.
+
+    Só passam pelo evaluate_board escalar as posições que podem ser terminais
+    ou repetidas (_maybe_special: xeque, rei sem casa e peças sem lance livre,
+    material baixo, 50 lances) e as que repetem de fato. A repetição custa um
+    replay do histórico por tabuleiro (chess.Board.is_repetition), feito só com
+    pelo menos 4 meios-lances desde o último lance irreversível, no histórico
+    e no relógio: antes disso a posição não pode ter ocorrido.
+    """
+    boards = list(boards)
+    planes = pack_boards(boards)
+    values = evaluate_planes(planes, chunk_size)
+    maybe  = _maybe_special(boards, planes)
+    for i, board in enumerate(boards):
+        if maybe[i]:
+            special = _is_special(board)
+        else:
+            special = (board.halfmove_clock >= 4 and len(board.move_stack) >= 4
+                       and board.is_repetition(2))
+        if special:
+            values[i] = ai.evaluate_board(board)
+    return values
+
+
+def _read_positions(path):
+    boards = []
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            line = line.strip()
+            if not line or line.startswith("#"):
+                continue
+            try:
+                boards.append(chess.Board(line))
+            except ValueError:
+                boards.append(chess.Board.from_epd(line)[0])
+    return boards
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Avaliação em lote (NumPy) de um arquivo de posições.")
+    parser.add_argument("positions", help="arquivo com um FEN ou EPD por linha")
+    parser.add_argument("--check", action="store_true", help="confere cada valor contra evaluate_board")
+    parser.add_argument("--planes", action="store_true",
+                        help="só os termos estáticos (sem checar fim de jogo), a parte vetorizada")
+    args = parser.parse_args(argv)
+
+    boards = _read_positions(args.positions)
+    start  = time.perf_counter()
+    values = evaluate_planes(pack_boards(boards)) if args.planes else evaluate_batch(boards)
+    secs   = time.perf_counter() - start
+    print(f"{len(boards)} posições em {secs:.2f}s ({len(boards) / secs if secs else 0:,.0f} posições/s)")
+    if args.check:
+        start    = time.perf_counter()
+        expected = [ai.evaluate_board(board) for board in boards]
+        scalar   = time.perf_counter() - start
+        wrong    = sum(1 for value, exp in zip(values, expected) if value != exp)
+        print(f"evaluate_board: {scalar:.2f}s; {wrong} divergência(s)")
+        return 1 if wrong else 0
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
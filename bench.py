@@ -0,0 +1,158 @@
+"""
+Benchmark da IA sobre uma suíte EPD fixa (bench.epd): nós, NPS, tempo até
+cada profundidade, hit rate da TT e taxa de acerto do melhor lance.
+
+A busca é por profundidade fixa, com semente e estado zerado por posição, então
+nós, lances e acertos são os mesmos em qualquer máquina; só tempo e NPS variam.
+Roda sem pygame.
+
+    python bench.py                          # imprime o resumo
+    python bench.py --json resultado.json    # grava o resultado completo
+    python bench.py --save-baseline base.json
+    python bench.py --baseline base.json     # compara e sai com 1 se houver regressão
+"""
+import argparse
+import json
+import os
+import platform
+import sys
+import time
+
+import chess
+
+import ai
+
+_SUITE_PATH    = os.path.join(os.path.dirname(os.path.abspath(__file__)), "bench.epd")
+_DEFAULT_DEPTH = 3
+_SEED          = 0
+_TOLERANCE     = 0.10  # variação de NPS/tempo tolerada antes de acusar regressão
+
+
+def load_suite(path=_SUITE_PATH):
+    """Lista de (id, board, lances bm, lances am) do arquivo EPD."""
+    suite = []
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            line = line.strip()
+            if not line or line.startswith("#"):
+                continue
+            board, ops = chess.Board.from_epd(line)
+            suite.append((ops.get("id", board.fen()), board, ops.get("bm", []), ops.get("am", [])))
+    return suite
+
+
+def run_position(board, depth):
+    """Busca `board` até `depth` a partir de um estado limpo (sem livro); retorna o SearchInfo."""
+    ai.reset_search_state()
+    _, info = ai.find_best_ai_move(board, max_depth=depth, seed=_SEED, with_info=True, book=False)
+    return info
+
+
+def run(depth=_DEFAULT_DEPTH, suite_path=_SUITE_PATH):
+    positions = []
+    for pos_id, board, best, avoid in load_suite(suite_path):
+        info   = run_position(board, depth)
+        solved = None
+        if best or avoid:
+            solved = (not best or info.move in best) and info.move not in avoid
+        positions.append({
+            "id": pos_id, "move": info.move.uci() if info.move else None,
+            "depth": info.depth, "nodes": info.nodes, "time": round(info.elapsed, 4),
+            "nps": round(info.nps), "tt_hit_rate": round(info.tt_hit_rate, 4),
+            "time_to_depth": {str(it["depth"]): it["time"] for it in info.iterations},
+            "solved": solved,
+        })
+    graded = [p for p in positions if p["solved"] is not None]
+    nodes  = sum(p["nodes"] for p in positions)
+    secs   = sum(p["time"] for p in positions)
+    return {
+        "depth": depth,
+        "machine": {"python": platform.python_version(), "platform": platform.platform(),
+                    "cpus": os.cpu_count()},
+        "date": time.strftime("%Y-%m-%d %H:%M:%S"),
+        "totals": {
+            "positions": len(positions), "nodes": nodes, "time": round(secs, 4),
+            "nps": round(nodes / secs) if secs else 0,
+            "time_to_depth": {
+                str(d): round(sum(p["time_to_depth"].get(str(d), 0.0) for p in positions), 4)
+                for d in range(1, depth + 1)
+            },
+            "tt_hit_rate": round(sum(p["tt_hit_rate"] for p in positions) / len(positions), 4)
+            if positions else 0.0,
+            "solved": sum(1 for p in graded if p["solved"]), "graded": len(graded),
+        },
+        "positions": positions,
+    }
+
+
+def compare(result, baseline, tolerance=_TOLERANCE):
+    """
+    Compara com um resultado anterior. Retorna (regressões, observações):
+    regressão é perder acertos, NPS cair ou o tempo até a profundidade subir
+    além da tolerância; mudar nós ou lances é só observação (a busca mudou).
+    """
+    regressions, notes = [], []
+    cur, base = result["totals"], baseline["totals"]
+    if result["depth"] != baseline["depth"]:
+        return [f"profundidade diferente do baseline ({result['depth']} vs {baseline['depth']})"], []
+    if cur["solved"] < base["solved"]:
+        regressions.append(f"acertos caíram: {cur['solved']}/{cur['graded']} (baseline {base['solved']})")
+    if base["nps"] and cur["nps"] < base["nps"] * (1 - tolerance):
+        regressions.append(f"NPS caiu {1 - cur['nps'] / base['nps']:.1%}: {cur['nps']} (baseline {base['nps']})")
+    depth = str(result["depth"])
+    cur_t, base_t = cur["time_to_depth"].get(depth), base["time_to_depth"].get(depth)
+    if cur_t and base_t and cur_t > base_t * (1 + tolerance):
+        regressions.append(f"tempo até profundidade {depth} subiu {cur_t / base_t - 1:.1%}: "
+                           f"{cur_t:.2f}s (baseline {base_t:.2f}s)")
+    if cur["nodes"] != base["nodes"]:
+        change = f", {cur['nodes'] / base['nodes'] - 1:+.1%}" if base["nodes"] else ""
+        notes.append(f"nós: {cur['nodes']} (baseline {base['nodes']}{change})")
+    base_moves = {p["id"]: p["move"] for p in baseline["positions"]}
+    for pos in result["positions"]:
+        if pos["id"] in base_moves and pos["move"] != base_moves[pos["id"]]:
+            notes.append(f"{pos['id']}: lance {pos['move']} (baseline {base_moves[pos['id']]})")
+    return regressions, notes
+
+
+def _print_summary(result):
+    for pos in result["positions"]:
+        mark = {True: "ok", False: "ERRO", None: ""}[pos["solved"]]
+        print(f"  {pos['id']:<28} {pos['move'] or '-':<6} prof {pos['depth']} "
+              f"{pos['nodes']:>8} nós {pos['time']:7.2f}s {pos['nps']:>7} nps  {mark}")
+    t = result["totals"]
+    print(f"total: {t['nodes']} nós em {t['time']:.2f}s, {t['nps']} nps, "
+          f"TT {t['tt_hit_rate']:.1%}, acertos {t['solved']}/{t['graded']}")
+    print("tempo até profundidade: " + ", ".join(f"{d}: {s:.2f}s" for d, s in t["time_to_depth"].items()))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark da IA sobre a suíte EPD.")
+    parser.add_argument("--depth", type=int, default=_DEFAULT_DEPTH)
+    parser.add_argument("--suite", default=_SUITE_PATH, help="arquivo EPD (padrão: bench.epd)")
+    parser.add_argument("--json", help="grava o resultado completo neste arquivo")
+    parser.add_argument("--baseline", help="compara com este resultado e falha em regressão")
+    parser.add_argument("--save-baseline", help="grava o resultado como novo baseline")
+    parser.add_argument("--tolerance", type=float, default=_TOLERANCE)
+    args = parser.parse_args(argv)
+
+    result = run(args.depth, args.suite)
+    _print_summary(result)
+    for path in (args.json, args.save_baseline):
+        if path:
+            with open(path, "w", encoding="utf-8") as f:
+                json.dump(result, f, indent=2)
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as f:
+            baseline = json.load(f)
+        regressions, notes = compare(result, baseline, args.tolerance)
+        for note in notes:
+            print(f"nota: {note}")
+        for regression in regressions:
+            print(f"REGRESSÃO: {regression}")
+        if regressions:
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
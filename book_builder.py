@@ -0,0 +1,303 @@
+"""
+Monta um livro de aberturas polyglot (.bin) a partir de coleções PGN de qualquer
+tamanho. O resultado é o `book.bin` que a IA consulta (ver OPENING_BOOK em config.py).
+
+As partidas são lidas em fluxo com `chess.pgn`, sem carregar o arquivo: cada
+arquivo é cortado em fatias (sempre no início de uma partida) e cada fatia vai
+para um processo. Um processo conta, por (chave Zobrist, lance) até `max_ply`
+meios-lances, quantas partidas passaram por ali e quantos meios-pontos o lado que
+jogou fez. Ao juntar `run_entries` contagens ele grava um "run" ordenado em disco
+e recomeça, então a memória não cresce com o tamanho da coleção. No fim os runs
+são intercalados (merge externo), os lances filtrados por número de partidas e
+aproveitamento e o livro é gravado já ordenado pela chave, como o formato exige.
+
+    python book_builder.py partidas.pgn                    # grava book.bin
+    python book_builder.py a.pgn b.pgn --out livro.bin --max-ply 24 --workers 4
+    python book_builder.py partidas.pgn --min-games 5 --min-score 0.45
+"""
+import argparse
+import functools
+import heapq
+import multiprocessing
+import os
+import re
+import struct
+import sys
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import chess
+import chess.pgn
+
+from config import OPENING_BOOK
+from position import Position
+
+_DEFAULT_MAX_PLY = 20
+_DEFAULT_MIN_GAMES = 2
+_SHARD_BYTES = 64 * 1024 * 1024  # tamanho aproximado de cada fatia de PGN
+_RUN_ENTRIES = 200_000           # contagens em memória por processo antes de gravar um run
+_MAX_FAN_IN  = 64                # runs abertos ao mesmo tempo num merge
+
+_RUN_RECORD  = struct.Struct(">QHII")  # chave, lance polyglot, partidas, meios-pontos
+_BOOK_ENTRY  = struct.Struct(">QHHI")  # chave, lance, peso, learn (formato polyglot)
+_READ_BLOCK  = 4096                    # registros lidos por vez de cada run
+
+_GAME_START  = re.compile(rb"\n\r?\n\[")  # linha em branco seguida de uma tag: começo de partida
+_WHITE_POINTS = {"1-0": 2, "1/2-1/2": 1, "0-1": 0}
+
+
+def polyglot_move(board, move):
+    """Lance no formato polyglot: roque como "rei toma a própria torre", promoção em 3 bits."""
+    to_square = move.to_square
+    if board.is_castling(move):
+        to_square = chess.square(7 if chess.square_file(move.to_square) > 4 else 0,
+                                 chess.square_rank(move.from_square))
+    promotion = move.promotion - 1 if move.promotion else 0
+    return to_square | move.from_square << 6 | promotion << 12
+
+
+class _OpeningVisitor(chess.pgn.BaseVisitor):
+    """Lê só o necessário de uma partida: o resultado e os `max_ply` primeiros lances."""
+
+    def __init__(self, max_ply):
+        self.max_ply = max_ply
+
+    def begin_game(self):
+        self.moves, self.result_tag, self.valid = [], None, True
+
+    def visit_header(self, tagname, tagvalue):
+        if tagname == "Result":
+            self.result_tag = tagvalue
+        elif tagname in ("FEN", "SetUp") and tagvalue not in ("0", chess.STARTING_FEN):
+            self.valid = False  # livro só a partir da posição inicial
+        elif tagname == "Variant" and tagvalue.lower() not in ("standard", "chess", ""):
+            self.valid = False
+
+    def begin_variation(self):
+        return chess.pgn.SKIP
+
+    def begin_parse_san(self, board, san):
+        if len(self.moves) >= self.max_ply or not self.valid:
+            return chess.pgn.SKIP  # resto da partida: nem converte o SAN
+        return None
+
+    def visit_move(self, board, move):
+        self.moves.append(move)
+
+    def handle_error(self, error):
+        self.valid = False
+
+    def result(self):
+        """(meios-pontos das brancas, lances), com None nos pontos se a partida não serve."""
+        if not self.valid or self.result_tag not in _WHITE_POINTS:
+            return None, self.moves
+        return _WHITE_POINTS[self.result_tag], self.moves
+
+
+def _next_game_start(f, pos):
+    """Offset da primeira partida que começa depois de `pos`, ou None se não houver."""
+    while True:
+        f.seek(pos)
+        chunk = f.read(1 << 16)
+        m = _GAME_START.search(chunk)
+        if m:
+            return pos + m.end() - 1
+        if len(chunk) < 1 << 16:
+            return None
+        pos += len(chunk) - 3  # a sequência pode estar cortada entre dois blocos
+
+
+def shard_pgn(path, shard_bytes=_SHARD_BYTES):
+    """Fatias (início, fim) em bytes de `path`, cada uma começando no início de uma partida."""
+    size   = os.path.getsize(path)
+    starts = [0]
+    with open(path, "rb") as f:
+        pos = shard_bytes
+        while pos < size:
+            start = _next_game_start(f, pos)
+            if start is None:
+                break
+            starts.append(start)
+            pos = start + shard_bytes
+    return list(zip(starts, starts[1:] + [size]))
+
+
+def _write_run(counts, tmp_dir):
+    fd, path = tempfile.mkstemp(suffix=".run", dir=tmp_dir)
+    with os.fdopen(fd, "wb") as f:
+        pack = _RUN_RECORD.pack
+        f.write(b"".join(pack(key, move, g, p) for (key, move), (g, p) in sorted(counts.items())))
+    return path
+
+
+def _scan_shard(path, start, end, max_ply, run_entries, tmp_dir):
+    """Conta uma fatia de PGN. Retorna (runs gravados, partidas usadas, partidas ignoradas)."""
+    runs, counts = [], {}
+    games = skipped = 0
+    visitor = functools.partial(_OpeningVisitor, max_ply)
+    with open(path, encoding="utf-8", errors="replace") as f:
+        f.seek(start)
+        while f.tell() < end:
+            parsed = chess.pgn.read_game(f, Visitor=visitor)
+            if parsed is None:
+                break  # fim do arquivo
+            white_points, moves = parsed
+            if white_points is None:
+                skipped += 1
+                continue
+            board = Position()
+            for move in moves:
+                key = (board.zobrist, polyglot_move(board, move))
+                points = white_points if board.turn == chess.WHITE else 2 - white_points
+                entry = counts.get(key)
+                if entry is None:
+                    counts[key] = [1, points]
+                else:
+                    entry[0] += 1
+                    entry[1] += points
+                board.push(move)
+            games += 1
+            if len(counts) >= run_entries:
+                runs.append(_write_run(counts, tmp_dir))
+                counts = {}
+    if counts:
+        runs.append(_write_run(counts, tmp_dir))
+    return runs, games, skipped
+
+
+def _read_run(path):
+    size = _RUN_RECORD.size
+    with open(path, "rb") as f:
+        while True:
+            block = f.read(size * _READ_BLOCK)
+            if not block:
+                return
+            yield from _RUN_RECORD.iter_unpack(block)
+
+
+def _merged(paths):
+    """Registros de `paths` em ordem, com as contagens do mesmo (chave, lance) somadas."""
+    current = None
+    for key, move, games, points in heapq.merge(*(_read_run(p) for p in paths)):
+        if current is not None and current[0] == key and current[1] == move:
+            current[2] += games
+            current[3] += points
+            continue
+        if current is not None:
+            yield current
+        current = [key, move, games, points]
+    if current is not None:
+        yield current
+
+
+def _reduce_runs(runs, tmp_dir):
+    """Intercala runs em grupos até sobrarem no máximo _MAX_FAN_IN (limita arquivos abertos)."""
+    fan_in = _MAX_FAN_IN
+    while len(runs) > fan_in:
+        merged = []
+        for i in range(0, len(runs), fan_in):
+            group = runs[i:i + fan_in]
+            fd, path = tempfile.mkstemp(suffix=".run", dir=tmp_dir)
+            with os.fdopen(fd, "wb") as f:
+                for record in _merged(group):
+                    f.write(_RUN_RECORD.pack(*record))
+            for p in group:
+                os.remove(p)
+            merged.append(path)
+        runs = merged
+    return runs
+
+
+def _book_entries(records, min_games, min_score):
+    """
+    Entradas polyglot (chave, lance, peso) a partir dos registros ordenados. O peso é
+    2·vitórias + empates do lado que jogou; se passar de 16 bits, os lances da
+    posição são reescalados juntos para manter a proporção.
+    """
+    def flush(key, moves):
+        top = max(w for _, w in moves)
+        for move, weight in moves:
+            if top > 0xFFFF:
+                weight = weight * 0xFFFF // top
+            if weight > 0:
+                yield key, move, weight
+
+    key, moves = None, []
+    for k, move, games, points in records:
+        if k != key:
+            if moves:
+                yield from flush(key, moves)
+            key, moves = k, []
+        if games >= min_games and points >= min_score * 2 * games:
+            moves.append((move, points))
+    if moves:
+        yield from flush(key, moves)
+
+
+def build(pgn_paths, out_path=OPENING_BOOK, max_ply=_DEFAULT_MAX_PLY, min_games=_DEFAULT_MIN_GAMES,
+          min_score=0.0, workers=1, shard_bytes=_SHARD_BYTES, run_entries=_RUN_ENTRIES, tmp_dir=None):
+    """
+    Monta o livro `out_path` a partir de `pgn_paths`. Um lance entra no livro se
+    foi jogado em pelo menos `min_games` partidas e fez pelo menos `min_score`
+    (0..1) dos pontos para quem o jogou. Retorna um dicionário com partidas
+    usadas/ignoradas, fatias, runs, posições e entradas gravadas e o tempo.
+    """
+    start  = time.perf_counter()
+    shards = [(path, a, b) for path in pgn_paths for a, b in shard_pgn(path, shard_bytes)]
+    with tempfile.TemporaryDirectory(prefix="book-", dir=tmp_dir) as tmp:
+        tasks = [(path, a, b, max_ply, run_entries, tmp) for path, a, b in shards]
+        if workers <= 1 or len(tasks) <= 1:
+            results = [_scan_shard(*task) for task in tasks]
+        else:
+            ctx = multiprocessing.get_context("spawn")
+            with ProcessPoolExecutor(max_workers=workers, mp_context=ctx) as pool:
+                results = list(pool.map(_scan_shard, *zip(*tasks)))
+        runs    = [run for res in results for run in res[0]]
+        n_runs  = len(runs)
+        runs    = _reduce_runs(runs, tmp)
+        entries = positions = 0
+        last    = None
+        partial = out_path + ".tmp"
+        with open(partial, "wb") as f:
+            for key, move, weight in _book_entries(_merged(runs), min_games, min_score):
+                f.write(_BOOK_ENTRY.pack(key, move, weight, 0))
+                entries   += 1
+                positions += key != last
+                last = key
+        os.replace(partial, out_path)
+    return {
+        "games": sum(res[1] for res in results),
+        "skipped": sum(res[2] for res in results),
+        "shards": len(shards),
+        "runs": n_runs,
+        "positions": positions,
+        "entries": entries,
+        "time": time.perf_counter() - start,
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Monta um livro polyglot a partir de arquivos PGN.")
+    parser.add_argument("pgn", nargs="+", help="arquivos PGN")
+    parser.add_argument("--out", default=OPENING_BOOK, help="livro gerado (padrão: OPENING_BOOK)")
+    parser.add_argument("--max-ply", type=int, default=_DEFAULT_MAX_PLY, help="meios-lances por partida")
+    parser.add_argument("--min-games", type=int, default=_DEFAULT_MIN_GAMES)
+    parser.add_argument("--min-score", type=float, default=0.0, help="aproveitamento mínimo (0..1)")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--shard-mb", type=int, default=_SHARD_BYTES >> 20)
+    parser.add_argument("--run-entries", type=int, default=_RUN_ENTRIES,
+                        help="contagens em memória por processo antes de ir para o disco")
+    args = parser.parse_args(argv)
+
+    stats = build(args.pgn, args.out, args.max_ply, args.min_games, args.min_score,
+                  args.workers, args.shard_mb << 20, args.run_entries)
+    print(f"{stats['games']} partidas ({stats['skipped']} ignoradas), {stats['shards']} fatia(s), "
+          f"{stats['runs']} run(s)")
+    print(f"{args.out}: {stats['positions']} posições, {stats['entries']} entradas "
+          f"em {stats['time']:.1f}s ({stats['games'] / stats['time'] if stats['time'] else 0:,.0f} partidas/s)")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
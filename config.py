@@ -1,17 +1,26 @@
 import os
-import pygame
 
 PADDING = 70
 BOARD_SIZE = 720
 INFO_HEIGHT = 70
 HISTORY_WIDTH = 300
+# Cada nível é um orçamento de busca: argumentos de find_best_ai_move
+# (time_limit em segundos, max_nodes, max_depth). Orçamentos de nós/profundidade
+# custam o mesmo em qualquer máquina e dão sempre a mesma força.
 DIFFICULTY_LEVELS = [
-    ("Fácil",         0.5),
-    ("Médio",         2.0),
-    ("Difícil",       6.0),
-    ("Muito Difícil", 15.0),
+    ("Fácil",         {"max_nodes": 2000}),
+    ("Médio",         {"time_limit": 2.0}),
+    ("Difícil",       {"time_limit": 6.0}),
+    ("Muito Difícil", {"time_limit": 15.0}),
 ]
 DEFAULT_TIME_LIMIT = 2.0
+DEFAULT_DIFFICULTY = DIFFICULTY_LEVELS[1][1]
+TT_SIZE_MB = 16  # tamanho da transposition table da IA
+TT_SNAPSHOT = None  # caminho de um snapshot da TT: carregado (mmap) ao iniciar e gravado ao sair
+SEARCH_WORKERS = 1  # processos de busca (Lazy SMP); 1 = busca só no processo principal
+SEARCH_LOG = None  # caminho de um log JSON-lines com as estatísticas de cada busca
+PONDER = True  # a IA continua pensando durante a vez do jogador humano
+OPENING_BOOK = os.path.join(os.path.dirname(os.path.abspath(__file__)), "book.bin")  # livro polyglot (opcional)
 TIME_CONTROLS = [("∞", None), ("1'", 60), ("3'", 180), ("5'", 300), ("10'", 600)]
 SAVES_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "saves")
 
@@ -40,17 +49,8 @@ PIECE_SYMBOLS = {
 }
 ANIM_DURATION = 0.15
 
-BOARD_RECT         = pygame.Rect(PADDING, INFO_HEIGHT, BOARD_SIZE, BOARD_SIZE)
 ACTION_PANEL_HEIGHT = 140
-HISTORY_RECT       = pygame.Rect(BOARD_RECT.right, INFO_HEIGHT, HISTORY_WIDTH,
-                                  GAME_HEIGHT - INFO_HEIGHT - ACTION_PANEL_HEIGHT)
-ACTION_PANEL_RECT  = pygame.Rect(BOARD_RECT.right, HISTORY_RECT.bottom,
-                                  HISTORY_WIDTH, ACTION_PANEL_HEIGHT)
-_PAUSE_BTN_SIZE    = 48
-PAUSE_BTN          = pygame.Rect(BOARD_RECT.centerx - _PAUSE_BTN_SIZE // 2,
-                                  (INFO_HEIGHT - _PAUSE_BTN_SIZE) // 2,
-                                  _PAUSE_BTN_SIZE, _PAUSE_BTN_SIZE)
-
+PAUSE_BTN_SIZE      = 48
 
 def format_clock(seconds):
     if seconds is None:
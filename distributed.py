@@ -0,0 +1,395 @@
+"""
+Busca distribuída por divisão da raiz (root split) sobre TCP.
+
+Um coordenador reparte os lances da raiz entre workers remotos e empurra
+para eles o melhor valor (alpha) conhecido assim que ele melhora. Cada worker
+busca os seus lances em sequência com o minimax de `ai` e a sua própria TT,
+que persiste entre iterações e jogadas; o alpha recebido vale a partir do
+próximo lance. O worker atende um coordenador por vez: TT, killers e
+histórico são os globais de `ai`, e duas buscas ao mesmo tempo se misturariam.
+
+Protocolo: uma mensagem JSON por linha.
+    coordenador → worker
+        {"type": "search", "id": iteração, "search": busca, "fen": raiz, "moves": [...],
+         "root": [uci, ...], "depth": d, "alpha": a, "time": segundos}
+        {"type": "bound", "id": n, "alpha": a}
+        {"type": "quit"}
+    worker → coordenador
+        {"type": "result", "id": n, "move": uci, "score": s, "exact": bool}
+        {"type": "timeout", "id": n}
+
+`id` identifica uma iteração (profundidade ou re-busca) e `search` a jogada
+inteira, para o worker saber quando reiniciar killers e a geração da TT.
+Valores são sempre do ponto de vista do lado a jogar na raiz; `exact` é
+False quando o lance falhou abaixo de alpha (o valor é só um limite superior).
+"""
+import argparse
+import json
+import math
+import selectors
+import socket
+import socketserver
+import threading
+import time
+from collections import deque
+
+import chess
+
+import ai
+
+_DEFAULT_PORT    = 7654
+_CONNECT_TIMEOUT = 5.0
+_DRAIN_GRACE     = 1.0  # segundos para os workers responderem após o deadline
+_MOVE_TIMEOUT    = 2.0  # segundos sem resposta de um worker ocupado até considerá-lo travado
+_STALL_FACTOR    = 8    # ... ou este múltiplo do lance mais lento já respondido nesta jogada
+
+
+def _search_root_move(board, move, depth, alpha, deadline, tt):
+    """
+    Busca `move` na raiz até `depth` com janela (alpha, +inf) do ponto de vista
+    do lado a jogar. Retorna (valor, exato).
+    """
+    white = board.turn == chess.WHITE
+    board.push(move)
+    try:
+        if white:
+            value = ai.minimax(board, depth - 1, alpha, math.inf, False, deadline, tt)
+        else:
+            value = -ai.minimax(board, depth - 1, -math.inf, -alpha, True, deadline, tt)
+    finally:
+        board.pop()
+    return value, value > alpha or alpha == -math.inf  # janela completa: sempre exato
+
+
+def _board_from(message):
+    board = chess.Board(message["fen"])
+    for uci in message["moves"]:
+        board.push_uci(uci)
+    return ai._SearchBoard.from_board(board)
+
+
+# ── Worker ────────────────────────────────────────────────────────────────────
+
+class _WorkerHandler(socketserver.StreamRequestHandler):
+    """Atende um coordenador: lê comandos numa thread e busca na thread do handler."""
+
+    def handle(self):
+        self._commands = deque()
+        self._alpha    = {}  # id da busca → melhor alpha recebido
+        self._ready    = threading.Condition()
+        reader = threading.Thread(target=self._read, daemon=True)
+        reader.start()
+        search_id = None
+        while True:
+            with self._ready:
+                while not self._commands:
+                    self._ready.wait()
+                message = self._commands.popleft()
+            if message is None or message["type"] == "quit":
+                break
+            if message["search"] != search_id:
+                search_id = message["search"]
+                ai._tt.new_search()
+                ai._killers.clear()
+                ai._history.clear()
+            self._run(message)
+
+    def _read(self):
+        for line in self.rfile:
+            message = json.loads(line)
+            with self._ready:
+                if message["type"] == "bound":
+                    self._alpha[message["id"]] = max(self._alpha.get(message["id"], -math.inf),
+                                                     message["alpha"])
+                else:
+                    self._commands.append(message)
+                    self._ready.notify()
+        with self._ready:
+            self._commands.append(None)
+            self._ready.notify()
+
+    def _run(self, message):
+        board    = _board_from(message)
+        deadline = time.monotonic() + message["time"]
+        alpha    = message["alpha"]
+        for uci in message["root"]:
+            with self._ready:
+                alpha = max(alpha, self._alpha.get(message["id"], -math.inf))
+            try:
+                score, exact = _search_root_move(board, chess.Move.from_uci(uci),
+                                                 message["depth"], alpha, deadline, ai._tt)
+            except ai._SearchTimeout:
+                self._reply({"type": "timeout", "id": message["id"]})
+                return
+            self._reply({"type": "result", "id": message["id"], "move": uci,
+                         "score": score, "exact": exact})
+            if exact:
+                alpha = max(alpha, score)
+
+    def _reply(self, message):
+        self.wfile.write((json.dumps(message) + "\n").encode())
+
+
+class WorkerServer(socketserver.TCPServer):
+    """Uma conexão por vez: as outras esperam na fila do listen até a atual fechar."""
+    allow_reuse_address = True
+
+
+def serve(host="0.0.0.0", port=_DEFAULT_PORT, ready=None):
+    """Roda um worker até o processo ser encerrado. `ready` recebe a porta real (útil com port=0)."""
+    with WorkerServer((host, port), _WorkerHandler) as server:
+        if ready is not None:
+            ready.put(server.server_address[1])
+        server.serve_forever()
+
+
+# ── Coordenador ───────────────────────────────────────────────────────────────
+
+class _Connection:
+    def __init__(self, address):
+        self.address  = address
+        self.sock     = socket.create_connection(address, timeout=_CONNECT_TIMEOUT)
+        self.sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        self.sock.settimeout(None)
+        self.buffer   = b""
+        self.assigned = []  # lances da busca atual ainda sem resposta
+        self.since    = 0.0  # último envio de lances ou última resposta (time.monotonic)
+        self.alive    = True
+
+    def send(self, message):
+        self.sock.sendall((json.dumps(message) + "\n").encode())
+
+    def receive(self):
+        """Lê o que estiver disponível e retorna as mensagens completas."""
+        data = self.sock.recv(65536)
+        if not data:
+            raise ConnectionError(f"worker {self.address} desconectou")
+        self.buffer += data
+        *lines, self.buffer = self.buffer.split(b"\n")
+        return [json.loads(line) for line in lines if line]
+
+    def close(self):
+        self.alive = False
+        try:
+            self.sock.close()
+        except OSError:
+            pass
+
+
+class Coordinator:
+    """
+    Distribui os lances da raiz entre workers TCP, profundidade a profundidade.
+    Worker que cai, ou que fica ocupado sem responder por mais que o limite de
+    um lance (ver _stall_limit), tem os lances ainda sem resposta repassados aos
+    demais; sem workers vivos, o coordenador busca os lances restantes sozinho.
+    """
+
+    def __init__(self, addresses, move_timeout=_MOVE_TIMEOUT):
+        self.workers = []
+        for address in addresses:
+            try:
+                self.workers.append(_Connection(address))
+            except OSError:
+                pass  # worker indisponível: segue com os demais
+        self._selector  = selectors.DefaultSelector()
+        for worker in self.workers:
+            self._selector.register(worker.sock, selectors.EVENT_READ, worker)
+        self._search_id = 0
+        self._round_id  = 0
+        self._local_tt  = ai.TranspositionTable(ai.TT_SIZE_MB)
+        self.move_timeout = move_timeout
+        self._slowest   = 0.0  # maior espera por uma resposta nesta jogada
+
+    def live_workers(self):
+        return [w for w in self.workers if w.alive]
+
+    def _drop(self, worker, pending):
+        if not worker.alive:
+            return
+        pending.extend(worker.assigned)
+        worker.assigned = []
+        self._selector.unregister(worker.sock)
+        worker.close()
+
+    def _send(self, worker, message, pending):
+        try:
+            worker.send(message)
+            return True
+        except OSError:
+            self._drop(worker, pending)
+            return False
+
+    def _stall_limit(self):
+        """Segundos sem resposta até um worker ocupado ser dado como travado."""
+        return max(self.move_timeout, _STALL_FACTOR * self._slowest)
+
+    def _drop_stalled(self, pending):
+        limit = time.monotonic() - self._stall_limit()
+        for worker in self.live_workers():
+            if worker.assigned and worker.since < limit:
+                self._drop(worker, pending)
+
+    def _round(self, board, root, order, depth, alpha, deadline):
+        """
+        Uma iteração: busca todos os lances de `order` em `depth`.
+        Retorna {lance: (valor, exato)} ou None se o deadline chegar antes.
+        """
+        self._round_id += 1
+        pending = deque(order)
+        results = {}
+        best    = alpha
+        while len(results) < len(order):
+            now = time.monotonic()
+            if now >= deadline:
+                return None
+            idle = [w for w in self.live_workers() if not w.assigned]
+            if pending and idle:
+                # Reparte os lances em rodízio: cada worker recebe um dos melhores candidatos.
+                for i, move in enumerate(pending):
+                    idle[i % len(idle)].assigned.append(move)
+                pending.clear()
+                for worker in idle:
+                    if worker.assigned:
+                        worker.since = now
+                        self._send(worker, {**root, "type": "search", "id": self._round_id,
+                                            "search": self._search_id,
+                                            "root": [m.uci() for m in worker.assigned],
+                                            "depth": depth, "alpha": best,
+                                            "time": deadline - now}, pending)
+                continue  # um envio pode ter falhado e devolvido lances à fila
+            if not self.live_workers():
+                move = pending.popleft()
+                try:
+                    score, exact = results[move] = _search_root_move(
+                        board, move, depth, best, deadline, self._local_tt)
+                except ai._SearchTimeout:
+                    return None
+                if exact:
+                    best = max(best, score)
+                continue
+            busy = [w.since for w in self.live_workers() if w.assigned]
+            wake = min([deadline] + [since + self._stall_limit() for since in busy])
+            for key, _ in self._selector.select(timeout=max(0.0, wake - time.monotonic())):
+                worker = key.data
+                if not worker.alive:
+                    continue  # descartado por uma falha de envio nesta mesma rodada
+                try:
+                    messages = worker.receive()
+                except (OSError, ValueError):
+                    self._drop(worker, pending)
+                    continue
+                for message in messages:
+                    if message["id"] != self._round_id:
+                        continue  # resposta atrasada de uma iteração anterior
+                    if message["type"] == "timeout":
+                        worker.assigned = []
+                        return None
+                    move = chess.Move.from_uci(message["move"])
+                    worker.assigned.remove(move)
+                    received      = time.monotonic()
+                    self._slowest = max(self._slowest, received - worker.since)
+                    worker.since  = received
+                    results[move] = (message["score"], message["exact"])
+                    if message["exact"] and message["score"] > best:
+                        best = message["score"]
+                        for other in self.live_workers():
+                            if other.assigned:
+                                self._send(other, {"type": "bound", "id": self._round_id,
+                                                   "alpha": best}, pending)
+            self._drop_stalled(pending)
+        return results
+
+    def _drain(self):
+        """Espera os workers ocupados responderem à busca encerrada; quem não responde é descartado."""
+        limit = time.monotonic() + _DRAIN_GRACE
+        while any(w.assigned for w in self.live_workers()):
+            remaining = limit - time.monotonic()
+            events    = self._selector.select(timeout=max(0.0, remaining))
+            if remaining <= 0:
+                break
+            for key, _ in events:
+                worker = key.data
+                if not worker.alive:
+                    continue
+                try:
+                    for message in worker.receive():
+                        if message["type"] == "timeout":
+                            worker.assigned = []
+                        elif chess.Move.from_uci(message["move"]) in worker.assigned:
+                            worker.assigned.remove(chess.Move.from_uci(message["move"]))
+                except (OSError, ValueError):
+                    self._drop(worker, deque())
+        for worker in self.live_workers():
+            if worker.assigned:
+                self._drop(worker, deque())
+
+    def search(self, board, time_limit, max_depth=ai._MAX_SEARCH_DEPTH):
+        """Iterative deepening distribuído. Retorna (lance, profundidade, valor)."""
+        deadline = time.monotonic() + time_limit
+        legal    = list(board.legal_moves)
+        if not legal:
+            return None, 0, None
+        self._search_id += 1
+        self._slowest = 0.0
+        self._local_tt.new_search()
+        root  = {"fen": board.root().fen(), "moves": [m.uci() for m in board.move_stack]}
+        local = ai._SearchBoard.from_board(board)
+        order = ai.order_moves(local, legal)
+        best_move, best_depth, best_score = order[0], 0, None
+        for depth in range(1, max_depth + 1):
+            alpha   = best_score - ai._ASPIRATION_DELTA \
+                if best_score is not None and math.isfinite(best_score) else -math.inf
+            results = self._round(local, root, order, depth, alpha, deadline)
+            if results is not None and not any(exact for _, exact in results.values()):
+                # Todos falharam abaixo da janela de aspiração: re-busca com janela
+                # completa, melhores candidatos primeiro para o alpha subir cedo.
+                results = self._round(local, root, order, depth, -math.inf, deadline)
+            if results is None:
+                break
+            exact      = [m for m in order if results[m][1]]
+            best_move  = max(exact, key=lambda m: results[m][0])
+            best_score = results[best_move][0]
+            best_depth = depth
+            order      = [best_move] + [m for m in order if m != best_move]
+        self._drain()
+        return best_move, best_depth, best_score
+
+    def close(self):
+        for worker in self.live_workers():
+            try:
+                worker.send({"type": "quit"})
+            except OSError:
+                pass
+            worker.close()
+        self._selector.close()
+
+
+def _parse_address(text):
+    host, _, port = text.rpartition(":")
+    return host or "localhost", int(port)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Busca distribuída por divisão da raiz.")
+    sub    = parser.add_subparsers(dest="command", required=True)
+    worker = sub.add_parser("worker", help="roda um worker")
+    worker.add_argument("--host", default="0.0.0.0")
+    worker.add_argument("--port", type=int, default=_DEFAULT_PORT)
+    search = sub.add_parser("search", help="busca uma posição usando os workers")
+    search.add_argument("workers", nargs="+", help="host:porta de cada worker")
+    search.add_argument("--fen", default=chess.STARTING_FEN)
+    search.add_argument("--time", type=float, default=5.0)
+    args = parser.parse_args()
+    if args.command == "worker":
+        serve(args.host, args.port)
+        return
+    coordinator = Coordinator([_parse_address(a) for a in args.workers])
+    try:
+        move, depth, score = coordinator.search(chess.Board(args.fen), args.time)
+        print(f"{move} profundidade {depth} valor {score} ({len(coordinator.live_workers())} workers)")
+    finally:
+        coordinator.close()
+
+
+if __name__ == "__main__":
+    main()
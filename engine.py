@@ -0,0 +1,484 @@
+"""
+Motor em processo separado: a busca roda noutro processo, com um núcleo e um
+GIL só para ela, e a interface conversa com ele por um pipe em linhas de texto.
+A posição vai como FEN inicial + lista de lances (o histórico conta para a
+repetição), nunca como um chess.Board serializado.
+
+Protocolo (UCI, uma linha por mensagem; `python uci.py` o expõe em stdin/stdout):
+
+    interface → motor
+        uci | isready | ucinewgame
+        setoption name Hash|Threads|Ponder value <v>
+        position startpos|fen <FEN> [moves <uci> ...]
+        go [wtime <ms>] [btime <ms>] [winc <ms>] [binc <ms>] [movestogo <n>]
+           [movetime <ms>] [nodes <n>] [depth <d>] [infinite] [ponder]
+        ponderhit          o lance previsto foi jogado: o tempo passa a contar agora
+        stop               interrompe a busca; ela ainda responde com bestmove
+        quit
+    motor → interface
+        id ... / option ... / uciok | readyok
+        info depth <d> score cp <x>|mate <n> nodes <n> nps <n> time <ms> pv <uci> ...
+        info nodes <n> nps <n> time <ms>        (a cada segundo durante uma iteração longa)
+        bestmove <uci>|0000 [ponder <uci>]
+
+Cada `go` recebe exatamente um `bestmove`, inclusive depois de `stop`.
+"""
+import atexit
+import math
+import multiprocessing
+import os
+import threading
+import time
+
+import chess
+
+from config import DEFAULT_TIME_LIMIT, PONDER, SEARCH_WORKERS, TT_SIZE_MB
+
+_NO_MOVE = "0000"
+_ENGINE_NAME   = "Chess-AI"
+_ENGINE_AUTHOR = "Erick Valente Sprogis"
+_INFO_INTERVAL = 1.0   # segundos entre as linhas de progresso de uma busca
+
+# Relógio (wtime/btime): sem movestogo, o tempo restante é dividido como se
+# faltassem _MOVES_TO_GO lances; _CLOCK_MARGIN fica para a comunicação com a interface.
+_MOVES_TO_GO  = 30
+_CLOCK_MARGIN = 0.05
+
+# Opções anunciadas em `uci`: nome → (tipo, padrão, mínimo, máximo).
+OPTIONS = {
+    "Hash":    ("spin", TT_SIZE_MB, 1, 4096),
+    "Threads": ("spin", SEARCH_WORKERS, 1, os.cpu_count() or 1),
+    "Ponder":  ("check", PONDER, None, None),
+}
+
+
+def position_command(board):
+    """Comando `position` de `board`: FEN da raiz da partida mais os lances jogados."""
+    root  = board.root()
+    fen   = root.fen()
+    head  = "position startpos" if fen == chess.STARTING_FEN else f"position fen {fen}"
+    moves = " ".join(move.uci() for move in board.move_stack)
+    return f"{head} moves {moves}" if moves else head
+
+
+def go_command(time_limit=None, max_nodes=None, max_depth=None, ponder=False):
+    """Comando `go` com os mesmos limites de find_best_ai_move (segundos, nós, profundidade)."""
+    parts = ["go"]
+    if time_limit is not None:
+        parts += ["movetime", str(int(time_limit * 1000))]
+    if max_nodes is not None:
+        parts += ["nodes", str(max_nodes)]
+    if max_depth is not None:
+        parts += ["depth", str(max_depth)]
+    if ponder:
+        parts.append("ponder")
+    return " ".join(parts)
+
+
+def parse_position(tokens):
+    """chess.Board dos argumentos de `position` (ValueError se a posição ou um lance for inválido)."""
+    if not tokens:
+        raise ValueError("position sem argumentos")
+    if tokens[0] == "startpos":
+        board, rest = chess.Board(), tokens[1:]
+    elif tokens[0] == "fen":
+        end = tokens.index("moves") if "moves" in tokens else len(tokens)
+        board, rest = chess.Board(" ".join(tokens[1:end])), tokens[end:]
+    else:
+        raise ValueError(f"position inválida: {tokens[0]}")
+    if rest and rest[0] == "moves":
+        for uci in rest[1:]:
+            board.push_uci(uci)
+    return board
+
+
+_GO_INTS  = {"movetime", "nodes", "depth", "wtime", "btime", "winc", "binc", "movestogo"}
+_GO_FLAGS = {"ponder", "infinite"}
+
+
+def parse_go(tokens):
+    """Dicionário com os limites de `go`: inteiros de _GO_INTS e True para as flags."""
+    limits = {}
+    i = 0
+    while i < len(tokens):
+        name = tokens[i]
+        if name in _GO_FLAGS:
+            limits[name] = True
+            i += 1
+        elif name in _GO_INTS and i + 1 < len(tokens):
+            limits[name] = int(tokens[i + 1])
+            i += 2
+        else:
+            i += 1  # argumento desconhecido: ignorado, como manda o UCI
+    return limits
+
+
+def search_budget(limits, turn=chess.WHITE):
+    """
+    Argumentos de find_best_ai_move para os limites de um `go`; `turn` é o lado
+    a jogar, que escolhe entre wtime/winc e btime/binc. `movetime` tem
+    prioridade sobre o relógio.
+    """
+    budget = {}
+    clock  = limits.get("wtime" if turn == chess.WHITE else "btime")
+    if "movetime" in limits:
+        budget["time_limit"] = limits["movetime"] / 1000.0
+    elif clock is not None:
+        remaining = clock / 1000.0
+        increment = limits.get("winc" if turn == chess.WHITE else "binc", 0) / 1000.0
+        share     = remaining / max(1, limits.get("movestogo", _MOVES_TO_GO)) + increment * 0.75
+        budget["time_limit"] = max(0.01, min(share, remaining - _CLOCK_MARGIN))
+    if "nodes" in limits:
+        budget["max_nodes"] = limits["nodes"]
+    if "depth" in limits:
+        budget["max_depth"] = limits["depth"]
+    if limits.get("infinite"):
+        budget["time_limit"] = math.inf  # só para em `stop` (ou em nodes/depth)
+        budget["book"]       = False     # análise: lance do livro responderia antes do `stop`
+    return budget
+
+
+def parse_setoption(tokens):
+    """(nome, valor) de `setoption name <nome> [value <valor>]`; nome e valor podem ter espaços."""
+    if not tokens or tokens[0] != "name":
+        raise ValueError("setoption sem name")
+    end = tokens.index("value") if "value" in tokens else len(tokens)
+    return " ".join(tokens[1:end]), " ".join(tokens[end + 1:])
+
+
+def format_info(info, turn):
+    """Linha `info` da última iteração de um SearchInfo; `turn` é o lado a jogar na raiz."""
+    it    = info.iterations[-1] if info.iterations else None
+    parts = ["info", "depth", str(info.depth)]
+    score = info.score
+    if score is not None:
+        sign = 1 if turn == chess.WHITE else -1
+        if math.isinf(score):
+            mate = (len(info.pv) + 1) // 2
+            parts += ["score", "mate", str(mate if score * sign > 0 else -mate)]
+        else:
+            parts += ["score", "cp", str(round(score * 100) * sign)]
+    if it is not None:
+        nodes = it["nodes"] + it["qnodes"]
+        ms    = int(it["time"] * 1000)
+        parts += ["nodes", str(nodes), "nps", str(nodes * 1000 // ms if ms else nodes), "time", str(ms)]
+    if info.pv:
+        parts += ["pv"] + [move.uci() for move in info.pv]
+    return " ".join(parts)
+
+
+class EngineSession:
+    """
+    Estado do motor: posição atual e busca em andamento. `handle(linha)` executa
+    um comando; as respostas saem por `send(linha)`, da thread da busca.
+    """
+
+    def __init__(self, send):
+        self._send    = send
+        self._lock    = threading.Lock()
+        self.board    = chess.Board()
+        self.workers  = SEARCH_WORKERS
+        self._thread  = None
+        self._stop    = None   # interrompe a busca atual (Event.set ou Ponder.control.stop)
+        self._waiting = None   # (Ponder ou None, orçamento, liberação) enquanto espera o ponderhit
+
+    def send(self, line):
+        with self._lock:
+            self._send(line)
+
+    def handle(self, line):
+        """Executa uma linha do protocolo; retorna False em `quit`."""
+        tokens = line.split()
+        if not tokens:
+            return True
+        command, args = tokens[0], tokens[1:]
+        try:
+            if command == "quit":
+                self.stop()
+                return False
+            if command == "uci":
+                self.send(f"id name {_ENGINE_NAME}")
+                self.send(f"id author {_ENGINE_AUTHOR}")
+                for name, (kind, default, low, high) in OPTIONS.items():
+                    if kind == "check":
+                        self.send(f"option name {name} type check default {str(default).lower()}")
+                    else:
+                        self.send(f"option name {name} type spin default {default} min {low} max {high}")
+                self.send("uciok")
+            elif command == "isready":
+                self.send("readyok")  # comandos são tratados em ordem: tudo o que veio antes já vale
+            elif command == "ucinewgame":
+                import ai
+
+                self.stop()
+                ai.reset_search_state()
+            elif command == "setoption":
+                self.stop()
+                self.set_option(*parse_setoption(args))
+            elif command == "position":
+                board = parse_position(args)
+                self.stop()
+                self.board = board
+            elif command == "go":
+                self.stop()
+                self.go(parse_go(args))
+            elif command == "ponderhit":
+                self.ponderhit()
+            elif command == "stop":
+                self.stop()
+            else:
+                self.send(f"info string comando desconhecido: {command}")
+        except ValueError as error:
+            self.send(f"info string erro: {error}")
+        return True
+
+    def set_option(self, name, value):
+        import ai
+
+        if name not in OPTIONS:
+            raise ValueError(f"opção desconhecida: {name}")
+        kind, _, low, high = OPTIONS[name]
+        if kind == "spin":
+            value = min(max(int(value), low), high)
+        if name == "Hash":
+            ai.set_hash_size(value)
+        elif name == "Threads":
+            self.workers = value
+        # Ponder só avisa que a interface pode mandar `go ponder`: nada a configurar
+
+    def go(self, limits):
+        import ai  # só no processo do motor: a interface não carrega TT nem livro
+
+        board  = self.board.copy()
+        budget = search_budget(limits, board.turn)
+        if limits.get("ponder"):
+            # Pensa na posição com o lance previsto já jogado até ponderhit/stop.
+            # Sem lance previsto (position sem moves), fim de jogo e livro não
+            # pensam antes: a busca normal começa no ponderhit ou no stop.
+            # O bestmove só sai depois de ponderhit ou stop, mesmo que a busca acabe antes.
+            ponder   = None
+            released = threading.Event()
+            if board.move_stack and not board.is_game_over() and not ai._in_book(board):
+                before = board.copy()
+                move   = before.pop()
+                last   = []
+                ponder = ai.Ponder(before, move, on_iteration=self._info_sender(board.turn, last))
+                self._stop   = ponder.control.stop
+                self._thread = threading.Thread(target=self._await_ponder, args=(ponder, board, released, last),
+                                                daemon=True)
+                self._thread.start()
+            self._waiting = (ponder, budget, released)
+            return
+        self._start(board, budget)
+
+    def ponderhit(self):
+        if self._waiting is None:
+            return
+        ponder, budget, released = self._waiting
+        self._waiting = None
+        if ponder is None:
+            self._start(self.board.copy(), budget)
+        else:
+            # como em find_best_ai_move: só sem nenhum limite vale DEFAULT_TIME_LIMIT
+            nodes, depth = budget.get("max_nodes"), budget.get("max_depth")
+            default      = DEFAULT_TIME_LIMIT if nodes is None and depth is None else math.inf
+            ponder.hit(budget.get("time_limit", default), nodes, depth)
+        released.set()
+
+    def stop(self):
+        """Interrompe a busca em andamento e espera o seu bestmove sair."""
+        if self._waiting is not None:
+            ponder, budget, released = self._waiting
+            released.set()
+            if ponder is None:
+                self._start(self.board.copy(), budget)  # livro ou fim de jogo: instantâneo
+        self._waiting = None
+        if self._stop is not None:
+            self._stop()
+        if self._thread is not None:
+            self._thread.join()
+        self._thread = self._stop = None
+
+    def _start(self, board, budget):
+        stop         = threading.Event()
+        self._stop   = stop.set
+        self._thread = threading.Thread(target=self._run, args=(board, budget, stop), daemon=True)
+        self._thread.start()
+
+    def _run(self, board, budget, stop):
+        import ai
+
+        result, last = [], []
+
+        def search():
+            try:
+                result.append(ai.find_best_ai_move(
+                    board, workers=self.workers, stop=stop, with_info=True,
+                    on_iteration=self._info_sender(board.turn, last), **budget))
+            except Exception as error:
+                self.send(f"info string erro na busca: {error!r}")
+
+        thread = threading.Thread(target=search, daemon=True)
+        thread.start()
+        try:
+            self._report_progress(thread)
+        finally:
+            self._send_bestmove(board, *(result[0] if result else self._last_iteration(last)))
+
+    def _await_ponder(self, ponder, board, released, last):
+        try:
+            self._report_progress(ponder.thread)
+            released.wait()
+        finally:
+            info = getattr(ponder, "info", None)  # só existe se a busca terminou sem exceção
+            if info is None:
+                self._send_bestmove(board, *self._last_iteration(last))
+            else:
+                self._send_bestmove(board, ponder.result[0], info)
+
+    @staticmethod
+    def _last_iteration(last):
+        """(lance, info) da última iteração completa de uma busca que falhou, ou (None, None)."""
+        return (last[0].move, last[0]) if last else (None, None)
+
+    def _report_progress(self, search):
+        """Espera a busca terminar, mandando nós e NPS a cada _INFO_INTERVAL (iterações longas ficam mudas)."""
+        import ai
+
+        start = time.monotonic()
+        while True:
+            search.join(_INFO_INTERVAL)
+            if not search.is_alive():
+                return
+            elapsed = time.monotonic() - start
+            nodes   = ai._stats.nodes + ai._stats.qnodes
+            self.send(f"info nodes {nodes} nps {int(nodes / elapsed)} time {int(elapsed * 1000)}")
+
+    def _info_sender(self, turn, last):
+        """on_iteration da busca: manda a linha info e guarda o SearchInfo em `last[0]`."""
+        def send(info):
+            last[:] = [info]
+            self.send(format_info(info, turn))
+        return send
+
+    def _send_bestmove(self, board, move, info):
+        import ai
+
+        if move is None:
+            self.send(f"bestmove {_NO_MOVE}")
+            return
+        reply = info.pv[1] if info is not None and len(info.pv) > 1 else None
+        if reply is None:
+            after = board.copy()
+            after.push(move)
+            reply = ai.predicted_reply(after)
+        self.send(f"bestmove {move.uci()}" + (f" ponder {reply.uci()}" if reply else ""))
+
+
+def run(lines, send):
+    """Executa os comandos de `lines` (iterável de linhas) até `quit` ou o fim delas, respondendo por `send`."""
+    session = EngineSession(send)
+    try:
+        for line in lines:
+            if not session.handle(line):
+                break
+        else:
+            session.stop()
+    finally:
+        import ai
+        import lazy_smp
+
+        # processos do multiprocessing não rodam atexit: TT e helpers são fechados aqui
+        ai.save_tt()
+        lazy_smp.shutdown()
+
+
+def _received(conn):
+    while True:
+        try:
+            yield conn.recv_bytes().decode()
+        except (EOFError, OSError):
+            return
+
+
+def serve(conn):
+    """Laço do processo do motor: lê comandos de `conn` até `quit` ou o pipe fechar."""
+    try:
+        run(_received(conn), lambda line: conn.send_bytes(line.encode()))
+    finally:
+        conn.close()
+
+
+class EngineClient:
+    """
+    Lado da interface: inicia o processo do motor e troca linhas com ele sem
+    bloquear. `go()` manda posição e limites; `poll()`, chamado a cada quadro,
+    devolve (lance, lance previsto do adversário) quando a busca atual termina.
+    Buscas canceladas ainda respondem bestmove; essas respostas são descartadas.
+    """
+
+    def __init__(self):
+        ctx = multiprocessing.get_context("spawn")
+        self._conn, child = ctx.Pipe()
+        # não daemon: o motor pode abrir os próprios helpers do Lazy SMP
+        self._proc = ctx.Process(target=serve, args=(child,))
+        self._proc.start()
+        child.close()
+        self._sent    = 0      # buscas pedidas (go)
+        self._done    = 0      # bestmoves recebidos
+        self._current = None   # número da busca cujo resultado interessa
+        self.info     = None   # última linha info da busca atual
+        atexit.register(self.close)
+
+    @property
+    def searching(self):
+        return self._current is not None
+
+    def send(self, line):
+        self._conn.send_bytes(line.encode())
+
+    def go(self, board, time_limit=None, max_nodes=None, max_depth=None, ponder=False):
+        """Começa a buscar `board`; com `ponder=True` a busca espera ponderhit() (ver protocolo)."""
+        self.send(position_command(board))
+        self.send(go_command(time_limit, max_nodes, max_depth, ponder))
+        self._sent   += 1
+        self._current = self._sent
+        self.info     = None
+
+    def ponderhit(self):
+        self.send("ponderhit")
+
+    def cancel(self):
+        """Abandona a busca atual: o motor para em milissegundos e o resultado é ignorado."""
+        if self._current is not None:
+            self.send("stop")
+            self._current = None
+
+    def poll(self):
+        """Lê as respostas pendentes; retorna (lance ou None, previsto ou None) ao fim da busca atual."""
+        result = None
+        while self._conn.poll():
+            tokens = self._conn.recv_bytes().decode().split()
+            if tokens and tokens[0] == "bestmove":
+                self._done += 1
+                if self._done == self._current:
+                    self._current = None
+                    move   = None if tokens[1] == _NO_MOVE else chess.Move.from_uci(tokens[1])
+                    reply  = chess.Move.from_uci(tokens[3]) if len(tokens) > 3 else None
+                    result = (move, reply)
+            elif tokens and tokens[0] == "info" and self._done + 1 == self._current:
+                self.info = " ".join(tokens)
+        return result
+
+    def close(self):
+        if self._proc is None:
+            return
+        try:
+            self.send("quit")
+        except (BrokenPipeError, OSError):
+            pass
+        self._proc.join(timeout=5.0)
+        if self._proc.is_alive():
+            self._proc.terminate()
+        self._conn.close()
+        self._proc = None
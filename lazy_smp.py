@@ -0,0 +1,197 @@
+"""
+Lazy SMP: processos auxiliares buscam a mesma raiz que o processo principal,
+com profundidades iniciais e ordens de lances ligeiramente diferentes, e
+compartilham uma única transposition table em memória compartilhada.
+"""
+import argparse
+import atexit
+import math
+import multiprocessing
+import queue
+import time
+from multiprocessing import shared_memory
+
+import chess
+
+from transposition import TranspositionTable, slots_for_mb
+
+_COLLECT_GRACE = 0.5  # segundos além do deadline para esperar os helpers terminarem
+_COLLECT_POLL  = 0.1  # sem deadline (busca só por profundidade): intervalo entre checagens dos helpers
+
+_pool = None
+
+
+class _HelperDeadline:
+    """Deadline do helper com o sinal de parada do processo principal (ver ai.SearchControl)."""
+
+    def __init__(self, deadline, stop):
+        self.deadline = deadline
+        self.stop     = stop
+
+    def __le__(self, now):
+        return self.deadline <= now or self.stop.is_set()
+
+
+def _helper_main(shm_name, nbytes, commands, results, helper_id, stop):
+    import ai  # importado no processo filho: ai depende deste módulo
+
+    # O helper só anexa o segmento; quem o criou (HelperPool) é quem o remove.
+    shm = shared_memory.SharedMemory(name=shm_name)
+    tt = TranspositionTable(buffer=shm.buf[:nbytes])
+    while True:
+        command = commands.get()
+        if command is None:
+            break
+        search_id, fen, moves, deadline, generation, max_depth = command
+        board = chess.Board(fen)
+        for uci in moves:
+            board.push_uci(uci)
+        tt.generation = generation
+        ai._killers.clear()
+        ai._history.clear()
+        move, depth, _ = ai._iterative_deepening(
+            ai._SearchBoard.from_board(board), _HelperDeadline(deadline, stop), tt,
+            start_depth=1 + helper_id % 2, max_depth=max_depth, shuffle_seed=helper_id,
+        )
+        results.put((search_id, depth, move.uci() if move else None))
+    tt.release()
+    shm.close()
+
+
+class HelperPool:
+    """Processos auxiliares persistentes (reaproveitados entre jogadas) e a TT compartilhada."""
+
+    def __init__(self, helpers, size_mb):
+        ctx          = multiprocessing.get_context("spawn")
+        nbytes       = slots_for_mb(size_mb) * 8
+        self.helpers = helpers
+        self.size_mb = size_mb
+        self._shm    = shared_memory.SharedMemory(create=True, size=nbytes)
+        # Sem trava: cada entrada da TT é uma palavra alinhada de 64 bits, escrita
+        # e lida de uma vez, com a verificação da chave dentro da própria palavra.
+        # Uma corrida só pode perder uma gravação, nunca misturar duas entradas.
+        self.tt        = TranspositionTable(buffer=self._shm.buf[:nbytes])
+        self._results  = ctx.Queue()
+        self._stop     = ctx.Event()
+        self._commands = [ctx.Queue() for _ in range(helpers)]
+        self._procs    = [
+            ctx.Process(target=_helper_main, daemon=True,
+                        args=(self._shm.name, nbytes, commands, self._results, i + 1, self._stop))
+            for i, commands in enumerate(self._commands)
+        ]
+        for proc in self._procs:
+            proc.start()
+        self._search_id = 0
+
+    def start_search(self, board, deadline, generation, max_depth):
+        """Dispara a busca da posição `board` em todos os helpers (não bloqueia)."""
+        self._search_id += 1
+        self._stop.clear()
+        root  = board.root()
+        moves = [move.uci() for move in board.move_stack]
+        for commands in self._commands:
+            commands.put((self._search_id, root.fen(), moves, deadline, generation, max_depth))
+
+    def stop(self):
+        """Interrompe a busca atual dos helpers; cada um ainda envia seu resultado para collect()."""
+        self._stop.set()
+
+    def collect(self, deadline):
+        """
+        Espera os helpers da busca atual e retorna (lance, profundidade) do mais
+        profundo. Com `deadline` infinito (busca só por profundidade ou até stop())
+        espera enquanto houver helper vivo: eles param no max_depth ou no stop().
+        """
+        best_move, best_depth = None, 0
+        pending = self.helpers
+        limit   = max(deadline, time.monotonic()) + _COLLECT_GRACE
+        while pending:
+            timeout = max(0.0, limit - time.monotonic()) if math.isfinite(limit) else _COLLECT_POLL
+            try:
+                search_id, depth, uci = self._results.get(timeout=timeout)
+            except queue.Empty:
+                if math.isfinite(limit) or not any(proc.is_alive() for proc in self._procs):
+                    break
+                continue
+            if search_id != self._search_id:
+                continue  # resultado atrasado de uma busca anterior
+            pending -= 1
+            if uci is not None and depth > best_depth:
+                best_move, best_depth = chess.Move.from_uci(uci), depth
+        return best_move, best_depth
+
+    def close(self):
+        for commands in self._commands:
+            commands.put(None)
+        for proc in self._procs:
+            proc.join(timeout=2.0)
+            if proc.is_alive():
+                proc.terminate()
+        self.tt.release()
+        self._shm.close()
+        self._shm.unlink()
+
+
+def get_pool(helpers, size_mb):
+    """Pool de helpers do processo, recriado se o número de helpers ou o tamanho da TT mudar."""
+    global _pool
+    if _pool is not None and (_pool.helpers != helpers or _pool.size_mb != size_mb):
+        shutdown()
+    if _pool is None:
+        _pool = HelperPool(helpers, size_mb)
+    return _pool
+
+
+def shutdown():
+    global _pool
+    if _pool is not None:
+        _pool.close()
+        _pool = None
+
+
+atexit.register(shutdown)
+
+
+# Posições de meio-jogo para medir time-to-depth.
+_SPEEDUP_FENS = [
+    "r3k2r/p1ppqpb1/bn2pnp1/3PN3/1p2P3/2N2Q1p/PPPBBPPP/R3K2R w KQkq - 0 1",
+    "r1bq1rk1/pp2bppp/2n1pn2/2pp4/3P4/2PBPN2/PP1N1PPP/R1BQ1RK1 w - - 0 8",
+    "2r3k1/pp3ppp/4p3/3pP3/3P4/P4N2/1P3PPP/2R3K1 w - - 0 25",
+]
+
+
+def time_to_depth(depth, workers_list, fens=_SPEEDUP_FENS):
+    """Tempo total até completar `depth` em cada posição, para cada número de workers."""
+    import ai
+
+    timings = {}
+    for workers in workers_list:
+        if workers > 1:
+            get_pool(workers - 1, ai.TT_SIZE_MB)  # sobe os processos fora da medição
+        elapsed = 0.0
+        for fen in fens:
+            ai._tt.clear()
+            if _pool is not None:
+                _pool.tt.clear()
+            start = time.monotonic()
+            ai._search(chess.Board(fen), start + 3600, workers, max_depth=depth)
+            elapsed += time.monotonic() - start
+        timings[workers] = elapsed
+        shutdown()
+    return timings
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Mede o speedup de time-to-depth do Lazy SMP.")
+    parser.add_argument("--depth", type=int, default=5)
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4, 8])
+    args = parser.parse_args()
+    timings = time_to_depth(args.depth, args.workers)
+    base    = timings.get(1) or next(iter(timings.values()))
+    print(f"profundidade {args.depth} em {len(_SPEEDUP_FENS)} posições ({multiprocessing.cpu_count()} núcleos)")
+    for workers, elapsed in timings.items():
+        print(f"  {workers:>2} workers: {elapsed:7.2f}s  speedup {base / elapsed:4.2f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,5 +1,4 @@
 import sys
-import threading
 import time
 
 import chess
@@ -7,14 +6,14 @@ import pygame
 
 from config import (
     MENU_WIDTH, MENU_HEIGHT, GAME_WIDTH, GAME_HEIGHT,
-    BOARD_RECT, HISTORY_RECT, ACTION_PANEL_RECT, PAUSE_BTN,
     COLOR_MENU_BG, COLOR_MENU_TEXT, COLOR_DARK, COLOR_LIGHT,
     COLOR_PIECE_BLACK, COLOR_COORD,
-    DIFFICULTY_LEVELS, DEFAULT_TIME_LIMIT, TIME_CONTROLS,
-    SAVES_DIR, SQUARE_SIZE,
+    DIFFICULTY_LEVELS, DEFAULT_DIFFICULTY, TIME_CONTROLS,
+    SAVES_DIR, SQUARE_SIZE, PONDER,
 )
-from ai import find_best_ai_move
+from engine import EngineClient
 from renderer import (
+    BOARD_RECT, HISTORY_RECT, ACTION_PANEL_RECT, PAUSE_BTN,
     draw_text, draw_board, draw_coordinates, draw_pieces,
     draw_visual_aids, get_square_from_mouse,
     draw_info_panel, draw_history_panel,
@@ -55,18 +54,31 @@ def main():
     font_popup     = load_font(36)
     font_popup_sub = load_font(22)
 
+    engine          = EngineClient()  # a busca roda noutro processo (ver engine.py)
     ai_move_to_make = None
-    ai_thread       = None
-    ai_result       = [None]
+    ai_reply        = None  # resposta do jogador prevista pelo motor junto com o lance
+    ponder_board    = None  # posição em que o motor está ponderando (lance previsto já jogado)
 
     state_vars = {}
 
-    def reset_game():
-        nonlocal screen, ai_move_to_make, ai_thread, ai_result
-        screen          = pygame.display.set_mode((MENU_WIDTH, MENU_HEIGHT))
+    def stop_ponder():
+        nonlocal ponder_board
+        if ponder_board is not None:
+            engine.cancel()
+            ponder_board = None
+
+    def cancel_ai():
+        """Manda a busca em andamento parar (termina em milissegundos) e a esquece."""
+        nonlocal ai_move_to_make, ai_reply, ponder_board
+        engine.cancel()
         ai_move_to_make = None
-        ai_thread       = None
-        ai_result       = [None]
+        ai_reply        = None
+        ponder_board    = None
+
+    def reset_game():
+        nonlocal screen
+        cancel_ai()
+        screen = pygame.display.set_mode((MENU_WIDTH, MENU_HEIGHT))
         _clock = state_vars.get('clock_config')
         state_vars.update({
             'board':                chess.Board(),
@@ -79,7 +91,7 @@ def main():
             'game_over_message':    "",
             'move_history_san':     [],
             'history_scroll_offset': 0,
-            'time_limit':           state_vars.get('time_limit', DEFAULT_TIME_LIMIT),
+            'difficulty':           state_vars.get('difficulty', DEFAULT_DIFFICULTY),
             'pause_page':           "main",
             'pending_promotion':    None,
             'clock_config':         _clock,
@@ -116,7 +128,7 @@ def main():
                          last_move=_last_move)
         draw_pieces(screen, _disp, font_pieces, state_vars['perspective'],
                     None if _aidx is not None else state_vars.get('anim'))
-        thinking = ai_thread is not None and ai_thread.is_alive()
+        thinking = engine.searching and ponder_board is None
         draw_info_panel(screen, font_ui, _disp,
                         state_vars.get('white_time'), state_vars.get('black_time'), thinking)
         _sel_san = (_aidx - 1) if _aidx is not None and _aidx > 0 else None
@@ -238,6 +250,7 @@ def main():
                     if is_human_turn:
                         undo_button, reset_button = draw_action_panel(screen, font_ui)
                         if undo_button.collidepoint(e.pos):
+                            cancel_ai()
                             state_vars['anim'] = None
                             if len(state_vars['move_history_san']) > 0:
                                 state_vars['board'].pop()
@@ -360,6 +373,7 @@ def main():
                         if fb.collidepoint(e.pos):
                             result = import_pgn(f"{SAVES_DIR}/{fname}")
                             if result:
+                                cancel_ai()
                                 _board, _hist, _hdrs = result
                                 screen = pygame.display.set_mode((GAME_WIDTH, GAME_HEIGHT))
                                 state_vars.update(board=_board, move_history_san=_hist,
@@ -383,7 +397,7 @@ def main():
                     _page = state_vars.get('pause_page', 'main')
                     btns, secondary_btn = draw_pause_menu(
                         screen, font_popup, font_ui, _page,
-                        state_vars.get('time_limit', DEFAULT_TIME_LIMIT)
+                        state_vars.get('difficulty', DEFAULT_DIFFICULTY)
                     )
                     if _page == "difficulty":
                         for i, btn in enumerate(btns):
@@ -393,12 +407,12 @@ def main():
                                 _persp  = state_vars['perspective']
                                 _clock  = state_vars.get('clock_config')
                                 _t      = float(_clock) if _clock else None
-                                _tlimit = DIFFICULTY_LEVELS[i][1]
+                                _budget = DIFFICULTY_LEVELS[i][1]
                                 reset_game()
                                 screen = pygame.display.set_mode((GAME_WIDTH, GAME_HEIGHT))
                                 state_vars.update(game_mode=_mode, player_color=_color,
                                                   perspective=_persp, game_state="JOGANDO",
-                                                  time_limit=_tlimit, white_time=_t,
+                                                  difficulty=_budget, white_time=_t,
                                                   black_time=_t, last_tick=None)
                                 break
                         else:
@@ -412,14 +426,14 @@ def main():
                             _mode   = state_vars['game_mode']
                             _color  = state_vars['player_color']
                             _persp  = state_vars['perspective']
-                            _tlimit = state_vars.get('time_limit', DEFAULT_TIME_LIMIT)
+                            _budget = state_vars.get('difficulty', DEFAULT_DIFFICULTY)
                             _clock  = state_vars.get('clock_config')
                             _t      = float(_clock) if _clock else None
                             reset_game()
                             screen = pygame.display.set_mode((GAME_WIDTH, GAME_HEIGHT))
                             state_vars.update(game_mode=_mode, player_color=_color,
                                               perspective=_persp, game_state="JOGANDO",
-                                              time_limit=_tlimit, white_time=_t,
+                                              difficulty=_budget, white_time=_t,
                                               black_time=_t, last_tick=None)
                         elif diff_btn.collidepoint(e.pos):
                             state_vars['pause_page'] = "difficulty"
@@ -460,20 +474,21 @@ def main():
                  state_vars['board'].turn == state_vars['player_color'])
             )
             if (not is_human_turn and state_vars['game_mode'] == "IA"
-                    and ai_move_to_make is None and ai_thread is None
+                    and ai_move_to_make is None
+                    and (ponder_board is not None or not engine.searching)
                     and not state_vars.get('anim')):
-                board_copy  = state_vars['board'].copy()
-                _tlimit     = state_vars.get('time_limit', DEFAULT_TIME_LIMIT)
-                ai_result[0] = None
-                ai_thread = threading.Thread(
-                    target=lambda: ai_result.__setitem__(0, find_best_ai_move(board_copy, _tlimit)),
-                    daemon=True,
-                )
-                ai_thread.start()
-            if ai_thread is not None and not ai_thread.is_alive():
-                ai_move_to_make = ai_result[0]
-                ai_result[0]    = None
-                ai_thread       = None
+                _budget = state_vars.get('difficulty', DEFAULT_DIFFICULTY)
+                if (ponder_board is not None
+                        and ponder_board.move_stack == state_vars['board'].move_stack):
+                    # Ponder-hit: a busca que já corria vira a busca da jogada.
+                    engine.ponderhit()
+                else:
+                    stop_ponder()
+                    engine.go(state_vars['board'], **_budget)
+                ponder_board = None
+            _done = engine.poll()
+            if _done is not None:
+                ai_move_to_make, ai_reply = _done
 
         # --- Draw ---
         screen.fill(COLOR_MENU_BG)
@@ -545,7 +560,7 @@ def main():
             draw_game_screen()
             draw_pause_menu(screen, font_popup, font_ui,
                             state_vars.get('pause_page', 'main'),
-                            state_vars.get('time_limit', DEFAULT_TIME_LIMIT))
+                            state_vars.get('difficulty', DEFAULT_DIFFICULTY))
 
         elif current_state == "FIM_DE_JOGO":
             draw_game_screen()
@@ -604,9 +619,20 @@ def main():
                 _p, state_vars['perspective']
             )
             ai_move_to_make = None
+            # Só níveis por tempo ponderam: orçamentos de nós/profundidade devem custar sempre o mesmo.
+            _budget = state_vars.get('difficulty', DEFAULT_DIFFICULTY)
+            if (PONDER and 'time_limit' in _budget and ai_reply is not None
+                    and not state_vars['board'].is_game_over()
+                    and state_vars['board'].is_legal(ai_reply)):
+                ponder_board = state_vars['board'].copy()
+                ponder_board.push(ai_reply)
+                engine.go(ponder_board, time_limit=_budget['time_limit'], ponder=True)
+            ai_reply = None
 
         # Clock timeout
         if current_state == "JOGANDO" and state_vars.get('white_time') is not None:
+            if state_vars['white_time'] <= 0 or state_vars['black_time'] <= 0:
+                stop_ponder()
             if state_vars['white_time'] <= 0:
                 state_vars['game_state']       = "FIM_DE_JOGO"
                 state_vars['game_over_message'] = "Tempo esgotado!\nPretas vencem."
@@ -620,6 +646,7 @@ def main():
 
         # Game over detection
         if current_state == "JOGANDO" and state_vars['board'].is_game_over():
+            stop_ponder()
             state_vars['game_state'] = "FIM_DE_JOGO"
             b = state_vars['board']
             if b.is_checkmate():
@@ -636,6 +663,7 @@ def main():
             _s = sounds.get('game_end')
             if _s: _s.play()
 
+    engine.close()
     pygame.quit()
     sys.exit()
 
@@ -0,0 +1,180 @@
+"""
+Perft: conta as folhas da árvore de lances legais até a profundidade N e compara
+com os valores conhecidos das posições de referência. Serve para validar um
+gerador de lances (ou um tabuleiro incremental) e medir sua vazão.
+
+O tabuleiro vem de um backend: qualquer classe construída a partir de um FEN com
+`legal_moves`, `push` e `pop` no formato do chess.Board. Backends são registrados
+como "módulo:atributo" para que os processos do modo paralelo possam importá-los.
+
+    python perft.py                          # suíte de referência, profundidade 3
+    python perft.py --depth 4 --workers 4    # divide a raiz entre 4 processos
+    python perft.py --fen "..." --depth 3 --divide
+    python perft.py --backend search         # tabuleiro incremental da busca
+"""
+import argparse
+import importlib
+import multiprocessing
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import chess
+
+BACKENDS = {
+    "chess":  "chess:Board",        # python-chess puro
+    "position": "position:Position",  # posição compacta da busca, sem material/PST
+    "search": "ai:_SearchBoard",    # tabuleiro da busca (Position com a PST da avaliação)
+}
+
+_DEFAULT_DEPTH = 3
+
+# (nome, FEN, folhas por profundidade a partir de 1) — valores de referência do chessprogramming wiki
+SUITE = [
+    ("inicial", chess.STARTING_FEN,
+     [20, 400, 8902, 197281, 4865609]),
+    ("kiwipete", "r3k2r/p1ppqpb1/bn2pnp1/3PN3/1p2P3/2N2Q1p/PPPBBPPP/R3K2R w KQkq - 0 1",
+     [48, 2039, 97862, 4085603]),
+    ("posicao-3", "8/2p5/3p4/KP5r/1R3p1k/8/4P1P1/8 w - - 0 1",
+     [14, 191, 2812, 43238, 674624]),
+    ("posicao-4", "r3k2r/Pppp1ppp/1b3nbN/nP6/BBP1P3/q4N2/Pp1P2PP/R2Q1RK1 w kq - 0 1",
+     [6, 264, 9467, 422333]),
+    ("posicao-5", "rnbq1k1r/pp1Pbppp/2p5/8/2B5/8/PPP1NnPP/RNBQK2R w KQ - 1 8",
+     [44, 1486, 62379, 2103487]),
+    ("posicao-6", "r4rk1/1pp1qppp/p1np1n2/2b1p1B1/2B1P1b1/P1NP1N2/1PP1QPPP/R4RK1 w - - 0 10",
+     [46, 2079, 89890, 3894594]),
+]
+
+
+def register_backend(name, spec):
+    """Registra um backend como "módulo:atributo" (a classe recebe o FEN no construtor)."""
+    _resolve(spec)
+    BACKENDS[name] = spec
+
+
+def _resolve(spec):
+    module, _, attr = spec.partition(":")
+    return getattr(importlib.import_module(module), attr)
+
+
+def make_board(fen=chess.STARTING_FEN, backend="chess"):
+    if backend not in BACKENDS:
+        raise ValueError(f"backend desconhecido: {backend} (disponíveis: {', '.join(BACKENDS)})")
+    return _resolve(BACKENDS[backend])(fen)
+
+
+def perft(board, depth):
+    """Número de folhas a `depth` lances de `board` (o último nível só é contado, não jogado)."""
+    if depth <= 0:
+        return 1
+    if depth == 1:
+        return sum(1 for _ in board.legal_moves)
+    nodes = 0
+    for move in list(board.legal_moves):
+        board.push(move)
+        nodes += perft(board, depth - 1)
+        board.pop()
+    return nodes
+
+
+def _divide_task(spec, fen, uci, depth):
+    board = _resolve(spec)(fen)
+    board.push(chess.Move.from_uci(uci))
+    return perft(board, depth)
+
+
+def divide(board, depth, workers=1, backend="chess"):
+    """
+    Folhas por lance da raiz ({uci: folhas}). Com `workers > 1` cada lance da raiz
+    vai para um processo; nesse caso `backend` diz qual tabuleiro os processos montam.
+    """
+    moves = list(board.legal_moves)
+    if depth <= 0:
+        return {}
+    if workers <= 1:
+        counts = {}
+        for move in moves:
+            board.push(move)
+            counts[move.uci()] = perft(board, depth - 1)
+            board.pop()
+        return counts
+    spec = BACKENDS[backend]
+    fen  = board.fen()
+    ctx  = multiprocessing.get_context("spawn")
+    with ProcessPoolExecutor(max_workers=workers, mp_context=ctx) as pool:
+        futures = {move.uci(): pool.submit(_divide_task, spec, fen, move.uci(), depth - 1)
+                   for move in moves}
+        return {uci: future.result() for uci, future in futures.items()}
+
+
+def run(fen, depth, backend="chess", workers=1):
+    """Retorna (folhas, segundos) de uma posição."""
+    board = make_board(fen, backend)
+    start = time.perf_counter()
+    if workers > 1 and depth > 1:
+        nodes = sum(divide(board, depth, workers, backend).values())
+    else:
+        nodes = perft(board, depth)
+    return nodes, time.perf_counter() - start
+
+
+def run_suite(depth=_DEFAULT_DEPTH, backend="chess", workers=1, suite=SUITE):
+    """
+    Roda a suíte de referência. Cada resultado é um dicionário com nome, folhas,
+    esperado (None se a profundidade passa da tabela), tempo e folhas por segundo.
+    """
+    results = []
+    for name, fen, expected in suite:
+        nodes, secs = run(fen, depth, backend, workers)
+        results.append({
+            "name": name, "nodes": nodes, "time": secs,
+            "expected": expected[depth - 1] if depth <= len(expected) else None,
+            "nps": nodes / secs if secs else 0.0,
+        })
+    return results
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Perft: valida e mede a geração de lances.")
+    parser.add_argument("--depth", type=int, default=_DEFAULT_DEPTH)
+    parser.add_argument("--fen", help="posição avulsa (sem FEN, roda a suíte de referência)")
+    parser.add_argument("--divide", action="store_true", help="mostra as folhas por lance da raiz")
+    parser.add_argument("--workers", type=int, default=1, help="processos, divididos pela raiz")
+    parser.add_argument("--backend", default="chess", choices=sorted(BACKENDS))
+    args = parser.parse_args(argv)
+
+    if args.fen:
+        board = make_board(args.fen, args.backend)
+        start = time.perf_counter()
+        if args.divide:
+            counts = divide(board, args.depth, args.workers, args.backend)
+            for uci in sorted(counts):
+                print(f"{uci}: {counts[uci]}")
+            nodes = sum(counts.values())
+        else:
+            nodes = run(args.fen, args.depth, args.backend, args.workers)[0]
+        secs = time.perf_counter() - start
+        print(f"perft({args.depth}) = {nodes} em {secs:.2f}s ({nodes / secs if secs else 0:,.0f} folhas/s)")
+        return 0
+
+    failed = 0
+    total_nodes = total_time = 0.0
+    print(f"perft({args.depth}), backend {args.backend}, {args.workers} processo(s)")
+    for res in run_suite(args.depth, args.backend, args.workers):
+        if res["expected"] is None:
+            status = "?"
+        elif res["nodes"] == res["expected"]:
+            status = "ok"
+        else:
+            status = f"ERRO (esperado {res['expected']})"
+            failed += 1
+        total_nodes += res["nodes"]
+        total_time  += res["time"]
+        print(f"  {res['name']:<10} {res['nodes']:>10} {res['time']:7.2f}s {res['nps']:>10,.0f} folhas/s  {status}")
+    print(f"total: {int(total_nodes)} folhas em {total_time:.2f}s "
+          f"({total_nodes / total_time if total_time else 0:,.0f} folhas/s)")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -7,12 +7,17 @@ import chess.pgn
 from config import SAVES_DIR
 
 
+def game_from_board(board, headers):
+    """chess.pgn.Game com os lances de `board` (e FEN/SetUp se a partida não começou na posição inicial)."""
+    game = chess.pgn.Game.from_board(board)
+    for name, value in headers.items():
+        game.headers[name] = value
+    return game
+
+
 def export_pgn(board, game_mode, player_color, clock_config):
     os.makedirs(SAVES_DIR, exist_ok=True)
-    game = chess.pgn.Game()
-    node = game
-    for move in board.move_stack:
-        node = node.add_main_variation(move)
+    game = game_from_board(board, {})
     white_name = "Jogador" if (game_mode == "PvP" or player_color == chess.WHITE) else "IA"
     black_name = "Jogador" if (game_mode == "PvP" or player_color == chess.BLACK) else "IA"
     game.headers["Event"]  = "Chess-AI"
@@ -39,6 +44,14 @@ def list_saves():
     return files[:10]
 
 
+def iter_games(paths):
+    """Partidas dos arquivos `paths`, uma por vez: só a partida atual fica em memória."""
+    for path in paths:
+        with open(path, encoding="utf-8", errors="replace") as f:
+            while (game := chess.pgn.read_game(f)) is not None:
+                yield game
+
+
 def import_pgn(filepath):
     try:
         with open(filepath, encoding="utf-8") as f:
@@ -0,0 +1,709 @@
+"""
+Posição compacta para a busca: bitboards inteiros em `__slots__`, um vetor de
+64 tipos de peça e uma pilha de undo de tuplas pequenas. Gera os próprios lances
+legais (pinos e xeques calculados uma vez por nó) e mantém o hash Zobrist
+polyglot, a chave só dos peões e material + PST incrementais a cada push/pop.
+
+Implementa a parte da interface do chess.Board que a busca usa (mesmos nomes:
+pawns, occupied_co, push, pop, generate_legal_moves, is_check, …) e devolve
+chess.Move — pré-criados e reaproveitados, então gerar um lance não aloca nada.
+Só xadrez padrão, com um rei de cada cor.
+"""
+import chess
+import chess.polyglot
+
+_BB       = chess.BB_SQUARES
+_ALL      = chess.BB_ALL
+_PAWN, _KNIGHT, _BISHOP, _ROOK, _QUEEN, _KING = chess.PIECE_TYPES
+_PROMOTIONS = (chess.QUEEN, chess.ROOK, chess.BISHOP, chess.KNIGHT)  # mesma ordem do python-chess
+
+_KNIGHT_ATTACKS = chess.BB_KNIGHT_ATTACKS
+_KING_ATTACKS   = chess.BB_KING_ATTACKS
+_PAWN_ATTACKS   = chess.BB_PAWN_ATTACKS
+_DIAG_MASKS, _DIAG_ATTACKS = chess.BB_DIAG_MASKS, chess.BB_DIAG_ATTACKS
+_FILE_MASKS, _FILE_ATTACKS = chess.BB_FILE_MASKS, chess.BB_FILE_ATTACKS
+_RANK_MASKS, _RANK_ATTACKS = chess.BB_RANK_MASKS, chess.BB_RANK_ATTACKS
+_BETWEEN = [[chess.between(a, b) for b in chess.SQUARES] for a in chess.SQUARES]
+_LINE    = chess.BB_RAYS  # linha inteira que passa por a e b (0 se não alinhadas)
+
+# Lances pré-criados: _MOVES[de][para] e _PROMO_MOVES[de][para] (Q, R, B, N)
+_MOVES       = [[chess.Move(a, b) for b in chess.SQUARES] for a in chess.SQUARES]
+_PROMO_MOVES = [[tuple(chess.Move(a, b, pt) for pt in _PROMOTIONS) for b in chess.SQUARES]
+                for a in chess.SQUARES]
+_PIECES = [[None] + [chess.Piece(pt, color) for pt in chess.PIECE_TYPES] for color in (chess.BLACK, chess.WHITE)]
+
+# Chaves polyglot: peça (tipo - 1) * 2 + cor, roque 768–771, en passant 772–779, vez 780
+_POLYGLOT = chess.polyglot.POLYGLOT_RANDOM_ARRAY
+_ZKEYS    = [[None] + [_POLYGLOT[64 * ((pt - 1) * 2 + color):64 * ((pt - 1) * 2 + color + 1)]
+                       for pt in chess.PIECE_TYPES] for color in (chess.BLACK, chess.WHITE)]
+_TURN_KEY = _POLYGLOT[780]
+_EP_KEYS  = _POLYGLOT[772:780]
+_CASTLING_CORNERS = ((chess.H1, 768), (chess.A1, 769), (chess.H8, 770), (chess.A8, 771))
+# Direitos de roque que sobrevivem a um lance que toca a casa (rei ou torre saindo, torre capturada)
+_CASTLING_KEEP = [_ALL] * 64
+for _sq, _lost in ((chess.A1, chess.BB_A1), (chess.H1, chess.BB_H1), (chess.E1, chess.BB_A1 | chess.BB_H1),
+                   (chess.A8, chess.BB_A8), (chess.H8, chess.BB_H8), (chess.E8, chess.BB_A8 | chess.BB_H8)):
+    _CASTLING_KEEP[_sq] = _ALL & ~_lost
+
+_NO_PSQT = [[0] * 64 for _ in range(12)]
+
+
+def _castling_key(rights):
+    key = 0
+    for corner, index in _CASTLING_CORNERS:
+        if rights & _BB[corner]:
+            key ^= _POLYGLOT[index]
+    return key
+
+
+class _LegalMoves:
+    """`board.legal_moves` no estilo do python-chess: iterável, com `in` e `count()`."""
+
+    __slots__ = ("_position",)
+
+    def __init__(self, position):
+        self._position = position
+
+    def __iter__(self):
+        return iter(self._position.generate_legal_moves())
+
+    def __len__(self):
+        return len(self._position.generate_legal_moves())
+
+    def __bool__(self):
+        return bool(self._position.generate_legal_moves())
+
+    def __contains__(self, move):
+        return self._position.is_legal(move)
+
+    def count(self):
+        return len(self)
+
+
+class Position:
+    """
+    Posição para a busca. `psqt` (opcional) é uma tabela 12×64 de material + PST
+    em centipawns, índice `tipo - 1` para as brancas e `tipo + 5` para as pretas;
+    `material_pst` é a soma dela sobre as peças, atualizada incrementalmente.
+    """
+
+    __slots__ = ("_bb", "_types", "occupied_co", "occupied", "turn", "castling_rights",
+                 "ep_square", "halfmove_clock", "fullmove_number", "move_stack",
+                 "zobrist", "pawn_key", "material_pst", "_ep_key", "_psqt", "_undo", "_keys",
+                 "_legal", "_legal_key")
+
+    def __init__(self, fen=chess.STARTING_FEN, psqt=None):
+        self._load(chess.Board(fen), psqt)
+
+    @classmethod
+    def from_board(cls, board, psqt=None):
+        position = cls.__new__(cls)
+        position._load(board, psqt)
+        return position
+
+    def _load(self, board, psqt):
+        if psqt is None:
+            psqt = _NO_PSQT
+        self._psqt = ([None] + [psqt[pt + 5] for pt in chess.PIECE_TYPES],
+                      [None] + [psqt[pt - 1] for pt in chess.PIECE_TYPES])
+        self._bb = [0, board.pawns, board.knights, board.bishops, board.rooks, board.queens, board.kings]
+        self._types = [board.piece_type_at(sq) or 0 for sq in chess.SQUARES]
+        self.occupied_co     = [board.occupied_co[chess.BLACK], board.occupied_co[chess.WHITE]]
+        self.occupied        = board.occupied
+        self.turn            = board.turn
+        self.castling_rights = board.clean_castling_rights()
+        self.ep_square       = board.ep_square
+        self.halfmove_clock  = board.halfmove_clock
+        self.fullmove_number = board.fullmove_number
+        self.move_stack      = list(board.move_stack)
+        self._undo           = []
+        self._legal          = None
+        self._legal_key      = None
+        self._reset_incremental()
+        # Hashes das posições anteriores desde o último lance irreversível (repetição)
+        history = board.copy(stack=min(board.halfmove_clock, len(board.move_stack)))
+        keys = []
+        while history.move_stack:
+            history.pop()
+            keys.append(chess.polyglot.zobrist_hash(history))
+        keys.reverse()
+        self._keys = keys
+
+    def _reset_incremental(self):
+        zobrist = pawn_key = material = 0
+        for color in chess.COLORS:
+            occ, keys, rows = self.occupied_co[color], _ZKEYS[color], self._psqt[color]
+            for sq in chess.scan_forward(occ):
+                pt = self._types[sq]
+                zobrist  ^= keys[pt][sq]
+                material += rows[pt][sq]
+                if pt == _PAWN:
+                    pawn_key ^= keys[pt][sq]
+        zobrist ^= _castling_key(self.castling_rights)
+        self._ep_key = self._ep_key_for(self.ep_square, self.turn)
+        zobrist ^= self._ep_key
+        if self.turn == chess.WHITE:
+            zobrist ^= _TURN_KEY
+        self.zobrist, self.pawn_key, self.material_pst = zobrist, pawn_key, material
+
+    def _ep_key_for(self, ep_square, turn):
+        # polyglot: en passant só entra no hash se um peão do lado a jogar pode capturar
+        if ep_square is not None and _PAWN_ATTACKS[not turn][ep_square] & self._bb[_PAWN] & self.occupied_co[turn]:
+            return _EP_KEYS[ep_square & 7]
+        return 0
+
+    def copy(self):
+        position = Position.__new__(type(self))
+        for name in Position.__slots__:
+            setattr(position, name, getattr(self, name))
+        position._bb          = list(self._bb)
+        position._types       = list(self._types)
+        position.occupied_co  = list(self.occupied_co)
+        position.move_stack   = list(self.move_stack)
+        position._undo        = list(self._undo)
+        position._keys        = list(self._keys)
+        return position
+
+    def to_board(self):
+        """chess.Board equivalente (sem o histórico de lances)."""
+        board = chess.Board(None)
+        for color in chess.COLORS:
+            for sq in chess.scan_forward(self.occupied_co[color]):
+                board.set_piece_at(sq, _PIECES[color][self._types[sq]])
+        board.turn            = self.turn
+        board.castling_rights = self.castling_rights
+        board.ep_square       = self.ep_square
+        board.halfmove_clock  = self.halfmove_clock
+        board.fullmove_number = self.fullmove_number
+        return board
+
+    def fen(self):
+        return self.to_board().fen()
+
+    def __repr__(self):
+        return f"{type(self).__name__}({self.fen()!r})"
+
+    # ── Consultas no estilo do chess.Board ───────────────────────────────────
+
+    pawns   = property(lambda self: self._bb[_PAWN])
+    knights = property(lambda self: self._bb[_KNIGHT])
+    bishops = property(lambda self: self._bb[_BISHOP])
+    rooks   = property(lambda self: self._bb[_ROOK])
+    queens  = property(lambda self: self._bb[_QUEEN])
+    kings   = property(lambda self: self._bb[_KING])
+
+    @property
+    def legal_moves(self):
+        return _LegalMoves(self)
+
+    def clean_castling_rights(self):
+        return self.castling_rights
+
+    def has_kingside_castling_rights(self, color):
+        return bool(self.castling_rights & (chess.BB_H1 if color == chess.WHITE else chess.BB_H8))
+
+    def has_queenside_castling_rights(self, color):
+        return bool(self.castling_rights & (chess.BB_A1 if color == chess.WHITE else chess.BB_A8))
+
+    def piece_type_at(self, square):
+        return self._types[square] or None
+
+    def piece_at(self, square):
+        pt = self._types[square]
+        if not pt:
+            return None
+        return _PIECES[bool(self.occupied_co[chess.WHITE] & _BB[square])][pt]
+
+    def pieces_mask(self, piece_type, color):
+        return self._bb[piece_type] & self.occupied_co[color]
+
+    def pieces(self, piece_type, color):
+        return chess.SquareSet(self._bb[piece_type] & self.occupied_co[color])
+
+    def king(self, color):
+        mask = self._bb[_KING] & self.occupied_co[color]
+        return mask.bit_length() - 1 if mask else None
+
+    def peek(self):
+        return self.move_stack[-1]
+
+    def attacks_mask(self, square):
+        pt = self._types[square]
+        if pt == _PAWN:
+            return _PAWN_ATTACKS[bool(self.occupied_co[chess.WHITE] & _BB[square])][square]
+        if pt == _KNIGHT:
+            return _KNIGHT_ATTACKS[square]
+        if pt == _KING:
+            return _KING_ATTACKS[square]
+        occ     = self.occupied
+        attacks = 0
+        if pt == _BISHOP or pt == _QUEEN:
+            attacks = _DIAG_ATTACKS[square][_DIAG_MASKS[square] & occ]
+        if pt == _ROOK or pt == _QUEEN:
+            attacks |= (_RANK_ATTACKS[square][_RANK_MASKS[square] & occ]
+                        | _FILE_ATTACKS[square][_FILE_MASKS[square] & occ])
+        return attacks
+
+    def attackers_mask(self, color, square, occupied=None):
+        """Peças de `color` que atacam `square` (com `occupied` no lugar da ocupação real, se dado)."""
+        if occupied is None:
+            occupied = self.occupied
+        bb = self._bb
+        rooks_queens   = bb[_ROOK] | bb[_QUEEN]
+        bishops_queens = bb[_BISHOP] | bb[_QUEEN]
+        return self.occupied_co[color] & (
+            (_KING_ATTACKS[square] & bb[_KING])
+            | (_KNIGHT_ATTACKS[square] & bb[_KNIGHT])
+            | (_PAWN_ATTACKS[not color][square] & bb[_PAWN])
+            | (_RANK_ATTACKS[square][_RANK_MASKS[square] & occupied] & rooks_queens)
+            | (_FILE_ATTACKS[square][_FILE_MASKS[square] & occupied] & rooks_queens)
+            | (_DIAG_ATTACKS[square][_DIAG_MASKS[square] & occupied] & bishops_queens)
+        )
+
+    def attackers(self, color, square):
+        return chess.SquareSet(self.attackers_mask(color, square))
+
+    def is_attacked_by(self, color, square):
+        return bool(self.attackers_mask(color, square))
+
+    def is_check(self):
+        king = self._bb[_KING] & self.occupied_co[self.turn]
+        return bool(king and self.attackers_mask(not self.turn, king.bit_length() - 1))
+
+    def is_capture(self, move):
+        return bool(_BB[move.to_square] & self.occupied_co[not self.turn]) or self.is_en_passant(move)
+
+    def is_en_passant(self, move):
+        return (move.to_square == self.ep_square and self._types[move.from_square] == _PAWN
+                and abs(move.to_square - move.from_square) in (7, 9))
+
+    def is_castling(self, move):
+        return self._types[move.from_square] == _KING and abs(move.to_square - move.from_square) == 2
+
+    def is_legal(self, move):
+        if not move or not self.occupied_co[self.turn] & _BB[move.from_square]:
+            return False
+        return move in self.generate_legal_moves(_BB[move.from_square], _BB[move.to_square])
+
+    def is_checkmate(self):
+        return self.is_check() and not self.has_legal_moves()
+
+    def is_stalemate(self):
+        return not self.is_check() and not self.has_legal_moves()
+
+    def has_insufficient_material(self, color):
+        # mesma regra do chess.Board.has_insufficient_material
+        bb, ours = self._bb, self.occupied_co[color]
+        if ours & (bb[_PAWN] | bb[_ROOK] | bb[_QUEEN]):
+            return False
+        if ours & bb[_KNIGHT]:
+            return (chess.popcount(ours) <= 2
+                    and not (self.occupied_co[not color] & ~bb[_KING] & ~bb[_QUEEN]))
+        if ours & bb[_BISHOP]:
+            same_color = (not bb[_BISHOP] & chess.BB_DARK_SQUARES) or (not bb[_BISHOP] & chess.BB_LIGHT_SQUARES)
+            return same_color and not bb[_PAWN] and not bb[_KNIGHT]
+        return True
+
+    def is_insufficient_material(self):
+        return self.has_insufficient_material(chess.WHITE) and self.has_insufficient_material(chess.BLACK)
+
+    def repetition_count(self, limit=3):
+        """Quantas vezes a posição atual já ocorreu (contando a atual), parando em `limit`."""
+        keys    = self._keys
+        zobrist = self.zobrist
+        found   = 1
+        # só posições com o mesmo lado a jogar, e nenhuma antes do último lance irreversível
+        for i in range(len(keys) - 2, max(len(keys) - self.halfmove_clock, 0) - 1, -2):
+            if keys[i] == zobrist:
+                found += 1
+                if found >= limit:
+                    break
+        return found
+
+    def is_repetition(self, count=3):
+        """True se a posição atual já ocorreu `count` vezes (contando a atual), pelo histórico de hashes."""
+        return self.repetition_count(count) >= count
+
+    def is_game_over(self):
+        # mesmas condições de chess.Board.is_game_over() sem claim_draw
+        return (not self.has_legal_moves() or self.is_insufficient_material()
+                or self.halfmove_clock >= 150 or self.is_repetition(5))
+
+    # ── Geração de lances ────────────────────────────────────────────────────
+
+    def generate_legal_captures(self, from_mask=_ALL, to_mask=_ALL):
+        moves = self.generate_legal_moves(from_mask, to_mask & self.occupied_co[not self.turn])
+        ep = self.ep_square
+        if ep is not None and to_mask & _BB[ep]:
+            moves += self._en_passant_moves(from_mask)
+        return moves
+
+    def generate_legal_moves(self, from_mask=_ALL, to_mask=_ALL):
+        """Lista dos lances legais com origem em `from_mask` e destino em `to_mask`."""
+        if from_mask == _ALL and to_mask == _ALL:
+            # fim de jogo, avaliação e busca pedem a lista completa do mesmo nó: gera uma vez
+            if self._legal_key != self.zobrist:
+                self._legal     = self._generate(_ALL, _ALL)
+                self._legal_key = self.zobrist
+            return list(self._legal)
+        return self._generate(from_mask, to_mask)
+
+    def _generate(self, from_mask, to_mask):
+        us       = self.turn
+        them     = not us
+        bb       = self._bb
+        occupied = self.occupied
+        ours     = self.occupied_co[us]
+        theirs   = self.occupied_co[them]
+        king_bb  = bb[_KING] & ours
+        king     = king_bb.bit_length() - 1
+        checkers = self.attackers_mask(them, king)
+        moves    = []
+        append   = moves.append
+
+        # Rei: casas não atacadas, com o próprio rei fora da ocupação (não se esconde atrás de si)
+        if king_bb & from_mask:
+            targets = _KING_ATTACKS[king] & ~ours & to_mask
+            without_king = occupied ^ king_bb
+            while targets:
+                to = targets.bit_length() - 1
+                targets ^= _BB[to]
+                if not self.attackers_mask(them, to, without_king):
+                    append(_MOVES[king][to])
+        if checkers & (checkers - 1):
+            return moves  # xeque duplo: só o rei
+
+        # Peças cravadas só andam na linha rei–atacante
+        pinned  = self._pinned(king, ours, theirs)
+        between = _BETWEEN[king]
+        if checkers:
+            checker = checkers.bit_length() - 1
+            target  = (between[checker] | checkers) & to_mask
+        else:
+            target  = ~ours & to_mask
+        line = _LINE[king]
+
+        pieces = ours & ~bb[_PAWN] & ~king_bb & from_mask
+        types  = self._types
+        while pieces:
+            sq = pieces.bit_length() - 1
+            pieces ^= _BB[sq]
+            pt = types[sq]
+            if pt == _KNIGHT:
+                if pinned & _BB[sq]:
+                    continue  # cavalo cravado nunca sai da linha
+                targets = _KNIGHT_ATTACKS[sq] & target
+            else:
+                targets = 0
+                if pt != _ROOK:
+                    targets = _DIAG_ATTACKS[sq][_DIAG_MASKS[sq] & occupied]
+                if pt != _BISHOP:
+                    targets |= (_RANK_ATTACKS[sq][_RANK_MASKS[sq] & occupied]
+                                | _FILE_ATTACKS[sq][_FILE_MASKS[sq] & occupied])
+                targets &= target
+                if pinned & _BB[sq]:
+                    targets &= line[sq]
+            row = _MOVES[sq]
+            while targets:
+                to = targets.bit_length() - 1
+                targets ^= _BB[to]
+                append(row[to])
+
+        if not checkers and self.castling_rights & ours and king_bb & from_mask:
+            self._castling_moves(king, to_mask, moves)
+
+        pawns = bb[_PAWN] & ours & from_mask
+        if pawns:
+            self._pawn_moves(pawns, king, pinned, target, moves)
+            ep = self.ep_square
+            if ep is not None and to_mask & _BB[ep]:
+                moves += self._en_passant_moves(from_mask)
+        return moves
+
+    def _pinned(self, king, ours, theirs):
+        bb       = self._bb
+        occupied = self.occupied
+        rooks_queens   = (bb[_ROOK] | bb[_QUEEN]) & theirs
+        bishops_queens = (bb[_BISHOP] | bb[_QUEEN]) & theirs
+        snipers = ((_RANK_ATTACKS[king][0] | _FILE_ATTACKS[king][0]) & rooks_queens
+                   | _DIAG_ATTACKS[king][0] & bishops_queens)
+        pinned  = 0
+        between = _BETWEEN[king]
+        while snipers:
+            sniper = snipers.bit_length() - 1
+            snipers ^= _BB[sniper]
+            blockers = between[sniper] & occupied
+            if blockers and not blockers & (blockers - 1) and blockers & ours:
+                pinned |= blockers
+        return pinned
+
+    def has_legal_moves(self):
+        """
+        Se o lado a jogar tem algum lance legal. Fora de xeque, qualquer peça não
+        cravada (fora o rei) com um destino já é um lance legal, então mate e
+        afogamento quase nunca pedem a lista completa; só nos casos restantes ela
+        é gerada (e fica no cache do nó).
+        """
+        if self._legal_key == self.zobrist:
+            return bool(self._legal)
+        us       = self.turn
+        bb       = self._bb
+        occupied = self.occupied
+        ours     = self.occupied_co[us]
+        theirs   = self.occupied_co[not us]
+        king     = (bb[_KING] & ours).bit_length() - 1
+        if not self.attackers_mask(not us, king):
+            free  = ours & ~self._pinned(king, ours, theirs)
+            pawns = bb[_PAWN] & free
+            if us == chess.WHITE:
+                pushes = (pawns << 8) & ~occupied
+            else:
+                pushes = (pawns >> 8) & ~occupied
+            if pushes:
+                return True
+            pieces = free & ~bb[_PAWN] & ~bb[_KING]
+            types  = self._types
+            while pieces:
+                sq = pieces.bit_length() - 1
+                pieces ^= _BB[sq]
+                pt = types[sq]
+                if pt == _KNIGHT:
+                    targets = _KNIGHT_ATTACKS[sq]
+                else:
+                    targets = 0
+                    if pt != _ROOK:
+                        targets = _DIAG_ATTACKS[sq][_DIAG_MASKS[sq] & occupied]
+                    if pt != _BISHOP:
+                        targets |= (_RANK_ATTACKS[sq][_RANK_MASKS[sq] & occupied]
+                                    | _FILE_ATTACKS[sq][_FILE_MASKS[sq] & occupied])
+                if targets & ~ours:
+                    return True
+            attacks = _PAWN_ATTACKS[us]
+            while pawns:
+                sq = pawns.bit_length() - 1
+                pawns ^= _BB[sq]
+                if attacks[sq] & theirs:
+                    return True
+        return bool(self.generate_legal_moves())
+
+    def _castling_moves(self, king, to_mask, moves):
+        rights   = self.castling_rights
+        occupied = self.occupied
+        them     = not self.turn
+        if rights & _BB[king + 3] and to_mask & _BB[king + 2] and not occupied & (_BB[king + 1] | _BB[king + 2]) \
+                and not self.attackers_mask(them, king + 1) and not self.attackers_mask(them, king + 2):
+            moves.append(_MOVES[king][king + 2])
+        if rights & _BB[king - 4] and to_mask & _BB[king - 2] \
+                and not occupied & (_BB[king - 1] | _BB[king - 2] | _BB[king - 3]) \
+                and not self.attackers_mask(them, king - 1) and not self.attackers_mask(them, king - 2):
+            moves.append(_MOVES[king][king - 2])
+
+    def _pawn_moves(self, pawns, king, pinned, target, moves):
+        us       = self.turn
+        empty    = ~self.occupied
+        theirs   = self.occupied_co[not us]
+        attacks  = _PAWN_ATTACKS[us]
+        line     = _LINE[king]
+        last     = chess.BB_RANK_8 if us == chess.WHITE else chess.BB_RANK_1
+        append   = moves.append
+
+        captures = pawns
+        while captures:
+            sq = captures.bit_length() - 1
+            captures ^= _BB[sq]
+            targets = attacks[sq] & theirs & target
+            if pinned & _BB[sq]:
+                targets &= line[sq]
+            while targets:
+                to = targets.bit_length() - 1
+                targets ^= _BB[to]
+                if _BB[to] & last:
+                    moves.extend(_PROMO_MOVES[sq][to])
+                else:
+                    append(_MOVES[sq][to])
+
+        if us == chess.WHITE:
+            single = (pawns << 8) & empty
+            double = ((single & chess.BB_RANK_3) << 8) & empty
+            step   = 8
+        else:
+            single = (pawns >> 8) & empty
+            double = ((single & chess.BB_RANK_6) >> 8) & empty
+            step   = -8
+        for pushes, delta in ((single & target, step), (double & target, 2 * step)):
+            while pushes:
+                to = pushes.bit_length() - 1
+                pushes ^= _BB[to]
+                sq = to - delta
+                if pinned & _BB[sq] and not line[sq] & _BB[to]:
+                    continue
+                if _BB[to] & last:
+                    moves.extend(_PROMO_MOVES[sq][to])
+                else:
+                    append(_MOVES[sq][to])
+
+    def _en_passant_moves(self, from_mask):
+        us  = self.turn
+        ep  = self.ep_square
+        bb  = self._bb
+        capturers = _PAWN_ATTACKS[not us][ep] & bb[_PAWN] & self.occupied_co[us] & from_mask
+        if not capturers:
+            return []
+        captured = ep ^ 8
+        king     = (bb[_KING] & self.occupied_co[us]).bit_length() - 1
+        them     = self.occupied_co[not us]
+        moves    = []
+        while capturers:
+            sq = capturers.bit_length() - 1
+            capturers ^= _BB[sq]
+            # simula a captura: some o peão capturado e o que captura sai da casa de origem
+            occupied = (self.occupied & ~_BB[sq] & ~_BB[captured]) | _BB[ep]
+            attackers = them & ~_BB[captured] & (
+                (_KNIGHT_ATTACKS[king] & bb[_KNIGHT])
+                | (_PAWN_ATTACKS[us][king] & bb[_PAWN])
+                | (_RANK_ATTACKS[king][_RANK_MASKS[king] & occupied] & (bb[_ROOK] | bb[_QUEEN]))
+                | (_FILE_ATTACKS[king][_FILE_MASKS[king] & occupied] & (bb[_ROOK] | bb[_QUEEN]))
+                | (_DIAG_ATTACKS[king][_DIAG_MASKS[king] & occupied] & (bb[_BISHOP] | bb[_QUEEN]))
+            )
+            if not attackers:
+                moves.append(_MOVES[sq][ep])
+        return moves
+
+    # ── Make / unmake ────────────────────────────────────────────────────────
+
+    def push(self, move):
+        us        = self.turn
+        them      = not us
+        zobrist   = self.zobrist
+        ep_square = self.ep_square
+        captured  = self._types[move.to_square] if move else 0
+        self._undo.append((move, captured, self.castling_rights, ep_square, self._ep_key,
+                           self.halfmove_clock, self.fullmove_number, zobrist,
+                           self.pawn_key, self.material_pst))
+        self._keys.append(zobrist)
+        self.move_stack.append(move)
+        zobrist ^= _TURN_KEY ^ self._ep_key
+        if us == chess.BLACK:
+            self.fullmove_number += 1
+        self.turn      = them
+        self.ep_square = None
+        self._ep_key   = 0
+        if not move:
+            self.halfmove_clock += 1
+            self.zobrist = zobrist
+            return
+
+        bb, types, occ_co = self._bb, self._types, self.occupied_co
+        keys, rows = _ZKEYS[us], self._psqt[us]
+        frm, to    = move.from_square, move.to_square
+        from_bb, to_bb = _BB[frm], _BB[to]
+        pt         = types[frm]
+        pawn_key   = self.pawn_key
+        material   = self.material_pst
+        halfmove   = self.halfmove_clock + 1
+
+        if captured:
+            bb[captured] ^= to_bb
+            occ_co[them] ^= to_bb
+            key       = _ZKEYS[them][captured][to]
+            zobrist  ^= key
+            material -= self._psqt[them][captured][to]
+            if captured == _PAWN:
+                pawn_key ^= key
+            halfmove = 0
+
+        bb[pt]     ^= from_bb | to_bb
+        occ_co[us] ^= from_bb | to_bb
+        types[frm]  = 0
+        types[to]   = pt
+        row         = keys[pt]
+        zobrist    ^= row[frm] ^ row[to]
+        material   += rows[pt][to] - rows[pt][frm]
+
+        if pt == _PAWN:
+            halfmove  = 0
+            pawn_key ^= row[frm] ^ row[to]
+            promotion = move.promotion
+            if promotion:
+                bb[_PAWN]     ^= to_bb
+                bb[promotion] ^= to_bb
+                types[to]      = promotion
+                zobrist  ^= row[to] ^ keys[promotion][to]
+                pawn_key ^= row[to]
+                material += rows[promotion][to] - rows[_PAWN][to]
+            elif to == ep_square:
+                # en passant: o peão capturado está atrás da casa de destino
+                square = to ^ 8
+                bb[_PAWN]    ^= _BB[square]
+                occ_co[them] ^= _BB[square]
+                types[square] = 0
+                key       = _ZKEYS[them][_PAWN][square]
+                zobrist  ^= key
+                pawn_key ^= key
+                material -= self._psqt[them][_PAWN][square]
+            elif to - frm == 16 or frm - to == 16:
+                self.ep_square = (frm + to) >> 1
+                self._ep_key   = self._ep_key_for(self.ep_square, them)
+                zobrist ^= self._ep_key
+        elif pt == _KING and (to - frm == 2 or frm - to == 2):
+            rook_from, rook_to = (frm + 3, frm + 1) if to > frm else (frm - 4, frm - 1)
+            mask = _BB[rook_from] | _BB[rook_to]
+            bb[_ROOK]  ^= mask
+            occ_co[us] ^= mask
+            types[rook_from] = 0
+            types[rook_to]   = _ROOK
+            zobrist  ^= keys[_ROOK][rook_from] ^ keys[_ROOK][rook_to]
+            material += rows[_ROOK][rook_to] - rows[_ROOK][rook_from]
+
+        rights = self.castling_rights
+        if rights:
+            new_rights = rights & _CASTLING_KEEP[frm] & _CASTLING_KEEP[to]
+            if new_rights != rights:
+                zobrist ^= _castling_key(rights) ^ _castling_key(new_rights)
+                self.castling_rights = new_rights
+
+        self.occupied       = occ_co[0] | occ_co[1]
+        self.halfmove_clock = halfmove
+        self.zobrist        = zobrist
+        self.pawn_key       = pawn_key
+        self.material_pst   = material
+
+    def pop(self):
+        (move, captured, self.castling_rights, ep_square, self._ep_key, self.halfmove_clock,
+         self.fullmove_number, self.zobrist, self.pawn_key, self.material_pst) = self._undo.pop()
+        self._keys.pop()
+        self.move_stack.pop()
+        self.ep_square = ep_square
+        us = self.turn = not self.turn
+        if not move:
+            return move
+
+        bb, types, occ_co = self._bb, self._types, self.occupied_co
+        frm, to = move.from_square, move.to_square
+        from_bb, to_bb = _BB[frm], _BB[to]
+        pt = types[to]
+        if move.promotion:
+            bb[pt]    ^= to_bb
+            bb[_PAWN] ^= to_bb
+            pt = _PAWN
+        bb[pt]     ^= from_bb | to_bb
+        occ_co[us] ^= from_bb | to_bb
+        types[frm]  = pt
+        types[to]   = captured
+        if captured:
+            bb[captured]    ^= to_bb
+            occ_co[not us]  ^= to_bb
+        elif pt == _PAWN and to == ep_square:
+            square = to ^ 8
+            bb[_PAWN]      ^= _BB[square]
+            occ_co[not us] ^= _BB[square]
+            types[square]   = _PAWN
+        elif pt == _KING and (to - frm == 2 or frm - to == 2):
+            rook_from, rook_to = (frm + 3, frm + 1) if to > frm else (frm - 4, frm - 1)
+            mask = _BB[rook_from] | _BB[rook_to]
+            bb[_ROOK]  ^= mask
+            occ_co[us] ^= mask
+            types[rook_from] = _ROOK
+            types[rook_to]   = 0
+        self.occupied = occ_co[0] | occ_co[1]
+        return move
@@ -3,15 +3,26 @@ import pygame
 import time
 
 from config import (
-    BOARD_RECT, HISTORY_RECT, ACTION_PANEL_RECT, PAUSE_BTN,
+    BOARD_SIZE, HISTORY_WIDTH, GAME_HEIGHT, ACTION_PANEL_HEIGHT, PAUSE_BTN_SIZE,
     COLOR_LIGHT, COLOR_DARK, COLOR_PIECE_BLACK,
     COLOR_HIGHLIGHT, COLOR_LAST_MOVE, COLOR_MOVE_HINT, COLOR_CAPTURE_HINT, COLOR_CHECK_HINT,
     COLOR_MENU_BG, COLOR_MENU_TEXT, COLOR_COORD,
     PIECE_SYMBOLS, ANIM_DURATION, SQUARE_SIZE, ROWS, COLS,
-    PADDING, INFO_HEIGHT, DIFFICULTY_LEVELS, DEFAULT_TIME_LIMIT,
-    GAME_HEIGHT, format_clock,
+    PADDING, INFO_HEIGHT, DIFFICULTY_LEVELS, DEFAULT_DIFFICULTY,
+    format_clock,
 )
 
+# Retângulos do layout: ficam aqui e não em config.py para que config (e a IA)
+# possam ser importados sem pygame.
+BOARD_RECT         = pygame.Rect(PADDING, INFO_HEIGHT, BOARD_SIZE, BOARD_SIZE)
+HISTORY_RECT       = pygame.Rect(BOARD_RECT.right, INFO_HEIGHT, HISTORY_WIDTH,
+                                  GAME_HEIGHT - INFO_HEIGHT - ACTION_PANEL_HEIGHT)
+ACTION_PANEL_RECT  = pygame.Rect(BOARD_RECT.right, HISTORY_RECT.bottom,
+                                  HISTORY_WIDTH, ACTION_PANEL_HEIGHT)
+PAUSE_BTN          = pygame.Rect(BOARD_RECT.centerx - PAUSE_BTN_SIZE // 2,
+                                  (INFO_HEIGHT - PAUSE_BTN_SIZE) // 2,
+                                  PAUSE_BTN_SIZE, PAUSE_BTN_SIZE)
+
 
 def draw_text(screen, text, font, color, rect, align="left"):
     text_surface = font.render(text, True, color)
@@ -204,7 +215,7 @@ def draw_game_over_popup(screen, font_main, font_sub, message, btn_see, btn_agai
     draw_text(screen, "Ir para o Menu", font_sub, COLOR_MENU_TEXT, btn_again, "center")
 
 
-def draw_pause_menu(screen, font_title, font_btn, page="main", current_time_limit=DEFAULT_TIME_LIMIT):
+def draw_pause_menu(screen, font_title, font_btn, page="main", current_difficulty=DEFAULT_DIFFICULTY):
     overlay = pygame.Surface(screen.get_size(), pygame.SRCALPHA)
     overlay.fill((0, 0, 0, 180))
     screen.blit(overlay, (0, 0))
@@ -219,9 +230,9 @@ def draw_pause_menu(screen, font_title, font_btn, page="main", current_time_limi
                   pygame.Rect(pop_r.x, pop_r.y + 10, pop_r.width, 50), "center")
         btn_y0 = pop_r.y + 70
         btns   = []
-        for i, (label, tlimit) in enumerate(DIFFICULTY_LEVELS):
+        for i, (label, budget) in enumerate(DIFFICULTY_LEVELS):
             btn       = pygame.Rect(btn_x, btn_y0 + i * (btn_h + btn_gap), btn_w, btn_h)
-            is_active = tlimit == current_time_limit
+            is_active = budget == current_difficulty
             bg        = (180, 130, 40) if is_active else COLOR_DARK
             pygame.draw.rect(screen, bg, btn)
             if is_active:
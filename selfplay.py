@@ -0,0 +1,388 @@
+"""
+Partidas da IA contra ela mesma entre duas configurações de find_best_ai_move,
+para saber se uma mudança (ou um ganho de NPS) vira força de verdade.
+
+Cada configuração é uma lista `nome=valor`: `time_limit`, `max_nodes` e
+`max_depth` vão para find_best_ai_move; qualquer outro nome é um atributo do
+módulo ai (`_NMP_REDUCTION=3`, `_MOBILITY_MODE=legal`, `TT_SIZE_MB=64`...),
+trocado só durante os lances daquela configuração. Cada lado tem a própria TT,
+killers, history e pawn hash.
+
+As aberturas (as linhas do livro embutido ou um arquivo EPD/PGN) são jogadas
+duas vezes, com as cores trocadas, e os livros ficam desligados depois delas.
+As partidas rodam num pool com um processo por núcleo; partidas decididas
+(as duas configurações concordando num valor grande, ou num valor perto de
+zero por muitos lances) são adjudicadas. O resultado é o Elo de `test` contra
+`base` com intervalo de 95% e, a cada partida, o SPRT (Elo0 contra Elo1), que
+encerra o match assim que uma das hipóteses é aceita.
+
+    python selfplay.py --base max_nodes=3000 --test max_nodes=3000 _MOBILITY_MODE=legal
+    python selfplay.py --base time_limit=0.2 --test time_limit=0.1 --games 400 --pgn match.pgn
+    python selfplay.py --base max_depth=3 --test max_depth=4 --elo0 0 --elo1 50 --openings bench.epd
+"""
+import argparse
+import ast
+import contextlib
+import datetime
+import math
+import multiprocessing
+import os
+import sys
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+
+import chess
+import chess.pgn
+
+import ai
+from pgn_utils import game_from_board
+
+_SEARCH_ARGS  = {"time_limit", "max_nodes", "max_depth"}           # vão para find_best_ai_move
+_SEARCH_STATE = ("_tt", "_killers", "_history", "_pawn_hash")    # estado próprio de cada lado
+
+# Adjudicação (valores em peões, do ponto de vista das brancas)
+_RESIGN_SCORE = 6.0   # as duas configurações veem pelo menos isso...
+_RESIGN_PLIES = 6     # ...nos últimos meios-lances: vitória
+_DRAW_SCORE   = 0.1   # |valor| até isso...
+_DRAW_PLIES   = 16    # ...nos últimos meios-lances, depois de _DRAW_MIN_PLY: empate
+_DRAW_MIN_PLY = 60
+_MAX_PLY      = 400   # partida longa demais: empate
+
+_REPORT_EVERY = 20    # partidas entre duas linhas de progresso
+
+
+def parse_config(tokens):
+    """({argumentos de find_best_ai_move}, {atributos do ai}) de uma lista `nome=valor`."""
+    search, overrides = {}, {}
+    for token in tokens:
+        name, sep, text = token.partition("=")
+        if not sep:
+            raise ValueError(f"esperado nome=valor: {token}")
+        try:
+            value = ast.literal_eval(text)
+        except (ValueError, SyntaxError):
+            value = text  # texto sem aspas: _MOBILITY_MODE=legal
+        if name in _SEARCH_ARGS:
+            search[name] = value
+        elif hasattr(ai, name):
+            overrides[name] = value
+        else:
+            raise ValueError(f"ai não tem o atributo {name}")
+    if not search:
+        raise ValueError("a configuração precisa de time_limit, max_nodes ou max_depth")
+    return search, overrides
+
+
+def default_openings():
+    """Posições finais das linhas do livro embutido, sem repetir, em ordem de aparição."""
+    seen, openings = set(), []
+    for line in ai._OPENING_LINES:
+        board = chess.Board()
+        for uci in line:
+            board.push_uci(uci)
+        if board.fen() not in seen:
+            seen.add(board.fen())
+            openings.append(board)
+    return openings
+
+
+def load_openings(path):
+    """Aberturas de um arquivo: PGN (a linha principal de cada partida) ou uma FEN/EPD por linha."""
+    openings = []
+    with open(path, encoding="utf-8") as f:
+        if path.lower().endswith(".pgn"):
+            while (game := chess.pgn.read_game(f)) is not None:
+                openings.append(game.end().board())
+        else:
+            for line in f:
+                line = line.strip()
+                if not line or line.startswith("#"):
+                    continue
+                try:
+                    openings.append(chess.Board(line))
+                except ValueError:
+                    openings.append(chess.Board.from_epd(line)[0])
+    return openings
+
+
+def adjudicate(scores, ply):
+    """
+    Resultado adjudicado ("1-0", "0-1", "1/2-1/2") pelas avaliações `scores`
+    (brancas, um valor por meio-lance, None para lances sem busca), ou None.
+    """
+    if ply >= _MAX_PLY:
+        return "1/2-1/2"
+    recent = scores[-_RESIGN_PLIES:]
+    if len(recent) == _RESIGN_PLIES and None not in recent:
+        if all(s >= _RESIGN_SCORE for s in recent):
+            return "1-0"
+        if all(s <= -_RESIGN_SCORE for s in recent):
+            return "0-1"
+    recent = scores[-_DRAW_PLIES:]
+    if (ply >= _DRAW_MIN_PLY and len(recent) == _DRAW_PLIES and None not in recent
+            and all(abs(s) <= _DRAW_SCORE for s in recent)):
+        return "1/2-1/2"
+    return None
+
+
+class _Player:
+    """Uma configuração em jogo: argumentos da busca, atributos trocados no ai e estado da busca."""
+
+    def __init__(self, config):
+        self.search, self.overrides = config
+        self.state = None
+        self.nodes = 0
+        self.time  = 0.0
+
+    @contextlib.contextmanager
+    def active(self):
+        saved = {name: getattr(ai, name) for name in (*self.overrides, *_SEARCH_STATE)}
+        try:
+            for name, value in self.overrides.items():
+                setattr(ai, name, value)
+            if self.state is None:  # criado já com os atributos da configuração (TT_SIZE_MB...)
+                self.state = {"_tt": ai.TranspositionTable(ai.TT_SIZE_MB), "_killers": {}, "_history": {},
+                              "_pawn_hash": ai._PawnHashTable(ai._PAWN_HASH_SIZE)}
+            for name, value in self.state.items():
+                setattr(ai, name, value)
+            yield
+        finally:
+            for name, value in saved.items():
+                setattr(ai, name, value)
+
+    def move(self, board, seed):
+        with self.active():
+            move, info = ai.find_best_ai_move(board, workers=1, with_info=True, seed=seed, book=False,
+                                              **self.search)
+        self.nodes += info.nodes
+        self.time  += info.elapsed
+        return move, info.score
+
+
+def play_game(opening_fen, opening_moves, white, black, seed, adjudication=True):
+    """
+    Joga uma partida a partir da abertura (FEN + lances em UCI) entre as
+    configurações `white` e `black` (saídas de parse_config). Retorna um
+    dicionário com lances, resultado, motivo ("normal" ou "adjudication", como
+    no cabeçalho Termination do PGN) e nós/tempo de cada lado.
+    """
+    board = chess.Board(opening_fen)
+    for uci in opening_moves:
+        board.push_uci(uci)
+    players = {chess.WHITE: _Player(white), chess.BLACK: _Player(black)}
+    scores  = []
+    result  = termination = None
+    while result is None:
+        outcome = board.outcome(claim_draw=True)
+        if outcome is not None:
+            result, termination = outcome.result(), "normal"
+            break
+        move, score = players[board.turn].move(board, seed + board.ply())
+        board.push(move)
+        scores.append(score)
+        if adjudication:
+            result = adjudicate(scores, board.ply())
+            termination = "adjudication" if result else None
+    return {
+        "moves": [move.uci() for move in board.move_stack],
+        "result": result,
+        "termination": termination,
+        "plies": len(scores),
+        "nodes": {"white": players[chess.WHITE].nodes, "black": players[chess.BLACK].nodes},
+        "time": {"white": players[chess.WHITE].time, "black": players[chess.BLACK].time},
+    }
+
+
+def _expected(elo):
+    return 1.0 / (1.0 + 10.0 ** (-elo / 400.0))
+
+
+def _elo(score):
+    if score <= 0.0:
+        return -math.inf
+    if score >= 1.0:
+        return math.inf
+    return -400.0 * math.log10(1.0 / score - 1.0)
+
+
+def _score_variance(wins, draws, losses):
+    """(pontuação média, variância de uma partida) de `wins`/`draws`/`losses`."""
+    n = wins + draws + losses
+    p = (wins + 0.5 * draws) / n
+    return p, (wins * (1 - p) ** 2 + draws * (0.5 - p) ** 2 + losses * p ** 2) / n
+
+
+def elo_interval(wins, draws, losses):
+    """(Elo, margem de 95%) de quem fez `wins`/`draws`/`losses`."""
+    n = wins + draws + losses
+    if n == 0:
+        return 0.0, math.inf
+    p, var = _score_variance(wins, draws, losses)
+    margin = 1.96 * math.sqrt(var / n)
+    return _elo(p), (_elo(min(p + margin, 1.0)) - _elo(max(p - margin, 0.0))) / 2
+
+
+def sprt_llr(wins, draws, losses, elo0, elo1):
+    """Log da razão de verossimilhança de H1 (Elo = elo1) contra H0 (Elo = elo0), aproximação normal."""
+    n = wins + draws + losses
+    if n == 0:
+        return 0.0
+    p, var = _score_variance(wins, draws, losses)
+    if var == 0.0:
+        return 0.0
+    s0, s1 = _expected(elo0), _expected(elo1)
+    return n * (s1 - s0) * (2 * p - s0 - s1) / (2 * var)
+
+
+def sprt_bounds(alpha, beta):
+    """(limite inferior, limite superior) do LLR: abaixo aceita H0, acima aceita H1."""
+    return math.log(beta / (1 - alpha)), math.log((1 - beta) / alpha)
+
+
+def _pgn_headers(number, white, black, spec, result, termination):
+    return {
+        "Event": "Chess-AI self-play", "Site": "Local",
+        "Date": datetime.date.today().strftime("%Y.%m.%d"), "Round": str(number),
+        "White": f"{white} ({spec[white]})", "Black": f"{black} ({spec[black]})",
+        "Result": result, "Termination": termination,
+    }
+
+
+def run(base, test, games=1000, openings=None, workers=None, pgn_path=None, elo0=0.0, elo1=5.0,
+        alpha=0.05, beta=0.05, adjudication=True, seed=0, report=None):
+    """
+    Match de até `games` partidas entre `base` e `test` (saídas de parse_config).
+    Para antes se o SPRT aceitar uma das hipóteses. Grava as partidas em
+    `pgn_path` à medida que terminam e chama `report(stats)` a cada partida.
+    Retorna as estatísticas do ponto de vista de `test`.
+    """
+    openings = openings or default_openings()
+    workers  = workers or os.cpu_count() or 1
+    configs  = {"base": base, "test": test}
+    spec     = {name: " ".join(f"{k}={v}" for k, v in {**cfg[0], **cfg[1]}.items())
+                for name, cfg in configs.items()}
+    lower, upper = sprt_bounds(alpha, beta)
+    stats = {"games": 0, "wins": 0, "draws": 0, "losses": 0, "adjudicated": 0, "llr": 0.0,
+             "bounds": (lower, upper), "verdict": None, "elo": 0.0, "margin": math.inf,
+             "nodes": {"base": 0, "test": 0}, "time": {"base": 0.0, "test": 0.0}}
+
+    def schedule():
+        # par de partidas por abertura, cores trocadas
+        for number in range(games):
+            root  = openings[(number // 2) % len(openings)]
+            first = "test" if number % 2 == 0 else "base"
+            other = "base" if first == "test" else "test"
+            yield number, root, (first, other)
+
+    start = time.perf_counter()
+    pgn   = open(pgn_path, "a", encoding="utf-8") if pgn_path else contextlib.nullcontext()
+    ctx   = multiprocessing.get_context("spawn")
+    with pgn, ProcessPoolExecutor(max_workers=workers, mp_context=ctx) as pool:
+        pending = {}
+        queue   = schedule()
+
+        def submit():
+            for number, root, (white, black) in queue:
+                future = pool.submit(play_game, root.root().fen(), [m.uci() for m in root.move_stack],
+                                     configs[white], configs[black], seed + 1000 * number, adjudication)
+                pending[future] = (number, root, white, black)
+                if len(pending) >= 2 * workers:
+                    return
+
+        submit()
+        while pending and stats["verdict"] is None:
+            done, _ = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                number, root, white, black = pending.pop(future)
+                game = future.result()
+                test_color = "white" if white == "test" else "black"
+                base_color = "black" if test_color == "white" else "white"
+                points = {"1-0": 1.0, "0-1": 0.0, "1/2-1/2": 0.5}[game["result"]]
+                if test_color == "black":
+                    points = 1.0 - points
+                key = {1.0: "wins", 0.5: "draws", 0.0: "losses"}[points]
+                stats[key]   += 1
+                stats["games"] += 1
+                stats["adjudicated"] += game["termination"] == "adjudication"
+                for name, color in (("test", test_color), ("base", base_color)):
+                    stats["nodes"][name] += game["nodes"][color]
+                    stats["time"][name]  += game["time"][color]
+                stats["elo"], stats["margin"] = elo_interval(stats["wins"], stats["draws"], stats["losses"])
+                stats["llr"] = sprt_llr(stats["wins"], stats["draws"], stats["losses"], elo0, elo1)
+                if stats["llr"] >= upper:
+                    stats["verdict"] = "H1"
+                elif stats["llr"] <= lower:
+                    stats["verdict"] = "H0"
+                if pgn_path:
+                    board = chess.Board(root.root().fen())
+                    for uci in game["moves"]:
+                        board.push_uci(uci)
+                    headers = _pgn_headers(number + 1, white, black, spec, game["result"], game["termination"])
+                    print(game_from_board(board, headers), file=pgn, end="\n\n")
+                    pgn.flush()
+                if report is not None:
+                    report(stats)
+            if stats["verdict"] is None:
+                submit()
+        for future in pending:
+            future.cancel()  # SPRT decidido: as partidas ainda na fila não rodam
+    stats["elapsed"] = time.perf_counter() - start
+    return stats
+
+
+def _nps(stats, name):
+    return stats["nodes"][name] / stats["time"][name] if stats["time"][name] else 0.0
+
+
+def _progress_line(stats):
+    lower, upper = stats["bounds"]
+    return (f"{stats['games']:>6} partidas: +{stats['wins']} ={stats['draws']} -{stats['losses']}  "
+            f"Elo {stats['elo']:+.1f} ± {stats['margin']:.1f}  LLR {stats['llr']:+.2f} ({lower:.2f}, {upper:.2f})")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Match da IA contra ela mesma com Elo e SPRT.")
+    parser.add_argument("--base", nargs="+", required=True, metavar="NOME=VALOR", help="configuração de referência")
+    parser.add_argument("--test", nargs="+", required=True, metavar="NOME=VALOR", help="configuração testada")
+    parser.add_argument("--games", type=int, default=1000, help="máximo de partidas")
+    parser.add_argument("--openings", help="arquivo EPD/FEN ou PGN (padrão: linhas do livro embutido)")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--pgn", help="grava as partidas neste arquivo PGN")
+    parser.add_argument("--elo0", type=float, default=0.0)
+    parser.add_argument("--elo1", type=float, default=5.0)
+    parser.add_argument("--alpha", type=float, default=0.05)
+    parser.add_argument("--beta", type=float, default=0.05)
+    parser.add_argument("--no-adjudication", action="store_true", help="joga todas as partidas até o fim")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args(argv)
+
+    try:
+        base, test = parse_config(args.base), parse_config(args.test)
+    except ValueError as error:
+        parser.error(str(error))
+    openings = load_openings(args.openings) if args.openings else default_openings()
+
+    printed = []
+
+    def report(stats):
+        if stats["games"] % _REPORT_EVERY == 0 or stats["verdict"]:
+            printed.append(stats["games"])
+            print(_progress_line(stats), flush=True)
+
+    print(f"{len(openings)} aberturas, até {args.games} partidas em {args.workers} processo(s); "
+          f"SPRT Elo0={args.elo0:g} Elo1={args.elo1:g} alpha={args.alpha:g} beta={args.beta:g}")
+    stats = run(base, test, args.games, openings, args.workers, args.pgn, args.elo0, args.elo1,
+                args.alpha, args.beta, not args.no_adjudication, args.seed, report)
+    if not printed or printed[-1] != stats["games"]:
+        print(_progress_line(stats))
+    print(f"adjudicadas: {stats['adjudicated']}  NPS base {_nps(stats, 'base'):,.0f}  "
+          f"test {_nps(stats, 'test'):,.0f}  tempo {stats['elapsed']:.0f}s")
+    verdict = {"H1": f"H1 aceita: test é mais forte (Elo ≥ {args.elo1:g})",
+               "H0": f"H0 aceita: test não ganha {args.elo1:g} Elo (Elo ≤ {args.elo0:g})",
+               None: "SPRT inconclusivo: limite de partidas atingido"}[stats["verdict"]]
+    print(verdict)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,11 +1,17 @@
 """Testes unitários para as funções de avaliação e busca da IA."""
+import json
 import math
 import os
+import struct
 import sys
+import tempfile
+import threading
 import time
 import unittest
+from unittest import mock
 
 import chess
+import chess.polyglot
 
 sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
 import ai  # módulo de IA; main() NÃO é chamada
@@ -41,6 +47,28 @@ class TestEvaluateBoard(unittest.TestCase):
         self.assertTrue(board.is_stalemate())
         self.assertEqual(ai.evaluate_board(board), 0)
 
+    def test_fifty_move_rule(self):
+        """Cem meios-lances sem captura nem peão: empate, a não ser que o último lance dê mate."""
+        board = chess.Board("4k3/8/8/8/8/8/8/Q3K3 w - - 100 80")
+        self.assertEqual(ai.evaluate_board(board), 0)
+        self.assertEqual(ai.evaluate_board(ai._SearchBoard.from_board(board)), 0)
+        mate = chess.Board("4k3/4Q3/4K3/8/8/8/8/8 b - - 100 80")
+        self.assertEqual(ai.evaluate_board(mate), math.inf)
+
+    def test_repetition_from_hash_history(self):
+        """Repetições da partida antes da raiz contam igual no _SearchBoard e no chess.Board."""
+        board = chess.Board()
+        for uci in ["g1f3", "g8f6", "f3g1", "f6g8"]:
+            board.push_uci(uci)
+        search = ai._SearchBoard.from_board(board)
+        self.assertEqual(ai.evaluate_board(search), ai.evaluate_board(board))
+        self.assertEqual(ai.evaluate_board(board), 0.3)
+        for uci in ["g1f3", "g8f6", "f3g1", "f6g8"]:
+            board.push_uci(uci)
+            search.push(chess.Move.from_uci(uci))
+        self.assertEqual(ai.evaluate_board(search), 0)
+        self.assertEqual(ai.evaluate_board(board), 0)
+
     def test_white_material_advantage(self):
         """Brancas com rainha extra → avaliação fortemente positiva."""
         board = chess.Board("4k3/8/8/8/8/8/8/Q3K3 w - - 0 1")
@@ -52,6 +80,120 @@ class TestEvaluateBoard(unittest.TestCase):
         self.assertLess(ai.evaluate_board(board), -5.0)
 
 
+# ---------------------------------------------------------------------------
+# _SearchBoard — material + PST incremental
+# ---------------------------------------------------------------------------
+class TestSearchBoard(unittest.TestCase):
+
+    FENS = [
+        chess.STARTING_FEN,
+        "r3k2r/p1ppqpb1/bn2pnp1/3PN3/1p2P3/2N2Q1p/PPPBBPPP/R3K2R w KQkq - 0 1",  # Kiwipete
+        "8/2p5/3p4/KP5r/1R3p1k/8/4P1P1/8 w - - 0 1",
+        "rnbq1k1r/pp1Pbppp/2p5/8/2B5/8/PPP1NnPP/RNBQK2R w KQ - 1 8",  # promoções
+    ]
+
+    def _random_walk(self, fen, seed, plies=40):
+        import random
+        rng   = random.Random(seed)
+        board = ai._SearchBoard.from_board(chess.Board(fen))
+        for _ in range(plies):
+            moves = list(board.legal_moves)
+            if not moves:
+                break
+            move = chess.Move.null() if rng.random() < 0.1 and not board.is_check() else rng.choice(moves)
+            board.push(move)
+            self.assertEqual(board.material_pst, ai._material_pst_cp(board), board.fen())
+            self.assertEqual(board.zobrist, chess.polyglot.zobrist_hash(board), board.fen())
+            self.assertEqual(board.pawn_key, ai._pawn_key(board), board.fen())
+        while board.move_stack:
+            board.pop()
+            self.assertEqual(board.material_pst, ai._material_pst_cp(board), board.fen())
+            self.assertEqual(board.zobrist, chess.polyglot.zobrist_hash(board), board.fen())
+
+    def test_incremental_matches_full_scan(self):
+        """Material/PST e hash Zobrist incrementais devem bater com o recálculo após cada push/pop."""
+        for fen in self.FENS:
+            for seed in range(5):
+                self._random_walk(fen, seed)
+
+    def test_en_passant_and_castling_hash(self):
+        """Hash após en passant, roque e perda de roque deve bater com o polyglot."""
+        board = ai._SearchBoard.from_board(chess.Board())
+        for uci in ["e2e4", "a7a6", "e4e5", "d7d5", "e5d6", "e7e6", "g1f3", "h7h6",
+                    "f1e2", "h8h7", "e1g1"]:
+            board.push(chess.Move.from_uci(uci))
+            self.assertEqual(board.zobrist, chess.polyglot.zobrist_hash(board), uci)
+
+    def test_debug_mode_search(self):
+        """Com _ZOBRIST_DEBUG ligado a busca confere o hash em cada push/pop sem divergir."""
+        ai._ZOBRIST_DEBUG = True
+        try:
+            move = ai.find_best_ai_move(chess.Board(self.FENS[1]), time_limit=0.3)
+        finally:
+            ai._ZOBRIST_DEBUG = False
+        self.assertIsNotNone(move)
+
+    def test_evaluate_matches_plain_board(self):
+        """evaluate_board deve ser idêntico para _SearchBoard e chess.Board."""
+        for fen in self.FENS:
+            plain  = chess.Board(fen)
+            search = ai._SearchBoard.from_board(plain)
+            self.assertEqual(ai.evaluate_board(search), ai.evaluate_board(plain))
+
+    def test_find_best_move_does_not_mutate_board(self):
+        """A busca trabalha numa cópia: o tabuleiro do chamador não muda."""
+        board = chess.Board(self.FENS[1])
+        fen   = board.fen()
+        ai.find_best_ai_move(board, time_limit=0.3)
+        self.assertEqual(board.fen(), fen)
+        self.assertEqual(type(board), chess.Board)
+
+
+# ---------------------------------------------------------------------------
+# Mobilidade
+# ---------------------------------------------------------------------------
+class TestMobility(unittest.TestCase):
+
+    def test_knight_in_corner_vs_center(self):
+        """Cavalo central ataca 8 casas; no canto, 2."""
+        center = chess.Board("4k3/8/8/8/3N4/8/8/4K3 w - - 0 1")
+        corner = chess.Board("4k3/8/8/8/8/8/8/N3K3 w - - 0 1")
+        self.assertEqual(ai._attack_mobility(center, chess.WHITE), 8)
+        self.assertEqual(ai._attack_mobility(corner, chess.WHITE), 2)
+
+    def test_squares_attacked_by_enemy_pawns_excluded(self):
+        """Casas atacadas por peões adversários não contam."""
+        free    = chess.Board("4k3/8/8/8/3N4/8/8/4K3 w - - 0 1")
+        covered = chess.Board("4k3/3p4/8/8/3N4/8/8/4K3 w - - 0 1")  # d7 cobre c6 e e6
+        self.assertEqual(ai._attack_mobility(covered, chess.WHITE),
+                         ai._attack_mobility(free, chess.WHITE) - 2)
+
+    def test_does_not_push_null_move(self):
+        """O termo novo não mexe na pilha de lances."""
+        board = chess.Board("r3k2r/p1ppqpb1/bn2pnp1/3PN3/1p2P3/2N2Q1p/PPPBBPPP/R3K2R w KQkq - 0 1")
+        board.push = board.pop = None  # qualquer push/pop quebraria
+        ai._attack_mobility(board, chess.WHITE)
+        ai._attack_mobility(board, chess.BLACK)
+
+    def test_legal_mode_keeps_old_term(self):
+        """_MOBILITY_MODE = "legal" reproduz a contagem antiga de lances legais."""
+        board = chess.Board("r1bq1rk1/pp2bppp/2n1pn2/2pp4/3P4/2PBPN2/PP1N1PPP/R1BQ1RK1 w - - 0 8")
+        white = board.legal_moves.count()
+        board.push(chess.Move.null())
+        black = board.legal_moves.count()
+        board.pop()
+        self.assertEqual(ai._legal_mobility(board), white - black)
+        ai._MOBILITY_MODE = "legal"
+        try:
+            legal_eval = ai.evaluate_board(board)
+        finally:
+            ai._MOBILITY_MODE = "attacks"
+        attack_eval = ai.evaluate_board(board)
+        diff = (white - black) - (ai._attack_mobility(board, chess.WHITE)
+                                  - ai._attack_mobility(board, chess.BLACK))
+        self.assertAlmostEqual(legal_eval - attack_eval, diff * ai._MOBILITY_WEIGHT, places=9)
+
+
 # ---------------------------------------------------------------------------
 # _pawn_structure_bonus
 # ---------------------------------------------------------------------------
@@ -105,6 +247,43 @@ class TestPawnStructure(unittest.TestCase):
         self.assertAlmostEqual(white, black, delta=0.5)
 
 
+# ---------------------------------------------------------------------------
+# Pawn hash
+# ---------------------------------------------------------------------------
+class TestPawnHash(unittest.TestCase):
+
+    def test_same_pawns_same_key(self):
+        """Chave de peões ignora as demais peças e distingue estruturas diferentes."""
+        a = chess.Board("4k3/pp6/8/8/8/8/PP6/4K3 w - - 0 1")
+        b = chess.Board("r3k3/pp6/8/8/8/2N5/PP6/4K2R b - - 0 1")
+        c = chess.Board("4k3/pp6/8/8/8/P7/1P6/4K3 w - - 0 1")
+        self.assertEqual(ai._pawn_key(a), ai._pawn_key(b))
+        self.assertNotEqual(ai._pawn_key(a), ai._pawn_key(c))
+
+    def test_hit_on_repeated_structure(self):
+        """Segunda consulta da mesma estrutura é hit e devolve a mesma entrada."""
+        table = ai._PawnHashTable(64)
+        board = chess.Board()
+        first = table.entry(board, ai._pawn_key(board))
+        board.push_uci("g1f3")
+        second = table.entry(board, ai._pawn_key(board))
+        self.assertIs(first, second)
+        self.assertEqual((table.probes, table.hits), (2, 1))
+        self.assertEqual(table.hit_rate(), 0.5)
+
+    def test_cached_terms_match_direct_functions(self):
+        """Entrada em cache reproduz exatamente estrutura, escudo do rei e colunas das torres."""
+        board = chess.Board("r1bq1rk1/pp2bppp/2n1pn2/2pp4/3P4/2PBPN2/PP1N1PPP/R1BQ1RK1 w - - 0 8")
+        entry = ai._PawnEntry(board)
+        self.assertEqual(entry.white_structure, ai._pawn_structure_bonus(board, chess.WHITE))
+        self.assertEqual(entry.black_structure, ai._pawn_structure_bonus(board, chess.BLACK))
+        for color in chess.COLORS:
+            self.assertEqual(entry.king_shield(color, board.king(color)),
+                             ai._king_safety_bonus(board, color))
+            self.assertEqual(ai._rook_file_score(board, color, *entry.files(color)),
+                             ai._rook_file_bonus(board, color))
+
+
 # ---------------------------------------------------------------------------
 # _king_safety_bonus
 # ---------------------------------------------------------------------------
@@ -148,9 +327,20 @@ class TestMinimax(unittest.TestCase):
         # Rainha branca em d2, torre preta em e3 (indefesa), reis nas bordas
         board = chess.Board("4k3/8/8/8/8/4r3/3Q4/4K3 w - - 0 1")
         deadline = time.monotonic() + 5.0
-        val = ai.minimax(board, 1, -math.inf, math.inf, True, deadline, {})
+        val = ai.minimax(board, 1, -math.inf, math.inf, True, deadline, ai.TranspositionTable(1))
         self.assertGreater(val, 0, "Brancas devem ter avaliação positiva ao capturar a torre.")
 
+    def test_threefold_inside_search_is_draw(self):
+        """Tripla repetição alcançada dentro da árvore vale 0, mesmo com material sobrando."""
+        board = chess.Board("4k3/8/8/8/8/8/8/Q3K3 w - - 0 1")
+        for uci in ["e1d1", "e8d8", "d1e1", "d8e8", "e1d1", "e8d8", "d1e1"]:
+            board.push_uci(uci)
+        search = ai._SearchBoard.from_board(board)
+        search.push(chess.Move.from_uci("d8e8"))
+        deadline = time.monotonic() + 5.0
+        val = ai.minimax(search, 2, -math.inf, math.inf, True, deadline, ai.TranspositionTable(1))
+        self.assertEqual(val, 0)
+
     def test_depth_zero_equals_evaluate(self):
         """Na profundidade 0, minimax deve retornar o mesmo que evaluate_board."""
         board = chess.Board()
@@ -158,10 +348,94 @@ class TestMinimax(unittest.TestCase):
         # profundidade 0 chama quiescence; para posição sem capturas disponíveis
         # em posição simétrica o resultado deve ser próximo de evaluate_board
         static = ai.evaluate_board(board)
-        mini   = ai.minimax(board, 0, -math.inf, math.inf, True, deadline, {})
+        mini   = ai.minimax(board, 0, -math.inf, math.inf, True, deadline, ai.TranspositionTable(1))
         self.assertAlmostEqual(mini, static, delta=2.0)
 
 
+# ---------------------------------------------------------------------------
+# _MovePicker
+# ---------------------------------------------------------------------------
+class TestMovePicker(unittest.TestCase):
+
+    KIWIPETE = "r3k2r/p1ppqpb1/bn2pnp1/3PN3/1p2P3/2N2Q1p/PPPBBPPP/R3K2R w KQkq - 0 1"
+
+    def test_yields_every_legal_move_once(self):
+        """Todos os lances legais, cada um uma vez — inclusive roque, en passant e promoções."""
+        import random
+        rng = random.Random(7)
+        for fen in (chess.STARTING_FEN, self.KIWIPETE,
+                    "rnbq1k1r/pp1Pbppp/2p5/8/2B5/8/PPP1NnPP/RNBQK2R w KQ - 1 8"):
+            board = chess.Board(fen)
+            for _ in range(20):
+                legal = list(board.legal_moves)
+                if not legal:
+                    break
+                ai._killers[2] = [rng.choice(legal)]
+                picked = list(ai._MovePicker(board, rng.choice(legal + [None]), depth=2))
+                self.assertEqual(len(picked), len(legal), board.fen())
+                self.assertEqual(set(picked), set(legal), board.fen())
+                board.push(rng.choice(legal))
+        ai._killers.clear()
+
+    def test_tt_move_first_without_generation(self):
+        """O TT move sai antes de qualquer geração de lances."""
+        board   = chess.Board(self.KIWIPETE)
+        tt_move = chess.Move.from_uci("e2a6")
+        before  = ai._MovePicker.generations
+        picker  = iter(ai._MovePicker(board, tt_move, depth=3))
+        self.assertEqual(next(picker), tt_move)
+        self.assertEqual(ai._MovePicker.generations, before)
+
+    def test_illegal_tt_move_is_skipped(self):
+        """TT move inválido (colisão de hash) é ignorado."""
+        board  = chess.Board()
+        picked = list(ai._MovePicker(board, chess.Move.from_uci("e2e5"), depth=1))
+        self.assertNotIn(chess.Move.from_uci("e2e5"), picked)
+        self.assertEqual(len(picked), 20)
+
+    def test_winning_capture_before_quiet_and_losing_capture_last(self):
+        """Captura ganhante antes dos quiet moves; captura perdedora por último."""
+        # Dama branca pode tomar torre indefesa (d4) ou peão defendido (a5)
+        board  = chess.Board("4k3/8/1p6/p7/3r4/8/3Q4/4K3 w - - 0 1")
+        picked = list(ai._MovePicker(board, depth=1))
+        self.assertEqual(picked[0], chess.Move.from_uci("d2d4"))
+        self.assertEqual(picked[-1], chess.Move.from_uci("d2a5"))
+
+
+# ---------------------------------------------------------------------------
+# quiescence
+# ---------------------------------------------------------------------------
+class TestQuiescence(unittest.TestCase):
+
+    def test_only_captures_and_promotions(self):
+        """Só capturas e promoções entram na quiescence; capturas perdedoras ficam de fora."""
+        # Dama pode tomar torre indefesa (d4) ou peão defendido (a5); peão c7 promove
+        board = chess.Board("4k3/2P5/1p6/p7/3r4/8/3Q4/4K3 w - - 0 1")
+        moves = [m.uci() for _, m in ai._quiescence_moves(board)]
+        self.assertEqual(moves[0], "d2d4")
+        self.assertIn("c7c8q", moves)
+        self.assertNotIn("d2a5", moves)
+        self.assertTrue(all(chess.Move.from_uci(m).promotion or
+                            board.is_capture(chess.Move.from_uci(m)) for m in moves))
+
+    def test_en_passant_gain_is_a_pawn(self):
+        """Captura en passant vale um peão no delta pruning."""
+        board = chess.Board("4k3/8/8/3pP3/8/8/8/4K3 w - d6 0 1")
+        self.assertIn((1, chess.Move.from_uci("e5d6")), ai._quiescence_moves(board))
+
+    def test_delta_pruning_skips_hopeless_captures(self):
+        """Com alpha muito acima do stand pat, capturar um peão não é nem tentado."""
+        board = chess.Board("4k3/8/8/3p4/4P3/8/8/4K3 w - - 0 1")
+        deadline = time.monotonic() + 5.0
+        stand_pat = ai.evaluate_board(board)
+        alpha = stand_pat + 1 + ai._DELTA_MARGIN + 0.5
+        pushes = []
+        original_push = board.push
+        board.push = lambda move: (pushes.append(move), original_push(move))
+        self.assertEqual(ai.quiescence(board, alpha, math.inf, True, deadline), alpha)
+        self.assertEqual(pushes, [])
+
+
 # ---------------------------------------------------------------------------
 # find_best_ai_move — testes de ponta a ponta
 # ---------------------------------------------------------------------------
@@ -204,5 +478,276 @@ class TestFindBestMove(unittest.TestCase):
         self.assertIsNone(move)
 
 
+# ---------------------------------------------------------------------------
+# Orçamentos de nós/profundidade e semente
+# ---------------------------------------------------------------------------
+class TestSearchBudgets(unittest.TestCase):
+
+    _FEN = "r1bq1rk1/pp2bppp/2n1pn2/2pp4/3P4/2PBPN2/PP1N1PPP/R1BQ1RK1 w - - 0 8"
+
+    def test_max_depth(self):
+        """max_depth sozinho para exatamente na profundidade pedida."""
+        ai.reset_search_state()
+        _, info = ai.find_best_ai_move(chess.Board(self._FEN), max_depth=2, with_info=True)
+        self.assertEqual(info.depth, 2)
+
+    def test_max_nodes_is_respected(self):
+        """A busca não passa do orçamento de nós."""
+        ai.reset_search_state()
+        move, info = ai.find_best_ai_move(chess.Board(self._FEN), max_nodes=1500, with_info=True)
+        self.assertIn(move, chess.Board(self._FEN).legal_moves)
+        self.assertLessEqual(info.nodes, 1500)
+
+    def test_seeded_node_budget_is_reproducible(self):
+        """Mesma semente, mesmo orçamento e mesmo estado: resultado idêntico."""
+        results = []
+        for _ in range(2):
+            ai.reset_search_state()
+            _, info = ai.find_best_ai_move(chess.Board(self._FEN), max_nodes=3000, seed=11, with_info=True)
+            results.append((info.move, info.depth, info.score, info.pv, info.counters))
+        self.assertEqual(results[0], results[1])
+
+    def test_stop_event_ends_search_quickly(self):
+        """Um stop acionado por outra thread encerra a busca em milissegundos, com lance legal."""
+        board = chess.Board(self._FEN)
+        stop  = threading.Event()
+        threading.Timer(0.3, stop.set).start()
+        start = time.monotonic()
+        move, info = ai.find_best_ai_move(board, time_limit=30.0, stop=stop, with_info=True)
+        self.assertLess(time.monotonic() - start, 1.5)
+        self.assertIn(move, board.legal_moves)
+        already = threading.Event()
+        already.set()
+        self.assertIn(ai.find_best_ai_move(board, time_limit=30.0, stop=already), board.legal_moves)
+
+    def test_difficulty_levels_are_budgets(self):
+        """Todo nível de dificuldade é um conjunto válido de argumentos de find_best_ai_move."""
+        from config import DIFFICULTY_LEVELS
+        board = chess.Board("3q4/k7/8/8/8/8/8/3QK3 w - - 0 1")
+        for _, budget in DIFFICULTY_LEVELS:
+            self.assertTrue(set(budget) <= {"time_limit", "max_nodes", "max_depth"})
+        easy = DIFFICULTY_LEVELS[0][1]
+        self.assertEqual(ai.find_best_ai_move(board, **easy), chess.Move.from_uci("d1d8"))
+
+
+# ---------------------------------------------------------------------------
+# SearchInfo — estatísticas da busca
+# ---------------------------------------------------------------------------
+class TestSearchInfo(unittest.TestCase):
+
+    _FEN = "r1bq1rk1/pp2bppp/2n1pn2/2pp4/3P4/2PBPN2/PP1N1PPP/R1BQ1RK1 w - - 0 8"
+
+    def test_info_counters_and_pv(self):
+        """with_info devolve profundidade, PV começando no lance e contadores coerentes."""
+        board = chess.Board(self._FEN)
+        ai._tt.clear()
+        move, info = ai.find_best_ai_move(board, time_limit=0.5, with_info=True)
+        self.assertEqual(info.move, move)
+        self.assertGreaterEqual(info.depth, 1)
+        self.assertEqual(info.pv[0], move)
+        self.assertEqual([it["depth"] for it in info.iterations][-1], info.depth)
+        self.assertGreater(info.counters["nodes"], 0)
+        self.assertLessEqual(info.counters["tt_hits"], info.counters["tt_probes"])
+        self.assertLessEqual(info.counters["tt_cutoffs"], info.counters["tt_hits"])
+        self.assertLessEqual(info.counters["null_cutoffs"], info.counters["null_tries"])
+        self.assertGreater(info.nps, 0)
+
+    def test_book_move_info(self):
+        """Lance de livro vem marcado como tal, sem busca."""
+        move, info = ai.find_best_ai_move(chess.Board(), with_info=True)
+        self.assertTrue(info.book)
+        self.assertEqual(info.depth, 0)
+        self.assertEqual(info.pv, [move])
+
+    def test_json_log_sink(self):
+        """Cada busca vira uma linha JSON válida no log, inclusive com valor de mate."""
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "search.jsonl")
+            ai.set_search_log(path)
+            try:
+                ai.find_best_ai_move(chess.Board("3q4/k7/8/8/8/8/8/3QK3 w - - 0 1"), time_limit=0.3)
+                ai.find_best_ai_move(chess.Board("7k/6Q1/6K1/8/8/8/8/8 b - - 0 1"), time_limit=0.3)
+            finally:
+                ai.set_search_log(None)
+            with open(path, encoding="utf-8") as f:
+                lines = [json.loads(line) for line in f]
+        self.assertEqual(len(lines), 2)
+        self.assertEqual(lines[0]["move"], "d1d8")
+        self.assertIn("nodes", lines[0])
+        self.assertIn("iterations", lines[0])
+        self.assertIsNone(lines[1]["move"])  # pretas em mate: sem lances
+
+
+# ---------------------------------------------------------------------------
+# Livro polyglot (.bin)
+# ---------------------------------------------------------------------------
+def _polyglot_entry(board, uci, weight):
+    move = chess.Move.from_uci(uci)
+    raw  = move.to_square | move.from_square << 6 | (move.promotion - 1 if move.promotion else 0) << 12
+    return struct.pack(">QHHI", chess.polyglot.zobrist_hash(board), raw, weight, 0)
+
+
+class TestPolyglotBook(unittest.TestCase):
+
+    def setUp(self):
+        self._saved = ai._polyglot_book
+        self._tmp   = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        if ai._polyglot_book is not None and ai._polyglot_book is not self._saved:
+            ai._polyglot_book.close()
+        ai._polyglot_book = self._saved
+        self._tmp.cleanup()
+
+    def _load(self, entries):
+        """Grava `entries` ordenadas pela chave, como no formato polyglot, e carrega o livro."""
+        path = os.path.join(self._tmp.name, "book.bin")
+        with open(path, "wb") as f:
+            f.write(b"".join(sorted(entries)))
+        ai._polyglot_book = ai.open_polyglot_book(path)
+        self.assertIsNotNone(ai._polyglot_book)
+
+    def test_file_book_has_priority(self):
+        """Com o arquivo carregado, o lance vem dele e não das linhas embutidas."""
+        self._load([_polyglot_entry(chess.Board(), "a2a3", 5)])
+        move, info = ai.find_best_ai_move(chess.Board(), seed=1, with_info=True)
+        self.assertEqual(move, chess.Move.from_uci("a2a3"))
+        self.assertTrue(info.book)
+
+    def test_weighted_choice(self):
+        """O sorteio segue o peso das entradas; peso zero nunca sai."""
+        board = chess.Board()
+        self._load([
+            _polyglot_entry(board, "e2e4", 3),
+            _polyglot_entry(board, "d2d4", 1),
+            _polyglot_entry(board, "h2h4", 0),
+        ])
+        picks = [ai.find_best_ai_move(board, seed=s).uci() for s in range(200)]
+        self.assertNotIn("h2h4", picks)
+        self.assertGreater(picks.count("e2e4"), picks.count("d2d4") * 2)
+
+    def test_castling_encoding(self):
+        """Roque polyglot (rei toma a própria torre) vira o lance normal."""
+        board = chess.Board("r3k2r/pppppppp/8/8/8/8/PPPPPPPP/R3K2R w KQkq - 0 1")
+        self._load([_polyglot_entry(board, "e1h1", 1)])
+        self.assertEqual(ai.find_best_ai_move(board, seed=0), chess.Move.from_uci("e1g1"))
+
+    def test_fallback_to_builtin_lines(self):
+        """Posição fora do arquivo: valem as linhas embutidas."""
+        other = chess.Board()
+        other.push_uci("a2a3")
+        self._load([_polyglot_entry(other, "e7e5", 1)])
+        move, info = ai.find_best_ai_move(chess.Board(), seed=0, with_info=True)
+        self.assertTrue(info.book)
+        self.assertIn(move, ai._book_moves(chess.Board()))
+
+    def test_invalid_file_is_ignored(self):
+        """Arquivo ausente ou com tamanho inválido não carrega livro algum."""
+        path = os.path.join(self._tmp.name, "bad.bin")
+        with open(path, "wb") as f:
+            f.write(b"\0" * 15)
+        self.assertIsNone(ai.open_polyglot_book(path))
+        self.assertIsNone(ai.open_polyglot_book(os.path.join(self._tmp.name, "missing.bin")))
+        self.assertIsNone(ai.open_polyglot_book(None))
+
+
+# ---------------------------------------------------------------------------
+# TT persistente entre jogadas
+# ---------------------------------------------------------------------------
+class TestPersistentSearch(unittest.TestCase):
+
+    _FEN = "r1bq1rk1/pp2bppp/2n1pn2/2pp4/3P4/2PBPN2/PP1N1PPP/R1BQ1RK1 w - - 0 8"
+
+    def test_replay_resumes_from_tt(self):
+        """Buscar de novo a mesma raiz (desfazer + refazer) retoma da profundidade guardada."""
+        board = chess.Board(self._FEN)
+        tt    = ai.TranspositionTable(1)
+        ai._iterative_deepening(ai._SearchBoard.from_board(board), math.inf, tt, max_depth=3)
+        move, depth, _ = ai._iterative_deepening(ai._SearchBoard.from_board(board),
+                                                 time.monotonic(), tt, max_depth=3)
+        self.assertEqual(depth, 3)
+        self.assertIn(move, board.legal_moves)
+
+    def test_broken_snapshot_starts_fresh_table(self):
+        """Snapshot com cabeçalho válido e corpo truncado: import ai segue com uma TT nova."""
+        import transposition
+
+        header = transposition._SNAPSHOT_HEADER.pack(transposition._SNAPSHOT_MAGIC, 1)
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "tt.bin")
+            for size in (20, 24):
+                with open(path, "wb") as f:
+                    f.write(header + bytes(size))
+                with self.subTest(size=size), mock.patch.object(ai, "TT_SNAPSHOT", path):
+                    tt = ai._load_tt()
+                    self.assertEqual(len(tt), ai.slots_for_mb(ai.TT_SIZE_MB))
+                    tt.release()
+
+    def test_history_ages_instead_of_clearing(self):
+        """Entre buscas a history cai pela metade; entradas mínimas somem."""
+        ai._history.clear()
+        ai._history.update({(12, 28): 40, (6, 21): 1})
+        ai._age_history()
+        self.assertEqual(ai._history, {(12, 28): 20})
+        ai._history.clear()
+
+
+# ---------------------------------------------------------------------------
+# Ponder — busca no tempo do adversário
+# ---------------------------------------------------------------------------
+class TestPonder(unittest.TestCase):
+
+    _FEN = "r1bqk2r/pp2bppp/2n1pn2/2pp4/3P4/2PBPN2/PP1N1PPP/R1BQ1RK1 w kq - 0 8"
+
+    def test_search_control_stops_search(self):
+        """SearchControl parado faz a busca sem deadline terminar logo."""
+        control = ai.SearchControl()
+        self.assertFalse(time.monotonic() >= control)
+        board  = chess.Board(self._FEN)
+        thread = threading.Thread(target=ai._search, args=(board, control))
+        thread.start()
+        time.sleep(0.2)
+        control.stop()
+        thread.join(timeout=2.0)
+        self.assertFalse(thread.is_alive())
+
+    def test_search_control_depth_limit(self):
+        """max_depth no SearchControl encerra a busca na primeira iteração dessa profundidade."""
+        ai.reset_search_state()  # sem a raiz na TT: senão a busca já começa mais funda
+        control = ai.SearchControl()
+        control.max_depth = 2
+        info = ai._search(chess.Board(self._FEN), control)
+        self.assertEqual(info.depth, 2)
+        self.assertEqual(control.depth, 2)
+
+    def test_predicted_reply_is_legal(self):
+        """Após uma busca, a resposta prevista vem da TT e é legal."""
+        board = chess.Board(self._FEN)
+        board.push(ai.find_best_ai_move(board, time_limit=0.5))
+        reply = ai.predicted_reply(board)
+        self.assertIsNotNone(reply)
+        self.assertIn(reply, board.legal_moves)
+
+    def test_ponder_hit_returns_move(self):
+        """Ponder-hit: a busca em andamento devolve um lance legal dentro do novo prazo."""
+        board  = chess.Board(self._FEN)
+        board.push_uci("h2h3")
+        ponder = ai.Ponder(board, chess.Move.from_uci("e8g8"))
+        time.sleep(0.3)
+        ponder.hit(0.3)
+        ponder.thread.join(timeout=3.0)
+        self.assertFalse(ponder.thread.is_alive())
+        self.assertIn(ponder.result[0], ponder.board.legal_moves)
+
+    def test_ponder_stop(self):
+        """stop() encerra a thread do ponder, mesmo sem deadline."""
+        board  = chess.Board(self._FEN)
+        board.push_uci("h2h3")
+        ponder = ai.Ponder(board, chess.Move.from_uci("e8g8"))
+        time.sleep(0.2)
+        ponder.stop()
+        self.assertFalse(ponder.thread.is_alive())
+
+
 if __name__ == "__main__":
     unittest.main(verbosity=2)
@@ -0,0 +1,85 @@
+"""Testes da anotação de PGN em fluxo."""
+import io
+import math
+import os
+import sys
+import tempfile
+import unittest
+
+import chess
+import chess.engine
+import chess.pgn
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+import annotate
+import pgn_utils
+
+_BLUNDER = '[Event "mate"]\n[Result "1-0"]\n\n1. e4 e5 2. Qh5 Nc6 3. Bc4 Nf6 4. Qxf7# 1-0\n\n'
+
+
+def _quiet(n):
+    return f'[Event "g{n}"]\n[Result "*"]\n\n1. d4 d5 2. c4 e6 3. Nc3 Nf6 4. Bg5 Be7 *\n\n'
+
+
+class TestAnnotate(unittest.TestCase):
+
+    def setUp(self):
+        self._tmp = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        self._tmp.cleanup()
+
+    def _file(self, name, text):
+        path = os.path.join(self._tmp.name, name)
+        with open(path, "w", encoding="utf-8") as f:
+            f.write(text)
+        return path
+
+    def _run(self, paths, **kwargs):
+        out   = io.StringIO()
+        stats = annotate.annotate(paths, out, depth=2, **kwargs)
+        out.seek(0)
+        return list(iter(lambda: chess.pgn.read_game(out), None)), out.getvalue(), stats
+
+    def test_iter_games_streams_files_in_order(self):
+        """Partidas de vários arquivos, na ordem, uma por vez."""
+        a = self._file("a.pgn", _quiet(1) + _quiet(2))
+        b = self._file("b.pgn", _quiet(3))
+        games = pgn_utils.iter_games([a, b])
+        self.assertEqual(next(games).headers["Event"], "g1")
+        self.assertEqual([g.headers["Event"] for g in games], ["g2", "g3"])
+
+    def test_blunder_marked_with_best_move(self):
+        """O lance que permite mate em 1 leva ?? e o lance sugerido; o mate em si fica sem avaliação."""
+        games, _, stats = self._run([self._file("m.pgn", _BLUNDER)])
+        nodes = list(games[0].mainline())
+        knight = nodes[5]
+        self.assertEqual(knight.san(), "Nf6")
+        self.assertIn(chess.pgn.NAG_BLUNDER, knight.nags)
+        self.assertIn("melhor:", knight.comment)
+        self.assertEqual(knight.eval().white(), chess.engine.Mate(1))
+        self.assertIsNone(nodes[-1].eval())
+        self.assertIsNotNone(nodes[0].eval())
+        self.assertEqual(stats["blunders"], 1)
+        self.assertEqual(stats["positions"], len(nodes) + 1)
+        self.assertEqual(games[0].headers["Annotator"], "Chess-AI (max_depth=2)")
+
+    def test_pool_preserves_order_and_output(self):
+        """Com pool e blocos pequenos, a saída é a mesma da execução num processo só, na mesma ordem."""
+        path = self._file("many.pgn", "".join(_quiet(n) for n in range(5)) + _BLUNDER)
+        _, serial, _ = self._run([path], workers=1, chunk_plies=3)
+        games, pooled, stats = self._run([path], workers=2, chunk_plies=3)
+        self.assertEqual(pooled, serial)
+        self.assertEqual([g.headers["Event"] for g in games], [f"g{n}" for n in range(5)] + ["mate"])
+        self.assertEqual(stats["games"], 6)
+
+    def test_pov_score(self):
+        """Mate em N contado pelos lances do vencedor na PV."""
+        self.assertEqual(annotate._pov_score(0.35, 3, chess.WHITE).white(), chess.engine.Cp(35))
+        self.assertEqual(annotate._pov_score(math.inf, 3, chess.WHITE).white(), chess.engine.Mate(2))
+        self.assertEqual(annotate._pov_score(math.inf, 2, chess.BLACK).white(), chess.engine.Mate(1))
+        self.assertEqual(annotate._pov_score(-math.inf, 1, chess.BLACK).white(), chess.engine.Mate(-1))
+
+
+if __name__ == "__main__":
+    unittest.main(verbosity=2)
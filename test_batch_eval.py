@@ -0,0 +1,89 @@
+"""Testes unitários para a avaliação em lote com NumPy."""
+import os
+import random
+import sys
+import unittest
+from unittest import mock
+
+import chess
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+import ai
+import perft
+
+try:
+    import batch_eval
+except ImportError:  # numpy é opcional
+    batch_eval = None
+
+
+def _random_positions(seed, games=60):
+    rng, boards = random.Random(seed), []
+    for _ in range(games):
+        board = chess.Board()
+        for _ in range(rng.randrange(1, 160)):
+            moves = list(board.legal_moves)
+            if not moves:
+                break
+            board.push(rng.choice(moves))
+            if rng.random() < 0.2:
+                boards.append(board.copy())
+    return boards
+
+
+@unittest.skipIf(batch_eval is None, "numpy não instalado")
+class TestBatchEval(unittest.TestCase):
+
+    def test_bit_compatible_with_evaluate_board(self):
+        """Cada valor do lote deve ser exatamente (==) o de evaluate_board."""
+        boards = _random_positions(seed=11) + [chess.Board(fen) for _, fen, _ in perft.SUITE]
+        values = batch_eval.evaluate_batch(boards)
+        for board, value in zip(boards, values):
+            self.assertEqual(value, ai.evaluate_board(board), board.fen())
+
+    def test_terminal_positions(self):
+        """Mate, afogamento, material insuficiente e repetição seguem o evaluate_board."""
+        repeated = chess.Board()
+        for uci in ["g1f3", "g8f6", "f3g1", "f6g8"]:
+            repeated.push_uci(uci)
+        boards = [
+            chess.Board("r1bqkb1r/pppp1Qpp/2n2n2/4p3/2B1P3/8/PPPP1PPP/RNB1K1NR b KQkq - 0 4"),
+            chess.Board("7k/5Q2/6K1/8/8/8/8/8 b - - 0 1"),
+            chess.Board("8/8/4k3/8/8/3BK3/8/8 w - - 0 1"),
+            chess.Board("7k/5Kp1/8/5Q2/8/8/8/B7 b - - 0 1"),  # afogado: o peão g7 está cravado
+            repeated,
+        ]
+        values = batch_eval.evaluate_batch(boards)
+        self.assertEqual(list(values), [ai.evaluate_board(board) for board in boards])
+
+    def test_quiet_positions_skip_scalar_check(self):
+        """Posições com lance livre e sem chance de repetição não geram lances em Python."""
+        game   = chess.Board()
+        boards = [game.copy(), chess.Board(perft.SUITE[1][1])]
+        for uci in ["e2e4", "e7e5", "g1f3"]:
+            game.push_uci(uci)
+            boards.append(game.copy())
+        with mock.patch.object(ai, "_game_result", wraps=ai._game_result) as game_result:
+            values = batch_eval.evaluate_batch(boards)
+        self.assertEqual(game_result.call_count, 0)
+        self.assertEqual(list(values), [ai.evaluate_board(board) for board in boards])
+
+    def test_planes_and_chunks(self):
+        """Blocos pequenos e planos já empacotados dão o mesmo resultado."""
+        boards = _random_positions(seed=5, games=20)
+        planes = batch_eval.pack_boards(boards)
+        self.assertEqual(planes.shape, (len(boards), 12))
+        self.assertEqual(list(batch_eval.evaluate_planes(planes, chunk_size=7)),
+                         list(batch_eval.evaluate_planes(planes)))
+
+    def test_legal_mobility_mode_rejected(self):
+        ai._MOBILITY_MODE = "legal"
+        try:
+            with self.assertRaises(ValueError):
+                batch_eval.evaluate_batch([chess.Board()])
+        finally:
+            ai._MOBILITY_MODE = "attacks"
+
+
+if __name__ == "__main__":
+    unittest.main()
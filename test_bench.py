@@ -0,0 +1,104 @@
+"""Testes unitários para o benchmark da suíte EPD."""
+import copy
+import os
+import subprocess
+import sys
+import tempfile
+import unittest
+
+import chess
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+import bench
+
+_HERE = os.path.dirname(os.path.abspath(__file__))
+
+
+class TestBench(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.suite_path = os.path.join(tempfile.mkdtemp(), "mini.epd")
+        with open(cls.suite_path, "w", encoding="utf-8") as f:
+            f.write('3q4/k7/8/8/8/8/8/3QK3 w - - bm Qxd8; id "dama";\n'
+                    '# comentário\n\n'
+                    '8/8/8/4k3/8/8/4P3/4K3 w - - id "kpk";\n')
+        cls.result = bench.run(depth=2, suite_path=cls.suite_path)
+
+    def test_bundled_suite_parses(self):
+        """A suíte embutida deve ter posições de meio-jogo, táticas e finais, com ids únicos."""
+        suite = bench.load_suite()
+        ids   = [pos_id for pos_id, _, _, _ in suite]
+        self.assertEqual(len(ids), len(set(ids)))
+        for prefix in ("meio-jogo.", "tatico.", "final."):
+            self.assertTrue(any(i.startswith(prefix) for i in ids), prefix)
+        for _, board, best, _ in suite:
+            self.assertTrue(board.is_valid())
+            for move in best:
+                self.assertIn(move, board.legal_moves)
+
+    def test_run_reports_metrics(self):
+        """O resultado deve trazer nós, NPS, tempo por profundidade e acertos."""
+        totals = self.result["totals"]
+        self.assertEqual(totals["positions"], 2)
+        self.assertEqual((totals["solved"], totals["graded"]), (1, 1))
+        self.assertEqual(set(totals["time_to_depth"]), {"1", "2"})
+        pos = self.result["positions"][0]
+        self.assertEqual(pos["move"], "d1d8")
+        self.assertGreater(pos["nodes"], 0)
+        self.assertIsNone(self.result["positions"][1]["solved"])
+
+    def test_run_is_deterministic(self):
+        """Mesma profundidade, mesmos nós e lances: é isso que torna o baseline comparável."""
+        again = bench.run(depth=2, suite_path=self.suite_path)
+        self.assertEqual([(p["move"], p["nodes"]) for p in again["positions"]],
+                         [(p["move"], p["nodes"]) for p in self.result["positions"]])
+
+    def test_compare_flags_regressions(self):
+        """NPS menor além da tolerância e acertos perdidos são regressões; nós diferentes, só nota."""
+        baseline = copy.deepcopy(self.result)
+        self.assertEqual(bench.compare(self.result, baseline), ([], []))
+
+        baseline["totals"]["nps"]    = self.result["totals"]["nps"] * 2
+        baseline["totals"]["solved"] = 2
+        baseline["totals"]["nodes"] += 1
+        regressions, notes = bench.compare(self.result, baseline)
+        self.assertEqual(len(regressions), 2)
+        self.assertEqual(len(notes), 1)
+
+    def test_run_position_ignores_book(self):
+        """Posição do livro também é buscada: o benchmark mede a busca, não o livro."""
+        info = bench.run_position(chess.Board(), 1)
+        self.assertFalse(info.book)
+        self.assertEqual(info.depth, 1)
+        self.assertGreater(info.nodes, 0)
+
+    def test_compare_zero_baseline(self):
+        """Baseline com zero nós e NPS (ex.: só posições de livro ou terminais) não divide por zero."""
+        baseline = copy.deepcopy(self.result)
+        baseline["totals"]["nodes"] = baseline["totals"]["nps"] = 0
+        regressions, notes = bench.compare(self.result, baseline)
+        self.assertEqual(regressions, [])
+        self.assertEqual(notes, [f"nós: {self.result['totals']['nodes']} (baseline 0)"])
+
+    def test_main_exits_nonzero_on_regression(self):
+        """Com --baseline, a CLI deve sair com 1 quando houver regressão."""
+        tmp = tempfile.mkdtemp()
+        base_path = os.path.join(tmp, "base.json")
+        self.assertEqual(bench.main(["--depth", "1", "--suite", self.suite_path,
+                                     "--save-baseline", base_path]), 0)
+        with open(base_path, encoding="utf-8") as f:
+            text = f.read()
+        with open(base_path, "w", encoding="utf-8") as f:
+            f.write(text.replace('"solved": 1', '"solved": 5'))
+        self.assertEqual(bench.main(["--depth", "1", "--suite", self.suite_path,
+                                     "--baseline", base_path]), 1)
+
+    def test_runs_without_pygame(self):
+        """O bench (e a IA) não podem depender do pygame."""
+        code = "import sys, bench; sys.exit('pygame' in sys.modules)"
+        self.assertEqual(subprocess.run([sys.executable, "-c", code], cwd=_HERE).returncode, 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,131 @@
+"""Testes do montador de livro polyglot a partir de PGN."""
+import os
+import sys
+import tempfile
+import unittest
+from unittest import mock
+
+import chess
+import chess.polyglot
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+import book_builder
+
+
+def _game(moves, result):
+    return (f'[Event "teste"]\n[White "a"]\n[Black "b"]\n[Result "{result}"]\n\n'
+            f"{moves} {result}\n\n")
+
+
+# 1.e4: 2 vitórias e 1 empate das brancas; 1.d4: uma derrota; mais uma partida
+# sem resultado e uma com lance ilegal, que devem ser ignoradas.
+_PGN = "".join([
+    _game("1. e4 e5 2. Nf3 Nc6 3. Bb5 a6", "1-0"),
+    _game("1. e4 e5 2. Nf3 (2. f4 exf4) 2... Nc6 3. Bc4 Bc5", "1-0"),
+    _game("1. e4 c5 2. Nf3 d6 {comentário} 3. d4", "1/2-1/2"),
+    _game("1. d4 d5 2. c4 e6", "0-1"),
+    _game("1. e4 e5", "*"),
+    _game("1. e4 e4", "1-0"),
+])
+
+
+class TestBookBuilder(unittest.TestCase):
+
+    def setUp(self):
+        self._tmp = tempfile.TemporaryDirectory()
+        self.pgn  = os.path.join(self._tmp.name, "partidas.pgn")
+        with open(self.pgn, "w", encoding="utf-8") as f:
+            f.write(_PGN)
+
+    def tearDown(self):
+        self._tmp.cleanup()
+
+    def _build(self, name="book.bin", **kwargs):
+        path = os.path.join(self._tmp.name, name)
+        stats = book_builder.build([self.pgn], path, **kwargs)
+        return path, stats
+
+    def _entries(self, path, board):
+        with chess.polyglot.open_reader(path) as reader:
+            return {e.move.uci(): e.weight for e in reader.find_all(board, minimum_weight=0)}
+
+    def test_counts_and_weights(self):
+        """Peso = 2·vitórias + empates de quem jogou; partidas inválidas ficam de fora."""
+        path, stats = self._build(min_games=1)
+        self.assertEqual(stats["games"], 4)
+        self.assertEqual(stats["skipped"], 2)
+        self.assertEqual(self._entries(path, chess.Board()), {"e2e4": 5})  # 1.d4 perdeu: peso 0
+        after = chess.Board()
+        after.push_san("e4")
+        self.assertEqual(self._entries(path, after), {"c7c5": 1})  # 1...e5 perdeu as duas
+
+    def test_filters(self):
+        """min_games e min_score cortam lances raros ou ruins para quem os jogou."""
+        path, _ = self._build(min_games=2)
+        after = chess.Board()
+        after.push_san("e4")
+        self.assertEqual(self._entries(path, after), {})  # e5 perdeu as duas, c5 só uma partida
+        path, _ = self._build(min_games=1, min_score=0.9)
+        self.assertEqual(self._entries(path, chess.Board()), {})  # e4 fez 5/6
+
+    def test_max_ply(self):
+        """Lances além de max_ply não entram."""
+        path, _ = self._build(min_games=1, max_ply=1)
+        after = chess.Board()
+        after.push_san("e4")
+        self.assertEqual(self._entries(path, after), {})
+
+    def test_sorted_and_probed_by_engine(self):
+        """O livro sai ordenado pela chave e a IA o consulta."""
+        import ai
+        path, _ = self._build(min_games=1)
+        with open(path, "rb") as f:
+            data = f.read()
+        keys = [data[i:i + 8] for i in range(0, len(data), 16)]
+        self.assertEqual(keys, sorted(keys))
+        book = ai.open_polyglot_book(path)
+        saved, ai._polyglot_book = ai._polyglot_book, book
+        try:
+            self.assertEqual(ai.find_best_ai_move(chess.Board(), seed=0), chess.Move.from_uci("e2e4"))
+        finally:
+            ai._polyglot_book = saved
+            book.close()
+
+    def test_castling_encoded_as_king_takes_rook(self):
+        """O-O vira e1h1 no arquivo e volta como e1g1 na leitura."""
+        with open(self.pgn, "w", encoding="utf-8") as f:
+            f.write(_game("1. e4 e5 2. Nf3 Nc6 3. Bc4 Bc5 4. O-O Nf6", "1-0"))
+        path, _ = self._build(min_games=1)
+        board = chess.Board()
+        for san in ["e4", "e5", "Nf3", "Nc6", "Bc4", "Bc5"]:
+            board.push_san(san)
+        with open(path, "rb") as f:
+            raw = [book_builder._BOOK_ENTRY.unpack(e)[1] for e in iter(lambda: f.read(16), b"")]
+        self.assertIn(chess.H1 | chess.E1 << 6, raw)
+        self.assertEqual(self._entries(path, board), {"e1g1": 2})
+
+    def test_shards_runs_and_workers_agree(self):
+        """Fatias pequenas, runs de poucas entradas, merge em cascata e processos: mesmo livro."""
+        shards = book_builder.shard_pgn(self.pgn, 100)
+        self.assertGreater(len(shards), 1)
+        with open(self.pgn, "rb") as f:
+            data = f.read()
+        self.assertEqual(shards[0][0], 0)
+        self.assertEqual(shards[-1][1], len(data))
+        for (_, end), (start, _) in zip(shards, shards[1:]):
+            self.assertEqual(end, start)
+            self.assertTrue(data[start:].startswith(b"[Event"))
+
+        reference, _ = self._build("ref.bin", min_games=1)
+        with mock.patch.object(book_builder, "_MAX_FAN_IN", 2):
+            split, stats = self._build("split.bin", min_games=1, shard_bytes=100, run_entries=3)
+        self.assertGreater(stats["runs"], 2)
+        parallel, _ = self._build("par.bin", min_games=1, shard_bytes=100, workers=2)
+        with open(reference, "rb") as a, open(split, "rb") as b, open(parallel, "rb") as c:
+            ref = a.read()
+            self.assertEqual(ref, b.read())
+            self.assertEqual(ref, c.read())
+
+
+if __name__ == "__main__":
+    unittest.main(verbosity=2)
@@ -0,0 +1,105 @@
+"""Testes unitários para a busca distribuída (workers TCP em processos locais)."""
+import math
+import multiprocessing
+import os
+import signal
+import sys
+import unittest
+
+import chess
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+import ai
+import distributed
+
+
+def _start_workers(count):
+    ctx   = multiprocessing.get_context("spawn")
+    ready = ctx.Queue()
+    procs = [ctx.Process(target=distributed.serve, args=("127.0.0.1", 0, ready), daemon=True)
+             for _ in range(count)]
+    for proc in procs:
+        proc.start()
+    ports = [ready.get(timeout=60) for _ in procs]
+    return procs, [("127.0.0.1", port) for port in ports]
+
+
+class TestSearchRootMove(unittest.TestCase):
+
+    def test_fail_low_is_not_exact(self):
+        """Lance abaixo de alpha volta marcado como limite, não como valor exato."""
+        board = ai._SearchBoard.from_board(chess.Board("4k3/8/8/3q4/8/8/3Q4/4K3 w - - 0 1"))
+        tt    = ai.TranspositionTable(1)
+        score, exact = distributed._search_root_move(board, chess.Move.from_uci("d2d5"), 2, -math.inf, math.inf, tt)
+        self.assertTrue(exact)
+        self.assertGreater(score, 5)
+        _, exact = distributed._search_root_move(board, chess.Move.from_uci("e1f1"), 2, score, math.inf, tt)
+        self.assertFalse(exact)
+
+    def test_black_to_move_uses_own_perspective(self):
+        """Com as pretas a jogar, capturar a dama também deve ter valor positivo."""
+        board = ai._SearchBoard.from_board(chess.Board("4k3/8/8/3q4/8/8/Q7/4K3 b - - 0 1"))
+        score, exact = distributed._search_root_move(board, chess.Move.from_uci("d5a2"), 2, -math.inf,
+                                                     math.inf, ai.TranspositionTable(1))
+        self.assertTrue(exact)
+        self.assertGreater(score, 5)
+
+
+class TestCoordinator(unittest.TestCase):
+
+    def setUp(self):
+        self.procs, addresses = _start_workers(2)
+        self.coordinator = distributed.Coordinator(addresses)
+
+    def tearDown(self):
+        self.coordinator.close()
+        for proc in self.procs:
+            proc.terminate()
+            proc.join()
+
+    def test_finds_free_queen(self):
+        """A busca repartida entre workers deve capturar a dama indefesa."""
+        board = chess.Board("4k3/8/8/3q4/8/8/3Q4/4K3 w - - 0 1")
+        move, depth, _ = self.coordinator.search(board, 1.0)
+        self.assertEqual(move, chess.Move.from_uci("d2d5"))
+        self.assertGreaterEqual(depth, 2)
+        self.assertEqual(len(self.coordinator.live_workers()), 2)
+
+    def test_worker_failure_reassigns_moves(self):
+        """Se um worker morre, seus lances vão para os outros e a busca continua."""
+        self.procs[0].terminate()
+        self.procs[0].join()
+        board = chess.Board()
+        board.push_uci("e2e4")
+        move, depth, _ = self.coordinator.search(board, 1.0)
+        self.assertIn(move, board.legal_moves)
+        self.assertGreaterEqual(depth, 1)
+        self.assertEqual(len(self.coordinator.live_workers()), 1)
+
+    @unittest.skipUnless(hasattr(signal, "SIGSTOP"), "precisa de SIGSTOP")
+    def test_stalled_worker_moves_are_reassigned(self):
+        """Worker parado (conexão aberta, sem respostas) perde os lances depois do limite por lance."""
+        self.coordinator.move_timeout = 0.3
+        os.kill(self.procs[0].pid, signal.SIGSTOP)
+        try:
+            board = chess.Board("4k3/8/8/3q4/8/8/3Q4/4K3 w - - 0 1")
+            move, depth, _ = self.coordinator.search(board, 3.0, max_depth=2)
+        finally:
+            os.kill(self.procs[0].pid, signal.SIGCONT)
+        self.assertEqual(move, chess.Move.from_uci("d2d5"))
+        self.assertEqual(depth, 2)
+        self.assertEqual(len(self.coordinator.live_workers()), 1)
+
+    def test_searches_locally_without_workers(self):
+        """Sem nenhum worker vivo, o coordenador busca sozinho."""
+        for proc in self.procs:
+            proc.terminate()
+            proc.join()
+        board = chess.Board("4k3/8/8/3q4/8/8/3Q4/4K3 w - - 0 1")
+        move, _, _ = self.coordinator.search(board, 0.5)
+        self.assertEqual(move, chess.Move.from_uci("d2d5"))
+        self.assertEqual(self.coordinator.live_workers(), [])
+
+
+if __name__ == "__main__":
+    unittest.main(verbosity=2)
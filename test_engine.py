@@ -0,0 +1,279 @@
+"""Testes do motor em processo separado: protocolo, sessão e cliente."""
+import io
+import math
+import os
+import queue
+import sys
+import time
+import unittest
+from unittest import mock
+
+import chess
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+import ai
+import engine
+import uci
+
+
+class _Recorder:
+    """`send` da sessão: guarda as linhas numa fila para o teste esperar por elas."""
+
+    def __init__(self):
+        self.lines = queue.Queue()
+
+    def __call__(self, line):
+        self.lines.put(line)
+
+    def bestmove(self, timeout=10.0):
+        """Próximo bestmove (as linhas info no caminho são guardadas em `infos`)."""
+        self.infos = []
+        deadline = time.monotonic() + timeout
+        while True:
+            line = self.lines.get(timeout=max(0.0, deadline - time.monotonic()))
+            if line.startswith("bestmove"):
+                return line.split()
+            self.infos.append(line)
+
+
+class TestProtocol(unittest.TestCase):
+
+    def test_position_round_trip(self):
+        """FEN da raiz + lances reconstrói a partida inteira, com o histórico."""
+        board = chess.Board("r3k2r/8/8/8/8/8/8/R3K2R w KQkq - 0 1")
+        for uci in ["e1g1", "e8c8", "f1f7"]:
+            board.push_uci(uci)
+        command = engine.position_command(board)
+        self.assertTrue(command.startswith("position fen r3k2r/8/8/8/8/8/8/R3K2R w KQkq - 0 1 moves"))
+        rebuilt = engine.parse_position(command.split()[1:])
+        self.assertEqual(rebuilt.fen(), board.fen())
+        self.assertEqual(rebuilt.move_stack, board.move_stack)
+        self.assertEqual(engine.position_command(chess.Board()), "position startpos")
+        with self.assertRaises(ValueError):
+            engine.parse_position(["startpos", "moves", "e2e5"])
+
+    def test_go_round_trip(self):
+        """Limites de find_best_ai_move → go → limites de volta."""
+        command = engine.go_command(time_limit=1.5, max_nodes=2000, max_depth=4, ponder=True)
+        limits  = engine.parse_go(command.split()[1:])
+        self.assertEqual(limits, {"movetime": 1500, "nodes": 2000, "depth": 4, "ponder": True})
+        self.assertEqual(engine.search_budget(limits), {"time_limit": 1.5, "max_nodes": 2000, "max_depth": 4})
+        self.assertEqual(engine.search_budget(engine.parse_go(["infinite", "xyz"])), {"time_limit": math.inf, "book": False})
+
+    def test_clock_budget(self):
+        """wtime/btime: fatia do relógio do lado a jogar mais parte do incremento, nunca o relógio todo."""
+        limits = engine.parse_go("wtime 60000 btime 30000 winc 1000 binc 0".split())
+        self.assertAlmostEqual(engine.search_budget(limits, chess.WHITE)["time_limit"], 60 / 30 + 0.75)
+        self.assertAlmostEqual(engine.search_budget(limits, chess.BLACK)["time_limit"], 30 / 30)
+        limits = engine.parse_go("wtime 2000 btime 2000 movestogo 1".split())
+        self.assertAlmostEqual(engine.search_budget(limits, chess.WHITE)["time_limit"], 2.0 - engine._CLOCK_MARGIN)
+        limits = engine.parse_go("wtime 10 btime 10 movetime 500".split())
+        self.assertEqual(engine.search_budget(limits, chess.WHITE), {"time_limit": 0.5})
+        self.assertEqual(engine.search_budget(engine.parse_go("wtime 10".split()))["time_limit"], 0.01)
+
+    def test_parse_setoption(self):
+        """Nome e valor podem ter espaços; sem `value`, valor vazio."""
+        self.assertEqual(engine.parse_setoption("name Hash value 64".split()), ("Hash", "64"))
+        self.assertEqual(engine.parse_setoption("name Clear Hash".split()), ("Clear Hash", ""))
+        with self.assertRaises(ValueError):
+            engine.parse_setoption(["Hash"])
+
+    def test_format_info_side_to_move(self):
+        """Valor em centipeões do lado a jogar; mate vira `score mate`."""
+        info = ai.SearchInfo(chess.Board())
+        info.depth, info.score, info.pv = 3, 0.5, [chess.Move.from_uci("e2e4")]
+        self.assertIn("score cp 50", engine.format_info(info, chess.WHITE))
+        self.assertIn("score cp -50", engine.format_info(info, chess.BLACK))
+        info.score, info.pv = -math.inf, [chess.Move.from_uci("f2f3"), chess.Move.from_uci("e7e5")]
+        self.assertIn("score mate 1", engine.format_info(info, chess.BLACK))
+        self.assertTrue(engine.format_info(info, chess.BLACK).endswith("pv f2f3 e7e5"))
+
+
+class TestEngineSession(unittest.TestCase):
+
+    _FEN = "r1bq1rk1/pp2bppp/2n1pn2/2pp4/3P4/2PBPN2/PP1N1PPP/R1BQ1RK1 w - - 0 8"
+
+    def setUp(self):
+        self.out     = _Recorder()
+        self.session = engine.EngineSession(self.out)
+
+    def tearDown(self):
+        self.session.handle("quit")
+
+    def test_go_depth_reports_info_and_bestmove(self):
+        """go depth 2: uma linha info por iteração e um bestmove legal."""
+        self.session.handle(f"position fen {self._FEN}")
+        self.session.handle("go depth 2")
+        best = self.out.bestmove()
+        self.assertIn(chess.Move.from_uci(best[1]), chess.Board(self._FEN).legal_moves)
+        self.assertTrue(any(line.startswith("info depth 2") for line in self.out.infos))
+
+    def test_stop_ends_infinite_search(self):
+        """go infinite só termina em stop, e responde bestmove na hora."""
+        self.session.handle(f"position fen {self._FEN}")
+        self.session.handle("go infinite")
+        time.sleep(0.3)
+        start = time.monotonic()
+        self.session.handle("stop")
+        best = self.out.bestmove(timeout=1.0)
+        self.assertLess(time.monotonic() - start, 1.0)
+        self.assertNotEqual(best[1], "0000")
+
+    def test_infinite_on_book_position_waits_for_stop(self):
+        """go infinite na posição inicial (livro) analisa de verdade e só responde no stop."""
+        self.session.handle("position startpos")
+        self.session.handle("go infinite")
+        time.sleep(0.5)
+        pending = list(self.out.lines.queue)
+        self.assertFalse(any(line.startswith("bestmove") for line in pending))
+        self.assertTrue(any(line.startswith("info depth") for line in pending))
+        self.session.handle("stop")
+        self.assertIn(chess.Move.from_uci(self.out.bestmove(timeout=1.0)[1]), chess.Board().legal_moves)
+
+    def test_ponder_waits_for_ponderhit(self):
+        """go ponder não responde antes do ponderhit; depois dele, respeita o movetime."""
+        board = chess.Board(self._FEN)
+        board.push_uci("h2h3")
+        self.session.handle(engine.position_command(board))
+        self.session.handle("go movetime 300 ponder")
+        time.sleep(0.5)
+        self.assertTrue(self.out.lines.empty() or
+                        not any(l.startswith("bestmove") for l in list(self.out.lines.queue)))
+        self.session.handle("ponderhit")
+        best = self.out.bestmove(timeout=3.0)
+        self.assertIn(chess.Move.from_uci(best[1]), board.legal_moves)
+
+    def test_failed_search_still_sends_bestmove(self):
+        """Exceção na busca: bestmove sai mesmo assim, com o lance da última iteração ou 0000."""
+        self.session.handle(f"position fen {self._FEN}")
+        with mock.patch.object(ai, "find_best_ai_move", side_effect=RuntimeError("falhou")):
+            self.session.handle("go depth 2")
+            self.assertEqual(self.out.bestmove(), ["bestmove", "0000"])
+        self.assertTrue(any("falhou" in line for line in self.out.infos))
+
+        def after_one_iteration(board, on_iteration, **_):
+            info = ai.SearchInfo(board)
+            info.move, info.score, info.depth, info.pv = chess.Move.from_uci("h2h3"), 0.0, 1, []
+            on_iteration(info)
+            raise RuntimeError("falhou")
+
+        with mock.patch.object(ai, "find_best_ai_move", side_effect=after_one_iteration):
+            self.session.handle("go depth 2")
+            self.assertEqual(self.out.bestmove()[:2], ["bestmove", "h2h3"])
+
+    def test_failed_ponder_still_sends_bestmove(self):
+        """Exceção na busca do ponder: o ponderhit ainda recebe um bestmove."""
+        board = chess.Board(self._FEN)
+        board.push_uci("h2h3")
+        self.session.handle(engine.position_command(board))
+        with mock.patch.object(ai, "_search", side_effect=RuntimeError("falhou")), \
+             mock.patch("threading.excepthook"):
+            self.session.handle("go movetime 300 ponder")
+            self.session.handle("ponderhit")
+            self.assertEqual(self.out.bestmove(timeout=3.0), ["bestmove", "0000"])
+
+    def test_ponder_without_moves_waits_for_stop(self):
+        """go ponder sem lance previsto (position fen sem moves) também só responde no stop."""
+        self.session.handle(f"position fen {self._FEN}")
+        self.session.handle("go ponder movetime 300")
+        time.sleep(0.5)
+        self.assertFalse(any(l.startswith("bestmove") for l in list(self.out.lines.queue)))
+        self.session.handle("stop")
+        self.assertIn(chess.Move.from_uci(self.out.bestmove(timeout=3.0)[1]), chess.Board(self._FEN).legal_moves)
+
+    def test_ponderhit_keeps_depth_limit(self):
+        """go ponder depth N: no ponderhit vale a profundidade, não DEFAULT_TIME_LIMIT."""
+        board = chess.Board(self._FEN)
+        board.push_uci("h2h3")
+        self.session.handle(engine.position_command(board))
+        self.session.handle("go ponder depth 2")
+        time.sleep(0.5)
+        start = time.monotonic()
+        self.session.handle("ponderhit")
+        best = self.out.bestmove(timeout=3.0)
+        self.assertLess(time.monotonic() - start, 1.0)
+        self.assertIn(chess.Move.from_uci(best[1]), board.legal_moves)
+
+    def test_setoption(self):
+        """Hash troca o tamanho da TT; Threads vai para a busca; valores fora da faixa são limitados."""
+        size = ai.TT_SIZE_MB
+        try:
+            self.session.handle("setoption name Hash value 1")
+            self.assertEqual(ai.TT_SIZE_MB, 1)
+            self.assertLess(ai._tt.size_mb, 2)
+        finally:
+            ai.set_hash_size(size)
+        self.session.handle("setoption name Threads value 999")
+        self.assertEqual(self.session.workers, engine.OPTIONS["Threads"][3])
+        self.session.handle("setoption name Nada value 1")
+        self.assertIn("Nada", self.out.lines.get(timeout=1.0))
+
+    def test_bad_command_is_reported(self):
+        """Lance ilegal em position não derruba a sessão."""
+        self.session.handle("position startpos moves e2e5")
+        self.assertTrue(self.out.lines.get(timeout=1.0).startswith("info string erro"))
+        self.session.handle("go depth 1")
+        self.assertIn(chess.Move.from_uci(self.out.bestmove()[1]), chess.Board().legal_moves)
+
+
+class TestUci(unittest.TestCase):
+
+    def test_handshake_and_search(self):
+        """`python uci.py`: handshake, opções, readyok e bestmove em stdout, e sai no fim da entrada."""
+        stdin  = io.StringIO("uci\nisready\nucinewgame\nposition startpos moves e2e4 c7c5 g1f3 e7e6\n"
+                             "go depth 2\nisready\n")
+        stdout = io.StringIO()
+        self.assertEqual(uci.main(stdin, stdout), 0)
+        lines = stdout.getvalue().splitlines()
+        self.assertEqual(lines[0], "id name Chess-AI")
+        self.assertIn("option name Hash type spin default 16 min 1 max 4096", lines)
+        self.assertEqual(lines[lines.index("uciok") + 1], "readyok")
+        best = [line for line in lines if line.startswith("bestmove")]
+        self.assertEqual(len(best), 1)
+        board = chess.Board()
+        for move in ["e2e4", "c7c5", "g1f3", "e7e6"]:
+            board.push_uci(move)
+        self.assertIn(chess.Move.from_uci(best[0].split()[1]), board.legal_moves)
+
+
+class TestEngineClient(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.client = engine.EngineClient()
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.client.close()
+
+    def _wait(self, timeout=60.0):
+        deadline = time.monotonic() + timeout
+        while time.monotonic() < deadline:
+            result = self.client.poll()
+            if result is not None:
+                return result
+            time.sleep(0.01)
+        self.fail("o motor não respondeu")
+
+    def test_search_in_subprocess(self):
+        """Busca no processo do motor; a dama indefesa é capturada."""
+        board = chess.Board("4k3/8/8/3q4/8/8/3Q4/4K3 w - - 0 1")
+        self.client.go(board, max_depth=2)
+        move, _ = self._wait()
+        self.assertEqual(move, chess.Move.from_uci("d2d5"))
+        self.assertFalse(self.client.searching)
+
+    def test_cancelled_result_is_discarded(self):
+        """Busca cancelada não entrega lance; a seguinte entrega o seu."""
+        board = chess.Board("4k3/8/8/3q4/8/8/3Q4/4K3 w - - 0 1")
+        self.client.go(chess.Board(TestEngineSession._FEN), time_limit=30.0)
+        time.sleep(0.2)
+        self.client.cancel()
+        self.assertFalse(self.client.searching)
+        self.client.go(board, max_depth=2)
+        move, _ = self._wait()
+        self.assertEqual(move, chess.Move.from_uci("d2d5"))
+
+
+if __name__ == "__main__":
+    unittest.main(verbosity=2)
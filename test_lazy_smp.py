@@ -0,0 +1,81 @@
+"""Testes unitários para o Lazy SMP (helpers em processos com TT compartilhada)."""
+import os
+import sys
+import time
+import unittest
+
+import chess
+import chess.polyglot
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+import ai
+import lazy_smp
+
+
+class TestLazySMP(unittest.TestCase):
+
+    @classmethod
+    def tearDownClass(cls):
+        lazy_smp.shutdown()
+
+    def test_finds_free_queen_with_helpers(self):
+        """Com 2 workers a busca ainda deve capturar a dama indefesa."""
+        board = chess.Board("4k3/8/8/3q4/8/8/3Q4/4K3 w - - 0 1")
+        move  = ai._search(board, time.monotonic() + 1.0, workers=2).move
+        self.assertEqual(move, chess.Move.from_uci("d2d5"))
+
+    def test_helpers_write_to_shared_table(self):
+        """As entradas gravadas pelos helpers devem ser visíveis no processo principal."""
+        board = chess.Board()
+        board.push_uci("e2e4")
+        pool = lazy_smp.get_pool(1, ai.TT_SIZE_MB)
+        pool.tt.clear()
+        pool.tt.new_search()
+        deadline = time.monotonic() + 0.5
+        pool.start_search(board, deadline, pool.tt.generation, max_depth=2)
+        move, depth = pool.collect(deadline)
+        self.assertIn(move, board.legal_moves)
+        self.assertGreaterEqual(depth, 1)
+        stored = 0
+        for reply in board.legal_moves:
+            board.push(reply)
+            stored += pool.tt.probe(chess.polyglot.zobrist_hash(board)) is not None
+            board.pop()
+        self.assertGreater(stored, 0)
+
+    def test_stop_reaches_helpers(self):
+        """stop() interrompe os helpers bem antes do prazo, e cada um ainda entrega um resultado."""
+        board = chess.Board()
+        board.push_uci("e2e4")
+        pool = lazy_smp.get_pool(1, ai.TT_SIZE_MB)
+        pool.start_search(board, time.monotonic() + 5.0, pool.tt.generation, max_depth=1)
+        pool.collect(time.monotonic() + 5.0)  # helper já iniciado antes de medir
+        deadline = time.monotonic() + 30.0
+        pool.start_search(board, deadline, pool.tt.generation, max_depth=ai._MAX_SEARCH_DEPTH)
+        time.sleep(0.5)
+        start = time.monotonic()
+        pool.stop()
+        move, _ = pool.collect(deadline)
+        self.assertLess(time.monotonic() - start, 2.0)
+        self.assertIn(move, board.legal_moves)
+
+    def test_depth_only_search_with_helpers(self):
+        """Só max_depth (deadline infinito): collect espera os helpers em vez de estourar no timeout."""
+        board = chess.Board("4k3/8/8/3q4/8/8/3Q4/4K3 w - - 0 1")
+        move, info = ai.find_best_ai_move(board, max_depth=2, workers=2, book=False, with_info=True)
+        self.assertEqual(move, chess.Move.from_uci("d2d5"))
+        self.assertEqual(info.depth, 2)
+        self.assertIn(ai.find_best_ai_move(chess.Board(), max_depth=2, workers=2, book=False),
+                      chess.Board().legal_moves)
+
+    def test_pool_is_reused(self):
+        """O pool persiste entre buscas e só é recriado se o número de helpers mudar."""
+        first = lazy_smp.get_pool(1, ai.TT_SIZE_MB)
+        self.assertIs(lazy_smp.get_pool(1, ai.TT_SIZE_MB), first)
+        second = lazy_smp.get_pool(2, ai.TT_SIZE_MB)
+        self.assertIsNot(second, first)
+        self.assertEqual(len(second._procs), 2)
+
+
+if __name__ == "__main__":
+    unittest.main(verbosity=2)
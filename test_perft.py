@@ -0,0 +1,56 @@
+"""Testes unitários para o perft (contagem de folhas da geração de lances)."""
+import os
+import sys
+import unittest
+
+import chess
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+import perft
+
+_KIWIPETE = "r3k2r/p1ppqpb1/bn2pnp1/3PN3/1p2P3/2N2Q1p/PPPBBPPP/R3K2R w KQkq - 0 1"
+
+
+class TestPerft(unittest.TestCase):
+
+    def test_start_position_counts(self):
+        """Posição inicial: 20, 400 e 8902 folhas nas profundidades 1 a 3."""
+        board = chess.Board()
+        self.assertEqual([perft.perft(board, d) for d in (1, 2, 3)], [20, 400, 8902])
+        self.assertEqual(board.fen(), chess.STARTING_FEN)
+
+    def test_suite_matches_reference_on_every_backend(self):
+        """Todas as posições de referência devem bater na profundidade 2, em todos os backends."""
+        for backend in perft.BACKENDS:
+            for res in perft.run_suite(depth=2, backend=backend):
+                self.assertEqual(res["nodes"], res["expected"], (backend, res["name"]))
+
+    def test_divide_sums_to_perft(self):
+        """A soma do divide deve ser o perft, com uma entrada por lance legal."""
+        board  = chess.Board(_KIWIPETE)
+        counts = perft.divide(board, 2)
+        self.assertEqual(len(counts), 48)
+        self.assertEqual(sum(counts.values()), 2039)
+        self.assertEqual(counts["e1g1"], 43)
+
+    def test_parallel_divide_matches_serial(self):
+        """Dividir a raiz entre processos deve dar as mesmas contagens por lance."""
+        board = perft.make_board(_KIWIPETE, "search")
+        self.assertEqual(perft.divide(board, 2, workers=2, backend="search"),
+                         perft.divide(board, 2))
+
+    def test_unknown_backend(self):
+        with self.assertRaises(ValueError):
+            perft.make_board(backend="inexistente")
+
+    def test_register_backend(self):
+        """Um backend registrado como "módulo:atributo" passa a ser aceito."""
+        perft.register_backend("teste", "chess:Board")
+        try:
+            self.assertEqual(perft.run(chess.STARTING_FEN, 2, backend="teste")[0], 400)
+        finally:
+            del perft.BACKENDS["teste"]
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,103 @@
+"""Testes unitários para a posição compacta da busca (position.py)."""
+import os
+import random
+import sys
+import unittest
+
+import chess
+import chess.polyglot
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+import perft
+from position import Position
+
+
+class TestPosition(unittest.TestCase):
+
+    def test_perft_matches_reference(self):
+        """Perft até a profundidade 3 deve bater com os valores de referência em toda a suíte."""
+        for name, fen, expected in perft.SUITE:
+            position = Position(fen)
+            self.assertEqual(perft.perft(position, 3), expected[2], name)
+            self.assertEqual(position.fen(), chess.Board(fen).fen(), name)
+
+    def test_random_games_agree_with_python_chess(self):
+        """Em partidas aleatórias: mesmos lances legais, xeque, hash, repetição e fim de jogo."""
+        rng = random.Random(7)
+        for _ in range(20):
+            board    = chess.Board()
+            position = Position.from_board(board)
+            for _ in range(150):
+                self.assertEqual(position.has_legal_moves(), any(board.legal_moves), board.fen())
+                self.assertEqual(set(position.generate_legal_moves()), set(board.legal_moves), board.fen())
+                self.assertEqual(position.is_check(), board.is_check(), board.fen())
+                self.assertEqual(position.zobrist, chess.polyglot.zobrist_hash(board), board.fen())
+                self.assertEqual(position.is_repetition(2), board.is_repetition(2), board.fen())
+                self.assertEqual(position.is_game_over(), board.is_game_over(), board.fen())
+                if board.is_game_over():
+                    break
+                move = rng.choice(list(board.legal_moves))
+                self.assertEqual(position.is_capture(move), board.is_capture(move), board.fen())
+                board.push(move)
+                position.push(move)
+            while board.move_stack:
+                board.pop()
+                position.pop()
+            self.assertEqual(position.fen(), chess.STARTING_FEN)
+            self.assertEqual(position.zobrist, chess.polyglot.zobrist_hash(board))
+
+    def test_special_moves(self):
+        """En passant cravado, roque através de xeque e promoções com captura."""
+        # en passant descobriria xeque da torre na mesma fileira
+        position = Position("8/8/8/K2pP2r/8/8/8/7k w - d6 0 1")
+        self.assertNotIn(chess.Move.from_uci("e5d6"), position.legal_moves)
+        # f1 atacado: só o roque grande; d1 atacado: só o pequeno
+        for fen, expected in (("4k3/8/8/8/8/8/5r2/R3K2R w KQ - 0 1", {"e1c1"}),
+                              ("4k3/8/8/8/8/8/3r4/R3K2R w KQ - 0 1", {"e1g1"})):
+            position = Position(fen)
+            castles  = {m.uci() for m in position.legal_moves if position.is_castling(m)}
+            self.assertEqual(castles, expected, fen)
+        position = Position("1r2k3/P7/8/8/8/8/8/4K3 w - - 0 1")
+        promotions = {m.uci() for m in position.legal_moves if m.promotion}
+        self.assertEqual(promotions, {"a7a8q", "a7a8r", "a7a8b", "a7a8n", "a7b8q", "a7b8r", "a7b8b", "a7b8n"})
+
+    def test_repetition_uses_game_history(self):
+        """Repetições anteriores à raiz (lances da partida) contam, e um lance irreversível as corta."""
+        board = chess.Board()
+        for uci in ["g1f3", "g8f6", "f3g1", "f6g8", "g1f3", "g8f6", "f3g1"]:
+            board.push_uci(uci)
+        position = Position.from_board(board)
+        position.push(chess.Move.from_uci("f6g8"))
+        self.assertTrue(position.is_repetition(3))
+        position.push(chess.Move.from_uci("e2e4"))
+        self.assertFalse(position.is_repetition(2))
+
+    def test_has_legal_moves_edge_cases(self):
+        """Afogamento com peça cravada, mate e xeque com só o rei a mover."""
+        for fen in ("8/8/8/8/8/1pk5/8/KB5r w - - 0 1",   # bispo cravado, rei sem casas
+                    "6rk/5Npp/8/8/8/8/8/6K1 b - - 0 1",   # mate sufocado
+                    "k7/8/8/8/8/8/r7/6K1 w - - 0 1",      # só o rei anda
+                    "7k/8/8/8/8/8/1q6/K7 w - - 0 1"):     # rei toma a dama
+            board = chess.Board(fen)
+            self.assertEqual(Position(fen).has_legal_moves(), any(board.legal_moves), fen)
+        self.assertTrue(Position("8/8/8/8/8/1pk5/8/KB5r w - - 0 1").is_stalemate())
+
+    def test_copy_is_independent(self):
+        position = Position()
+        clone    = position.copy()
+        clone.push(chess.Move.from_uci("e2e4"))
+        self.assertEqual(position.fen(), chess.STARTING_FEN)
+        self.assertNotEqual(clone.zobrist, position.zobrist)
+
+    def test_pop_beyond_root(self):
+        """O undo só cobre lances feitos na própria posição."""
+        board = chess.Board()
+        board.push_uci("e2e4")
+        position = Position.from_board(board)
+        self.assertEqual(position.peek(), chess.Move.from_uci("e2e4"))
+        with self.assertRaises(IndexError):
+            position.pop()
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,142 @@
+"""Testes do match da IA contra ela mesma: configurações, adjudicação, Elo/SPRT e PGN."""
+import math
+import os
+import sys
+import tempfile
+import unittest
+
+import chess
+import chess.pgn
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+import ai
+import selfplay
+
+
+class TestConfig(unittest.TestCase):
+
+    def test_parse_config(self):
+        """Limites vão para a busca; o resto são atributos do ai, com valores Python ou texto."""
+        search, overrides = selfplay.parse_config(["max_nodes=3000", "_NMP_REDUCTION=3", "_MOBILITY_MODE=legal"])
+        self.assertEqual(search, {"max_nodes": 3000})
+        self.assertEqual(overrides, {"_NMP_REDUCTION": 3, "_MOBILITY_MODE": "legal"})
+        for bad in (["max_nodes"], ["max_nodes=10", "_NAO_EXISTE=1"], ["_NMP_REDUCTION=3"]):
+            with self.assertRaises(ValueError):
+                selfplay.parse_config(bad)
+
+    def test_default_openings(self):
+        """Uma posição por linha do livro embutido, sem repetir."""
+        openings = selfplay.default_openings()
+        self.assertGreater(len(openings), 20)
+        self.assertEqual(len({board.fen() for board in openings}), len(openings))
+        self.assertTrue(all(board.move_stack for board in openings))
+
+    def test_load_openings_fen_and_epd(self):
+        """Arquivo de posições: FEN completa (com contadores) ou EPD, uma por linha; # é comentário."""
+        fen = "rnbqkbnr/pppppppp/8/8/4P3/8/PPPP1PPP/RNBQKBNR b KQkq - 0 1"
+        epd = "rnbqkbnr/pp1ppppp/8/2p5/4P3/8/PPPP1PPP/RNBQKBNR w KQkq - id \"siciliana\";"
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "aberturas.fen")
+            with open(path, "w", encoding="utf-8") as f:
+                f.write(f"# aberturas\n{fen}\n\n{epd}\n")
+            openings = selfplay.load_openings(path)
+        self.assertEqual([board.fen() for board in openings],
+                         [fen, "rnbqkbnr/pp1ppppp/8/2p5/4P3/8/PPPP1PPP/RNBQKBNR w KQkq - 0 1"])
+
+
+class TestAdjudication(unittest.TestCase):
+
+    def test_resign(self):
+        """Vitória só quando as duas configurações veem a vantagem em todos os últimos lances."""
+        win = [selfplay._RESIGN_SCORE] * selfplay._RESIGN_PLIES
+        self.assertEqual(selfplay.adjudicate(win, 30), "1-0")
+        self.assertEqual(selfplay.adjudicate([-math.inf] * selfplay._RESIGN_PLIES, 30), "0-1")
+        self.assertIsNone(selfplay.adjudicate(win[:-1] + [1.0], 30))
+        self.assertIsNone(selfplay.adjudicate(win[:-1] + [None], 30))
+
+    def test_draw(self):
+        """Empate: valor perto de zero por _DRAW_PLIES lances, só depois de _DRAW_MIN_PLY; e no limite de lances."""
+        flat = [0.0] * selfplay._DRAW_PLIES
+        self.assertEqual(selfplay.adjudicate(flat, selfplay._DRAW_MIN_PLY), "1/2-1/2")
+        self.assertIsNone(selfplay.adjudicate(flat, selfplay._DRAW_MIN_PLY - 1))
+        self.assertIsNone(selfplay.adjudicate(flat[:-1] + [0.5], selfplay._DRAW_MIN_PLY))
+        self.assertEqual(selfplay.adjudicate([3.0], selfplay._MAX_PLY), "1/2-1/2")
+
+
+class TestStatistics(unittest.TestCase):
+
+    def test_elo_interval(self):
+        """75% dos pontos ≈ +191 Elo; a margem encolhe com mais partidas."""
+        elo, margin = selfplay.elo_interval(60, 30, 10)
+        self.assertAlmostEqual(elo, -400 * math.log10(1 / 0.75 - 1))
+        _, bigger = selfplay.elo_interval(6, 3, 1)
+        self.assertLess(margin, bigger)
+        self.assertEqual(selfplay.elo_interval(10, 10, 10)[0], 0.0)
+        self.assertEqual(selfplay.elo_interval(0, 0, 0), (0.0, math.inf))
+
+    def test_sprt(self):
+        """LLR cresce com um resultado forte e cai com um resultado igual; limites de Wald."""
+        lower, upper = selfplay.sprt_bounds(0.05, 0.05)
+        self.assertAlmostEqual(upper, math.log(19))
+        self.assertAlmostEqual(lower, -math.log(19))
+        self.assertGreater(selfplay.sprt_llr(600, 300, 100, 0, 5), upper)
+        self.assertLess(selfplay.sprt_llr(30000, 40000, 30000, 0, 5), lower)
+        self.assertEqual(selfplay.sprt_llr(0, 10, 0, 0, 5), 0.0)  # sem variância: nada a concluir
+
+
+class TestPlay(unittest.TestCase):
+
+    _MATE_IN_ONE = "6k1/5ppp/8/8/8/8/5PPP/R5K1 w - - 0 1"
+
+    def test_game_keeps_sides_apart(self):
+        """Cada lado com os próprios atributos e estado; o módulo ai volta ao que era."""
+        tt, mode = ai._tt, ai._MOBILITY_MODE
+        white = selfplay.parse_config(["max_depth=1", "_MOBILITY_MODE=legal"])
+        black = selfplay.parse_config(["max_depth=1"])
+        game  = selfplay.play_game(chess.STARTING_FEN, ["e2e4", "e7e5"], white, black, seed=1)
+        self.assertIs(ai._tt, tt)
+        self.assertEqual(ai._MOBILITY_MODE, mode)
+        self.assertIn(game["result"], ("1-0", "0-1", "1/2-1/2"))
+        self.assertIn(game["termination"], ("normal", "adjudication"))
+        self.assertEqual(game["moves"][:2], ["e2e4", "e7e5"])
+        self.assertEqual(len(game["moves"]), game["plies"] + 2)
+        self.assertGreater(game["nodes"]["white"], 0)
+        self.assertGreater(game["nodes"]["black"], 0)
+
+    def test_mate_ends_game(self):
+        """Partida que termina no tabuleiro: mate em 1 jogado e resultado normal."""
+        config = selfplay.parse_config(["max_depth=2"])
+        game   = selfplay.play_game(self._MATE_IN_ONE, [], config, config, seed=0)
+        self.assertEqual(game["moves"], ["a1a8"])
+        self.assertEqual((game["result"], game["termination"]), ("1-0", "normal"))
+
+    def test_match_writes_pgn(self):
+        """Pares de partidas com cores trocadas, gravados no PGN com a FEN da abertura."""
+        config   = selfplay.parse_config(["max_depth=1"])
+        openings = [chess.Board(self._MATE_IN_ONE)]
+        with tempfile.TemporaryDirectory() as tmp:
+            path  = os.path.join(tmp, "match.pgn")
+            stats = selfplay.run(config, config, games=4, openings=openings, workers=1, pgn_path=path)
+            with open(path, encoding="utf-8") as f:
+                games = list(iter(lambda: chess.pgn.read_game(f), None))
+        # quem tem as brancas dá mate: uma vitória e uma derrota de `test` por par
+        self.assertEqual((stats["games"], stats["wins"], stats["losses"]), (4, 2, 2))
+        self.assertEqual(stats["elo"], 0.0)
+        self.assertIsNone(stats["verdict"])
+        self.assertEqual(len(games), 4)
+        self.assertEqual([g.headers["White"] for g in games[:2]], ["test (max_depth=1)", "base (max_depth=1)"])
+        self.assertEqual(games[0].headers["FEN"], self._MATE_IN_ONE)
+        self.assertEqual(games[0].headers["Result"], "1-0")
+
+    def test_sprt_stops_match(self):
+        """Com 50% dos pontos, a hipótese de +200 Elo cai bem antes do limite de partidas."""
+        config = selfplay.parse_config(["max_depth=1"])
+        stats  = selfplay.run(config, config, games=200, openings=[chess.Board(self._MATE_IN_ONE)],
+                              workers=1, elo0=200, elo1=400)
+        self.assertEqual(stats["verdict"], "H0")
+        self.assertLess(stats["games"], 40)
+        self.assertLessEqual(stats["llr"], stats["bounds"][0])
+
+
+if __name__ == "__main__":
+    unittest.main(verbosity=2)
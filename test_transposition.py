@@ -0,0 +1,146 @@
+"""Testes unitários para a transposition table compacta."""
+import math
+import os
+import sys
+import tempfile
+import unittest
+
+import chess
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+import transposition
+from transposition import TranspositionTable, decode_move, encode_move, slots_for_mb
+
+
+def _key(bucket, check):
+    """Hash sintético que cai em `bucket` com os 16 bits de verificação `check`."""
+    return (check << 48) | bucket
+
+
+class TestMoveEncoding(unittest.TestCase):
+
+    def test_roundtrip(self):
+        """Lances normais, promoções e None devem sobreviver à codificação em 16 bits."""
+        for uci in ("e2e4", "g1f3", "e1g1", "a7a8q", "b2b1n", "h7g8r"):
+            move = chess.Move.from_uci(uci)
+            code = encode_move(move)
+            self.assertLess(code, 1 << 16)
+            self.assertEqual(decode_move(code), move)
+        self.assertEqual(encode_move(None), 0)
+        self.assertIsNone(decode_move(0))
+
+
+class TestTranspositionTable(unittest.TestCase):
+
+    def test_size_in_mb(self):
+        """A tabela deve ocupar no máximo o tamanho pedido, em potência de 2 de entradas."""
+        tt = TranspositionTable(1)
+        self.assertEqual(len(tt), 1024 * 1024 // 8)
+        self.assertLessEqual(TranspositionTable(3).size_mb, 3)
+        self.assertEqual(slots_for_mb(3) & (slots_for_mb(3) - 1), 0)
+
+    def test_store_and_probe(self):
+        """Valores, flags, profundidade e lance devem voltar como foram gravados."""
+        tt   = TranspositionTable(1)
+        move = chess.Move.from_uci("e7e8q")
+        tt.store(_key(5, 0xABCD), 7, -1.35, 2, move)
+        self.assertEqual(tt.probe(_key(5, 0xABCD)), (7, -1.35, 2, move))
+        self.assertIsNone(tt.probe(_key(5, 0x1234)))
+        self.assertIsNone(tt.probe(_key(6, 0xABCD)))
+
+    def test_infinite_values(self):
+        """Mate (±inf) deve ser preservado."""
+        tt = TranspositionTable(1)
+        tt.store(_key(1, 1), 3, math.inf, 0, None)
+        tt.store(_key(2, 1), 3, -math.inf, 0, None)
+        self.assertEqual(tt.probe(_key(1, 1))[1], math.inf)
+        self.assertEqual(tt.probe(_key(2, 1))[1], -math.inf)
+
+    def test_depth_preferred_and_always_replace(self):
+        """Entrada rasa não expulsa a mais profunda: vai para o slot sempre-substitui."""
+        tt = TranspositionTable(1)
+        tt.store(_key(9, 1), 8, 0.5, 0, None)
+        tt.store(_key(9, 2), 2, 0.1, 0, None)
+        tt.store(_key(9, 3), 1, 0.2, 0, None)
+        self.assertEqual(tt.probe(_key(9, 1))[0], 8)
+        self.assertIsNone(tt.probe(_key(9, 2)))
+        self.assertEqual(tt.probe(_key(9, 3))[0], 1)
+
+    def test_old_generation_ages_out(self):
+        """Após new_search, a entrada profunda antiga pode ser substituída."""
+        tt = TranspositionTable(1)
+        tt.store(_key(3, 1), 10, 0.5, 0, None)
+        tt.new_search()
+        tt.store(_key(3, 2), 1, 0.1, 0, None)
+        self.assertIsNone(tt.probe(_key(3, 1)))
+        self.assertEqual(tt.probe(_key(3, 2))[0], 1)
+
+    def test_keeps_move_when_storing_without_one(self):
+        """Regravar a mesma posição sem lance preserva o lance conhecido."""
+        tt   = TranspositionTable(1)
+        move = chess.Move.from_uci("g1f3")
+        tt.store(_key(4, 7), 2, 0.0, 0, move)
+        tt.store(_key(4, 7), 3, 0.0, 1, None)
+        self.assertEqual(tt.probe(_key(4, 7)), (3, 0.0, 1, move))
+
+    def test_fill_rate(self):
+        """Fill rate começa em 0 e cresce ao gravar na região amostrada."""
+        tt = TranspositionTable(1)
+        self.assertEqual(tt.fill_rate(), 0.0)
+        for bucket in range(250):
+            tt.store(_key(bucket, 1), 1, 0.0, 0, None)
+        self.assertAlmostEqual(tt.fill_rate(), 0.25)
+        tt.clear()
+        self.assertEqual(tt.fill_rate(), 0.0)
+
+
+class TestSnapshot(unittest.TestCase):
+
+    def setUp(self):
+        self.dir = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.dir.name, "tt.bin")
+
+    def tearDown(self):
+        self.dir.cleanup()
+
+    def test_save_and_load(self):
+        """O snapshot mapeado devolve as entradas e a geração gravadas."""
+        tt   = TranspositionTable(1)
+        move = chess.Move.from_uci("e2e4")
+        tt.new_search()
+        tt.store(_key(11, 0x4242), 6, 0.25, 0, move)
+        tt.save(self.path)
+        loaded = TranspositionTable.load(self.path)
+        try:
+            self.assertEqual(len(loaded), len(tt))
+            self.assertEqual(loaded.generation, tt.generation)
+            self.assertEqual(loaded.probe(_key(11, 0x4242)), (6, 0.25, 0, move))
+            # copy-on-write: gravar na tabela carregada não altera o arquivo
+            loaded.store(_key(12, 1), 1, 0.0, 0, None)
+        finally:
+            loaded.release()
+        reloaded = TranspositionTable.load(self.path)
+        try:
+            self.assertIsNone(reloaded.probe(_key(12, 1)))
+        finally:
+            reloaded.release()
+
+    def test_rejects_invalid_file(self):
+        """Arquivo que não é snapshot levanta ValueError."""
+        with open(self.path, "wb") as f:
+            f.write(b"x" * 64)
+        with self.assertRaises(ValueError):
+            TranspositionTable.load(self.path)
+
+    def test_rejects_truncated_body(self):
+        """Cabeçalho válido com corpo de tamanho errado (20 ou 24 bytes) também é ValueError."""
+        header = transposition._SNAPSHOT_HEADER.pack(transposition._SNAPSHOT_MAGIC, 1)
+        for size in (20, 24):
+            with open(self.path, "wb") as f:
+                f.write(header + bytes(size))
+            with self.subTest(size=size), self.assertRaises(ValueError):
+                TranspositionTable.load(self.path)
+
+
+if __name__ == "__main__":
+    unittest.main(verbosity=2)
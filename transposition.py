@@ -0,0 +1,184 @@
+import mmap
+import os
+import struct
+
+import chess
+
+# Layout de cada entrada (64 bits):
+#   bits  0–15  verificação da chave (16 bits altos do hash)
+#   bits 16–31  lance (from | to << 6 | promoção << 12)
+#   bits 32–47  valor em centipawns (complemento de dois; ±_VALUE_INF = ±inf)
+#   bits 48–55  profundidade
+#   bits 56–57  flag (exata / limite inferior / limite superior)
+#   bits 58–63  geração (0 = entrada vazia)
+_ENTRY_BYTES   = 8
+_BUCKET_SLOTS  = 2      # slot 0: prefere profundidade; slot 1: sempre substitui
+_VALUE_INF     = 32767
+_VALUE_MAX     = 32000
+_GENERATIONS   = 63
+_FILL_SAMPLE   = 1000
+_SNAPSHOT_MAGIC  = b"CHESSTT1"
+_SNAPSHOT_HEADER = struct.Struct("<8sQ")  # magic, geração; 16 bytes mantêm as entradas alinhadas
+
+
+def encode_move(move):
+    if not move:
+        return 0
+    return move.from_square | (move.to_square << 6) | ((move.promotion or 0) << 12)
+
+
+def decode_move(code):
+    if not code:
+        return None
+    return chess.Move(code & 63, (code >> 6) & 63, (code >> 12) or None)
+
+
+def _encode_value(value):
+    if value == float("inf"):
+        return _VALUE_INF
+    if value == float("-inf"):
+        return -_VALUE_INF
+    return max(-_VALUE_MAX, min(_VALUE_MAX, round(value * 100)))
+
+
+def _decode_value(cp):
+    if cp == _VALUE_INF:
+        return float("inf")
+    if cp == -_VALUE_INF:
+        return float("-inf")
+    return cp / 100.0
+
+
+def slots_for_mb(size_mb):
+    """Número de entradas (potência de 2, em buckets completos) que cabe em `size_mb`."""
+    entries = max(_BUCKET_SLOTS, int(size_mb * 1024 * 1024) // _ENTRY_BYTES)
+    buckets = 1 << ((entries // _BUCKET_SLOTS).bit_length() - 1)
+    return buckets * _BUCKET_SLOTS
+
+
+def _valid_size(nbytes):
+    """True se `nbytes` são uma potência de 2 (≥ um bucket) de entradas de 64 bits."""
+    slots = nbytes // _ENTRY_BYTES
+    return nbytes % _ENTRY_BYTES == 0 and slots >= _BUCKET_SLOTS and not slots & (slots - 1)
+
+
+class TranspositionTable:
+    """
+    Transposition table de tamanho fixo com entradas de 64 bits empacotadas.
+    Cada bucket tem dois slots: o primeiro guarda a entrada mais profunda
+    (ou a substitui quando ficou de uma busca antiga), o segundo é sempre
+    sobrescrito. A geração avança a cada busca para que entradas velhas
+    envelheçam em vez de congelar a tabela.
+    """
+
+    def __init__(self, size_mb=16, buffer=None):
+        if buffer is None:
+            buffer = bytearray(slots_for_mb(size_mb) * _ENTRY_BYTES)
+        self._bytes = memoryview(buffer).cast("B")
+        if not _valid_size(len(self._bytes)):
+            self._bytes.release()
+            raise ValueError("o buffer da TT deve ter uma potência de 2 de entradas de 64 bits")
+        self._data  = self._bytes.cast("Q")
+        self._mask      = len(self._data) // _BUCKET_SLOTS - 1
+        self._mmap      = None
+        self.generation = 1
+
+    @classmethod
+    def load(cls, path):
+        """
+        Abre um snapshot gravado por `save`, mapeado em memória (copy-on-write:
+        a busca escreve nas páginas do processo, o arquivo só muda no próximo save).
+        Levanta ValueError se o arquivo não for um snapshot válido.
+        """
+        with open(path, "rb") as f:
+            mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_COPY)
+        if len(mm) < _SNAPSHOT_HEADER.size:
+            mm.close()
+            raise ValueError(f"{path}: snapshot truncado")
+        magic, generation = _SNAPSHOT_HEADER.unpack_from(mm)
+        if magic != _SNAPSHOT_MAGIC or not 1 <= generation <= _GENERATIONS:
+            mm.close()
+            raise ValueError(f"{path}: não é um snapshot da TT")
+        if not _valid_size(len(mm) - _SNAPSHOT_HEADER.size):  # gravado pela metade ou truncado
+            mm.close()
+            raise ValueError(f"{path}: snapshot com tamanho inválido")
+        body = memoryview(mm)[_SNAPSHOT_HEADER.size:]
+        try:
+            tt = cls(buffer=body)
+        except ValueError:
+            body.release()
+            mm.close()
+            raise
+        body.release()  # a tabela guarda as próprias views
+        tt._mmap       = mm
+        tt.generation  = generation
+        return tt
+
+    def save(self, path):
+        """Grava a tabela em `path` (arquivo temporário + rename, para nunca deixar um snapshot pela metade)."""
+        tmp = f"{path}.tmp"
+        with open(tmp, "wb") as f:
+            f.write(_SNAPSHOT_HEADER.pack(_SNAPSHOT_MAGIC, self.generation))
+            f.write(self._bytes)
+        os.replace(tmp, path)
+
+    @property
+    def size_mb(self):
+        return len(self._bytes) / (1024 * 1024)
+
+    def __len__(self):
+        return len(self._data)
+
+    def new_search(self):
+        self.generation = self.generation % _GENERATIONS + 1
+
+    def clear(self):
+        self._bytes[:] = bytes(len(self._bytes))
+        self.generation = 1
+
+    def probe(self, key):
+        """Retorna `(depth, value, flag, move)` ou None."""
+        check = key >> 48
+        idx   = (key & self._mask) * _BUCKET_SLOTS
+        data  = self._data
+        for slot in (idx, idx + 1):
+            entry = data[slot]
+            if entry and entry & 0xFFFF == check:
+                value = (entry >> 32) & 0xFFFF
+                if value >= 0x8000:
+                    value -= 0x10000
+                return ((entry >> 48) & 0xFF, _decode_value(value),
+                        (entry >> 56) & 3, decode_move((entry >> 16) & 0xFFFF))
+        return None
+
+    def store(self, key, depth, value, flag, move):
+        check = key >> 48
+        idx   = (key & self._mask) * _BUCKET_SLOTS
+        data  = self._data
+        first = data[idx]
+        if first and first & 0xFFFF != check and first >> 58 == self.generation \
+                and (first >> 48) & 0xFF > depth:
+            slot = idx + 1
+        else:
+            slot = idx
+        old = data[slot]
+        code = encode_move(move)
+        if not code and old and old & 0xFFFF == check:
+            code = (old >> 16) & 0xFFFF  # mantém o melhor lance conhecido da posição
+        data[slot] = (check | (code << 16) | ((_encode_value(value) & 0xFFFF) << 32)
+                      | (min(max(depth, 0), 255) << 48) | (flag << 56)
+                      | (self.generation << 58))
+
+    def release(self):
+        """Libera as views do buffer (necessário antes de fechar memória compartilhada)."""
+        self._data.release()
+        self._bytes.release()
+        if self._mmap is not None:
+            self._mmap.close()
+            self._mmap = None
+
+    def fill_rate(self):
+        """Fração (0–1) de entradas ocupadas pela busca atual, estimada por amostragem."""
+        sample = self._data[:min(_FILL_SAMPLE, len(self._data))]
+        used   = sum(1 for entry in sample if entry and entry >> 58 == self.generation)
+        return used / len(sample)
@@ -0,0 +1,27 @@
+"""
+Motor em modo UCI, sem janela nem pygame: lê comandos em stdin e responde em
+stdout, para rodar em gerenciadores de torneio (cutechess-cli, Arena,
+BanksiaGUI...) e em lotes. Os comandos suportados estão em engine.py.
+
+    python uci.py
+    cutechess-cli -engine cmd="python uci.py" -engine cmd=stockfish -each tc=60+1 -games 20
+"""
+import sys
+
+import engine
+
+
+def main(stdin=None, stdout=None):
+    stdin  = stdin or sys.stdin
+    stdout = stdout or sys.stdout
+
+    def send(line):
+        stdout.write(line + "\n")
+        stdout.flush()
+
+    engine.run(stdin, send)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())